@@ -7,80 +7,216 @@ to OpenInference format for compatibility with Arize AI.
 
 import json
 import logging
-from typing import Any, Dict, List, Optional, Set
-from datetime import datetime
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
 from opentelemetry.trace import Span
 
 logger = logging.getLogger(__name__)
 
+_SHUTDOWN = object()  # end-of-queue marker for the export thread
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
 class StrandsToOpenInferenceProcessor(SpanProcessor):
     """
     SpanProcessor that converts Strands telemetry attributes to OpenInference format
     for compatibility with Arize AI.
+
+    Only the name and parent of each open span are kept, which is all the
+    graph node mapping needs. A trace's entries are dropped when its root span
+    ends, and at most ``max_spans`` entries are kept (least recently started
+    first out), so memory stays bounded for long-running agents.
+
+    By default spans are converted in place when they end, for an exporting
+    processor registered after this one. When an ``exporter`` is given, the
+    processor exports itself instead: ended spans are put on a bounded queue
+    and a background thread converts and exports them in batches, so the
+    conversion cost stays off the agent's threads. Spans that do not fit in
+    the queue are dropped and counted in ``spans_dropped``.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        max_spans: int = 10000,
+        exporter: Optional[SpanExporter] = None,
+        max_queue_size: int = 2048,
+        max_export_batch_size: int = 512,
+        schedule_delay_millis: int = 1000,
+        enqueue_timeout_millis: int = 0,
+    ):
         """
         Initialize the processor.
         
         Args:
             debug: Whether to log debug information
+            max_spans: Maximum number of spans tracked in the hierarchy at once
+            exporter: Exporter for converted spans; enables the asynchronous mode
+            max_queue_size: Maximum number of ended spans waiting for conversion
+            max_export_batch_size: Maximum number of spans per export call
+            schedule_delay_millis: Longest time a span waits before its batch is exported
+            enqueue_timeout_millis: How long on_end waits for room in a full queue
+                before dropping the span (0 drops immediately)
         """
         super().__init__()
         self.debug = debug
-        self.processed_spans = set()
+        self.max_spans = max_spans
+        self.spans_processed = 0
         self.current_cycle_id = None
-        self.span_hierarchy = {}
+        # span_id -> (name, parent_id, trace_id)
+        self.span_hierarchy: "OrderedDict[int, Tuple[str, Optional[int], int]]" = OrderedDict()
+        self._trace_spans: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+        self.exporter = exporter
+        self.max_export_batch_size = max_export_batch_size
+        self.schedule_delay = schedule_delay_millis / 1000
+        self.enqueue_timeout = enqueue_timeout_millis / 1000
+        self.spans_dropped = 0
+        self.spans_exported = 0
+        self.export_failures = 0
+        self._queue: "Optional[queue.Queue]" = None
+        self._worker: Optional[threading.Thread] = None
+        self._shutdown = False
+        if exporter is not None:
+            self._queue = queue.Queue(maxsize=max_queue_size)
+            self._worker = threading.Thread(target=self._export_loop, name="OpenInferenceExport", daemon=True)
+            self._worker.start()
 
     def on_start(self, span, parent_context=None):
         """Called when a span is started. Track span hierarchy."""
-        span_id = span.get_span_context().span_id
+        span_context = span.get_span_context()
+        span_id = span_context.span_id
         parent_id = None
         
         if parent_context and hasattr(parent_context, 'span_id'):
             parent_id = parent_context.span_id
         elif span.parent and hasattr(span.parent, 'span_id'):
             parent_id = span.parent.span_id
-            
-        self.span_hierarchy[span_id] = {
-            'name': span.name,
-            'span_id': span_id,
-            'parent_id': parent_id,
-            'start_time': datetime.now().isoformat()
-        }
+        
+        with self._lock:
+            self.span_hierarchy[span_id] = (span.name, parent_id, span_context.trace_id)
+            self._trace_spans.setdefault(span_context.trace_id, set()).add(span_id)
+            while len(self.span_hierarchy) > self.max_spans:
+                self._forget(*self.span_hierarchy.popitem(last=False))
 
     def on_end(self, span: Span):
         """
         Called when a span ends. Transform the span attributes from Strands format
-        to OpenInference format.
+        to OpenInference format, or queue the span for the export thread.
         """
-        if not hasattr(span, '_attributes') or not span._attributes:
+        if self._queue is None:
+            transformed_attrs = self._convert(span)
+            if transformed_attrs is not None:
+                # Attributes of an ended span are immutable, so the mapping is swapped
+                # on this span object, which later processors receive as well
+                span._attributes = transformed_attrs
             return
 
-        original_attrs = dict(span._attributes)
-        span_id = span.get_span_context().span_id
-        
-        if span_id in self.span_hierarchy:
-            self.span_hierarchy[span_id]['attributes'] = original_attrs
-        
         try:
-            if "event_loop.cycle_id" in original_attrs:
-                self.current_cycle_id = original_attrs.get("event_loop.cycle_id")
-            
-            transformed_attrs = self._transform_attributes(original_attrs, span)
-            span._attributes.clear()
-            span._attributes.update(transformed_attrs)
-            self.processed_spans.add(span_id)
-            
+            if self._shutdown:
+                raise queue.Full
+            if self.enqueue_timeout > 0:
+                self._queue.put(span, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(span)
+        except queue.Full:
+            with self._lock:
+                self.spans_dropped += 1
+                dropped = self.spans_dropped
+            self._release(span.get_span_context().span_id)
             if self.debug:
-                logger.info(f"Transformed span '{span.name}': {len(original_attrs)} -> {len(transformed_attrs)} attributes")
-                
+                logger.warning(f"Export queue full, dropped span '{span.name}' ({dropped} dropped)")
+
+    def _convert(self, span) -> Optional[Dict[str, Any]]:
+        """
+        OpenInference attributes for an ended span, or None to keep its attributes.
+        """
+        try:
+            if not getattr(span, '_attributes', None):
+                return None
+
+            original_attrs = dict(span._attributes)
+            try:
+                if "event_loop.cycle_id" in original_attrs:
+                    self.current_cycle_id = original_attrs.get("event_loop.cycle_id")
+
+                transformed_attrs = self._transform_attributes(original_attrs, span)
+                self.spans_processed += 1
+
+                if self.debug:
+                    logger.info(f"Transformed span '{span.name}': {len(original_attrs)} -> {len(transformed_attrs)} attributes")
+                return transformed_attrs
+
+            except Exception as e:
+                logger.error(f"Failed to transform span '{span.name}': {e}", exc_info=True)
+                return None
+        finally:
+            self._release(span.get_span_context().span_id)
+
+    def _export_loop(self):
+        """Export thread: collect ended spans into batches, convert and export them."""
+        batch: List[Any] = []
+        deadline = time.monotonic() + self.schedule_delay
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is _SHUTDOWN:
+                self._export_batch(batch)
+                return
+            if isinstance(item, threading.Event):
+                # force_flush marker: everything queued before it is in the batch
+                self._export_batch(batch)
+                batch = []
+                item.set()
+            elif item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.max_export_batch_size or time.monotonic() >= deadline:
+                self._export_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.schedule_delay
+
+    def _export_batch(self, batch: List[Any]):
+        if not batch:
+            return
+        converted = []
+        for span in batch:
+            transformed_attrs = self._convert(span)
+            converted.append(span if transformed_attrs is None else _with_attributes(span, transformed_attrs))
+        try:
+            self.exporter.export(converted)
+            self.spans_exported += len(converted)
         except Exception as e:
-            logger.error(f"Failed to transform span '{span.name}': {e}", exc_info=True)
-            span._attributes.clear()
-            span._attributes.update(original_attrs)
+            self.export_failures += 1
+            logger.error(f"Failed to export {len(converted)} spans: {e}", exc_info=True)
+
+    def _release(self, span_id: int):
+        """Drop a trace's hierarchy once its root span has ended."""
+        with self._lock:
+            info = self.span_hierarchy.get(span_id)
+            if info is None or info[1] is not None:
+                return
+            for trace_span_id in self._trace_spans.pop(info[2], ()):
+                self.span_hierarchy.pop(trace_span_id, None)
+
+    def _forget(self, span_id: int, info: Tuple[str, Optional[int], int]):
+        trace_spans = self._trace_spans.get(info[2])
+        if trace_spans is not None:
+            trace_spans.discard(span_id)
+            if not trace_spans:
+                del self._trace_spans[info[2]]
 
     def _transform_attributes(self, attrs: Dict[str, Any], span: Span) -> Dict[str, Any]:
         """
@@ -112,6 +248,9 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             elif isinstance(tags, str):
                 result[f"tag.{tags}"] = str(tags)
         
+        # Token usage first, the LLM output value includes it
+        self._map_token_usage(attrs, result)
+        
         # Handle different span types
         if span_kind == "LLM":
             self._handle_chain_and_llm_span(attrs, result, prompt, completion)
@@ -122,9 +261,6 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         elif span_kind == "CHAIN":
             self._handle_chain_and_llm_span(attrs, result, prompt, completion)
         
-        # Handle token usage
-        self._map_token_usage(attrs, result)
-        
         important_attrs = [
             "session.id", "user.id", "llm.prompt_template.template",
             "llm.prompt_template.version", "llm.prompt_template.variables",
@@ -162,10 +298,10 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         span_id = span.get_span_context().span_id
         
         # Get parent information from span hierarchy
-        span_info = self.span_hierarchy.get(span_id, {})
-        parent_id = span_info.get('parent_id')
-        parent_info = self.span_hierarchy.get(parent_id, {}) if parent_id else {}
-        parent_name = parent_info.get('name', '')
+        span_info = self.span_hierarchy.get(span_id)
+        parent_id = span_info[1] if span_info else None
+        parent_info = self.span_hierarchy.get(parent_id) if parent_id else None
+        parent_name = parent_info[0] if parent_info else ''
         
         if span_kind == "AGENT":
             result["graph.node.id"] = "strands_agent"
@@ -208,14 +344,11 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
 
     def _handle_chain_and_llm_span(self, attrs: Dict[str, Any], result: Dict[str, Any], prompt: Any, completion: Any):
         """Handle LLM-specific attributes."""
-        if prompt:
-            self._map_messages(prompt, result, is_input=True)
-        
-        if completion:
-            self._map_messages(completion, result, is_input=False)
+        input_messages = self._map_messages(prompt, result, is_input=True) if prompt else None
+        output_messages = self._map_messages(completion, result, is_input=False) if completion else None
+        invocation_params = self._map_invocation_parameters(attrs, result)
         
-        self._add_input_output_values(attrs, result)
-        self._map_invocation_parameters(attrs, result)
+        self._add_input_output_values(attrs, result, input_messages, output_messages, invocation_params)
     
     def _handle_tool_span(self, attrs: Dict[str, Any], result: Dict[str, Any]):
         """Handle tool-specific attributes."""
@@ -232,22 +365,23 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             result["tool.description"] = tool_description
         
         if tool_params := attrs.get("tool.parameters"):
-            result["tool.parameters"] = self._serialize_value(tool_params)
+            serialized_params = self._serialize_value(tool_params)
+            result["tool.parameters"] = serialized_params
             tool_call = {
                 "tool_call.id": attrs.get("tool.id", ""),
                 "tool_call.function.name": attrs.get("tool.name", ""),
-                "tool_call.function.arguments": self._serialize_value(tool_params)
+                "tool_call.function.arguments": serialized_params
             }
             
             input_message = {
                 "message.role": "assistant",
                 "message.tool_calls": [tool_call]
             }
-            result["llm.input_messages"] = json.dumps([input_message], separators=(",", ":"))
+            result["llm.input_messages"] = _dumps([input_message])
             result["llm.input_messages.0.message.role"] = "assistant"
             result["tool_call.id"] = attrs.get("tool.id", "")
             result["tool_call.function.name"] = attrs.get("tool.name", "")
-            result["tool_call.function.arguments"] = self._serialize_value(tool_params)
+            result["tool_call.function.arguments"] = serialized_params
         
             for key, value in tool_call.items():
                 result[f"llm.input_messages.0.message.tool_calls.0.{key}"] = value
@@ -261,17 +395,18 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 if "error" in tool_result:
                     result["tool.error"] = self._serialize_value(tool_result.get("error"))
 
+            serialized_content = self._serialize_value(tool_result_content)
             output_message = {
                 "message.role": "tool",
-                "message.content": self._serialize_value(tool_result_content),
+                "message.content": serialized_content,
                 "message.tool_call_id": attrs.get("tool.id", "")
             }
 
             if tool_name := attrs.get("tool.name"):
                 output_message["message.name"] = tool_name
-            result["llm.output_messages"] = json.dumps([output_message], separators=(",", ":"))
+            result["llm.output_messages"] = _dumps([output_message])
             result["llm.output_messages.0.message.role"] = "tool"
-            result["llm.output_messages.0.message.content"] = self._serialize_value(tool_result_content)
+            result["llm.output_messages.0.message.content"] = serialized_content
             result["llm.output_messages.0.message.tool_call_id"] = attrs.get("tool.id", "")
             
             if tool_name:
@@ -289,7 +424,7 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 tool_metadata[key] = self._serialize_value(value)
         
         if tool_metadata:
-            result["tool.metadata"] = json.dumps(tool_metadata, separators=(",", ":"))
+            result["tool.metadata"] = _dumps(tool_metadata)
     
     def _handle_agent_span(self, attrs: Dict[str, Any], result: Dict[str, Any], prompt: Any):
         """Handle agent-specific attributes."""
@@ -304,14 +439,19 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 "message.role": "user",
                 "message.content": str(prompt)
             }
-            result["llm.input_messages"] = json.dumps([input_message], separators=(",", ":"))
+            result["llm.input_messages"] = _dumps([input_message])
             result["input.value"] = str(prompt)
             result["llm.input_messages.0.message.role"] = "user"
             result["llm.input_messages.0.message.content"] = str(prompt)
         self._add_input_output_values(attrs, result)  
     
-    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool):
-        """Map Strands messages to OpenInference message format."""
+    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Map Strands messages to OpenInference message format.
+        
+        Returns:
+            The normalized messages and their JSON encoding, for reuse in input/output values
+        """
         key_prefix = "llm.input_messages" if is_input else "llm.output_messages"
         
         if isinstance(messages_data, str):
@@ -321,16 +461,20 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 messages_data = [{"role": "user" if is_input else "assistant", "content": messages_data}]
         
         messages_list = self._normalize_messages(messages_data)
-        result[key_prefix] = json.dumps(messages_list, separators=(",", ":"))
 
+        # The full JSON is assembled from the per-field encodings, so message
+        # content is only serialized once for both the flattened and full attributes
+        encoded_messages = []
         for idx, msg in enumerate(messages_list):
             if not isinstance(msg, dict):
+                encoded_messages.append(_dumps(msg))
                 continue
-                
+
+            encoded_fields = []
             for sub_key, sub_val in msg.items():
                 clean_key = sub_key.replace("message.", "") if sub_key.startswith("message.") else sub_key
                 dotted_key = f"{key_prefix}.{idx}.message.{clean_key}"
-                
+
                 if clean_key == "tool_calls" and isinstance(sub_val, list):
                     # Handle tool calls with proper structure
                     for tool_idx, tool_call in enumerate(sub_val):
@@ -338,8 +482,20 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                             for tool_key, tool_val in tool_call.items():
                                 tool_dotted_key = f"{key_prefix}.{idx}.message.tool_calls.{tool_idx}.{tool_key}"
                                 result[tool_dotted_key] = self._serialize_value(tool_val)
+                    encoded = _dumps(sub_val)
+                elif isinstance(sub_val, (dict, list)):
+                    encoded = _dumps(sub_val)
+                    result[dotted_key] = encoded
                 else:
+                    encoded = _dumps(sub_val)
                     result[dotted_key] = self._serialize_value(sub_val)
+                encoded_fields.append(f"{_dumps(sub_key)}:{encoded}")
+            encoded_messages.append("{" + ",".join(encoded_fields) + "}")
+
+        messages_json = "[" + ",".join(encoded_messages) + "]"
+        result[key_prefix] = messages_json
+
+        return messages_list, messages_json
     
     def _normalize_messages(self, data: Any) -> List[Dict[str, Any]]:
         """Normalize messages data to a consistent list format."""
@@ -421,7 +577,7 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             if value := attrs.get(strands_key):
                 result[openinf_key] = value
     
-    def _map_invocation_parameters(self, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _map_invocation_parameters(self, attrs: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """Map invocation parameters."""
         params = {}
         
@@ -436,73 +592,60 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 params[param_key] = attrs[key]
         
         if params:
-            result["llm.invocation_parameters"] = json.dumps(params, separators=(",", ":"))
+            result["llm.invocation_parameters"] = _dumps(params)
+        return params
     
-    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any]):
-        """Add input.value and output.value for Arize compatibility."""
+    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any],
+                                 input_messages: Optional[Tuple[List[Dict[str, Any]], str]] = None,
+                                 output_messages: Optional[Tuple[List[Dict[str, Any]], str]] = None,
+                                 invocation_params: Optional[Dict[str, Any]] = None):
+        """
+        Add input.value and output.value for Arize compatibility.
+        
+        LLM values are built from the messages already normalized and encoded
+        by _map_messages instead of decoding llm.*_messages again.
+        """
         span_kind = result.get("openinference.span.kind")
         model_name = result.get("llm.model_name") or attrs.get("gen_ai.request.model") or "unknown"
-        invocation_params = {}
-        if "llm.invocation_parameters" in result:
-            try:
-                invocation_params = json.loads(result["llm.invocation_parameters"])
-            except:
-                pass
+        invocation_params = invocation_params or {}
         
         if span_kind == "LLM":
-            if "llm.input_messages" in result:
-                try:
-                    input_messages = json.loads(result["llm.input_messages"])
-                    if input_messages:
-                        input_structure = {
-                            "messages": input_messages,
-                            "model": model_name
-                        }
-                        if max_tokens := invocation_params.get("max_tokens"):
-                            input_structure["max_tokens"] = max_tokens
-                        
-                        result["input.value"] = json.dumps(input_structure, separators=(",", ":"))
-                        result["input.mime_type"] = "application/json"
-                except:
-                    if prompt_content := result.get("llm.input_messages.0.message.content"):
-                        result["input.value"] = prompt_content
-                        result["input.mime_type"] = "application/json"
-
-            if "llm.output_messages" in result:
-                try:
-                    output_messages = json.loads(result["llm.output_messages"])
-                    if output_messages and len(output_messages) > 0:
-                        first_msg = output_messages[0]
-                        content = first_msg.get("message.content", "")
-                        role = first_msg.get("message.role", "assistant")
-                        finish_reason = first_msg.get("message.finish_reason", "stop")
-                        output_structure = {
-                            "id": attrs.get("gen_ai.response.id"),
-                            "choices": [{
-                                "finish_reason": finish_reason,
-                                "index": 0,
-                                "logprobs": None,
-                                "message": {
-                                    "content": content,
-                                    "role": role,
-                                    "refusal": None,
-                                    "annotations": []
-                                }
-                            }],
-                            "model": model_name,
-                            "usage": {
-                                "completion_tokens": result.get("llm.token_count.completion"),
-                                "prompt_tokens": result.get("llm.token_count.prompt"),
-                                "total_tokens": result.get("llm.token_count.total")
-                            }
+            if input_messages and input_messages[0]:
+                # Splice the encoded messages in rather than encoding them twice
+                input_value = f'{{"messages":{input_messages[1]},"model":{_dumps(model_name)}'
+                if max_tokens := invocation_params.get("max_tokens"):
+                    input_value += f',"max_tokens":{_dumps(max_tokens)}'
+                result["input.value"] = input_value + "}"
+                result["input.mime_type"] = "application/json"
+
+            if output_messages and output_messages[0]:
+                first_msg = output_messages[0][0]
+                content = first_msg.get("message.content", "")
+                role = first_msg.get("message.role", "assistant")
+                finish_reason = first_msg.get("message.finish_reason", "stop")
+                output_structure = {
+                    "id": attrs.get("gen_ai.response.id"),
+                    "choices": [{
+                        "finish_reason": finish_reason,
+                        "index": 0,
+                        "logprobs": None,
+                        "message": {
+                            "content": content,
+                            "role": role,
+                            "refusal": None,
+                            "annotations": []
                         }
-                        
-                        result["output.value"] = json.dumps(output_structure, separators=(",", ":"))
-                        result["output.mime_type"] = "application/json"
-                except:
-                    if completion_content := result.get("llm.output_messages.0.message.content"):
-                        result["output.value"] = completion_content
-                        result["output.mime_type"] = "application/json"
+                    }],
+                    "model": model_name,
+                    "usage": {
+                        "completion_tokens": result.get("llm.token_count.completion"),
+                        "prompt_tokens": result.get("llm.token_count.prompt"),
+                        "total_tokens": result.get("llm.token_count.total")
+                    }
+                }
+                
+                result["output.value"] = _dumps(output_structure)
+                result["output.mime_type"] = "application/json"
                     
         elif span_kind == "AGENT":
             if prompt := attrs.get("gen_ai.prompt"):
@@ -518,14 +661,14 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 if isinstance(tool_params, str):
                     result["input.value"] = tool_params
                 else:
-                    result["input.value"] = json.dumps(tool_params, separators=(",", ":"))
+                    result["input.value"] = _dumps(tool_params)
                 result["input.mime_type"] = "application/json"
             
             if tool_result := attrs.get("tool.result"):
                 if isinstance(tool_result, str):
                     result["output.value"] = tool_result
                 else:
-                    result["output.value"] = json.dumps(tool_result, separators=(",", ":"))
+                    result["output.value"] = _dumps(tool_result)
                 result["output.mime_type"] = "application/json"
                 
         elif span_kind == "CHAIN":
@@ -533,14 +676,14 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 if isinstance(prompt, str):
                     result["input.value"] = prompt
                 else:
-                    result["input.value"] = json.dumps(prompt, separators=(",", ":"))
+                    result["input.value"] = _dumps(prompt)
                 result["input.mime_type"] = "text/plain" if isinstance(prompt, str) else "application/json"
             
             if completion := attrs.get("gen_ai.completion"):
                 if isinstance(completion, str):
                     result["output.value"] = completion  
                 else:
-                    result["output.value"] = json.dumps(completion, separators=(",", ":"))
+                    result["output.value"] = _dumps(completion)
                 result["output.mime_type"] = "text/plain" if isinstance(completion, str) else "application/json"
     
     def _add_metadata(self, attrs: Dict[str, Any], result: Dict[str, Any]):
@@ -553,7 +696,7 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
                 metadata[key] = self._serialize_value(value)
         
         if metadata:
-            result["metadata"] = json.dumps(metadata, separators=(",", ":"))
+            result["metadata"] = _dumps(metadata)
     
     def _serialize_value(self, value: Any) -> Any:
         """Ensure a value is serializable."""
@@ -561,14 +704,47 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             return value
         
         try:
-            return json.dumps(value, separators=(",", ":"))
+            return _dumps(value)
         except (TypeError, OverflowError):
             return str(value)
 
     def shutdown(self):
-        """Called when the processor is shutdown."""
-        pass
+        """Called when the processor is shutdown. Exports queued spans first."""
+        if self._worker is not None and not self._shutdown:
+            self._shutdown = True
+            self._queue.put(_SHUTDOWN)
+            self._worker.join()
+            self.exporter.shutdown()
+        with self._lock:
+            self.span_hierarchy.clear()
+            self._trace_spans.clear()
 
     def force_flush(self, timeout_millis=None):
-        """Called to force flush."""
-        return True
\ No newline at end of file
+        """Called to force flush. Waits until spans queued so far are exported."""
+        if self._worker is None or self._shutdown:
+            return True
+        timeout = None if timeout_millis is None else timeout_millis / 1000
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+
+def _with_attributes(span: ReadableSpan, attributes: Dict[str, Any]) -> ReadableSpan:
+    """Copy of an ended span with its attributes replaced."""
+    return ReadableSpan(
+        name=span.name,
+        context=span.context,
+        parent=span.parent,
+        resource=span.resource,
+        attributes=attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
@@ -0,0 +1,194 @@
+"""
+Vectorized portfolio engine for the Multi-Agent Portfolio Orchestrator
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from price_store import get_price_store
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 2.0  # percent, same assumption as the stock data tools
+
+
+class PortfolioEngine:
+    """
+    Covariance-based portfolio math over a daily price history.
+
+    The daily-returns matrix, mean returns and annualized covariance matrix
+    are computed once; candidate allocations are then evaluated in batch as
+    rows of a weight matrix, so thousands of portfolios cost a few matrix
+    products. Returns and volatilities are annualized percentages.
+    """
+
+    def __init__(self, prices: pd.DataFrame, risk_free_rate: float = RISK_FREE_RATE):
+        prices = prices.sort_index().ffill().dropna(axis=1, how='all').dropna()
+        if prices.shape[0] < 2 or prices.shape[1] == 0:
+            raise ValueError("Need at least two days of prices for one ticker")
+
+        self.tickers: List[str] = [str(column) for column in prices.columns]
+        self.risk_free_rate = risk_free_rate
+        self.returns = prices.pct_change().dropna().to_numpy(dtype=float)
+        self.mean_returns = self.returns.mean(axis=0) * TRADING_DAYS * 100
+        self.covariance = np.atleast_2d(np.cov(self.returns, rowvar=False)) * TRADING_DAYS * 100 ** 2
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_csv(cls, csv_filename: str) -> "PortfolioEngine":
+        """
+        Build an engine from an exported daily prices CSV.
+
+        Args:
+            csv_filename: Prices CSV (dates as rows, tickers as columns), e.g. stock_daily_prices_*.csv
+        """
+        return cls(pd.read_csv(csv_filename, index_col=0, parse_dates=True))
+
+    def covers(self, tickers) -> bool:
+        """Whether every ticker has price history in the engine"""
+        return all(ticker in self._index for ticker in tickers)
+
+    def subset(self, tickers: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Column indices, mean returns and covariance restricted to tickers"""
+        idx = np.array([self._index[ticker] for ticker in tickers])
+        return idx, self.mean_returns[idx], self.covariance[np.ix_(idx, idx)]
+
+    def evaluate(self, weights: np.ndarray, tickers: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Evaluate one or many allocations at once.
+
+        Args:
+            weights: Array of shape (n_tickers,) or (n_portfolios, n_tickers), rows summing to 1
+            tickers: Tickers the weight columns refer to (defaults to all engine tickers)
+
+        Returns:
+            Dict of arrays: expected_return, volatility, sharpe_ratio (one entry per portfolio)
+        """
+        tickers = tickers or self.tickers
+        _, mean_returns, covariance = self.subset(tickers)
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+
+        expected = weights @ mean_returns
+        variance = np.einsum('ij,jk,ik->i', weights, covariance, weights)
+        volatility = np.sqrt(np.maximum(variance, 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(volatility > 0, (expected - self.risk_free_rate) / volatility, 0.0)
+        return {'expected_return': expected, 'volatility': volatility, 'sharpe_ratio': sharpe}
+
+    def portfolio_volatility(self, allocation: Dict[str, float]) -> float:
+        """Annualized volatility (%) of a {ticker: percentage} allocation, correlations included"""
+        tickers = list(allocation)
+        weights = np.array([allocation[ticker] for ticker in tickers], dtype=float)
+        weights = weights / weights.sum()
+        return float(self.evaluate(weights, tickers)['volatility'][0])
+
+    def random_weights(self, n_assets: int, n_samples: int, seed: Optional[int] = 42) -> np.ndarray:
+        """Long-only allocations drawn uniformly from the simplex"""
+        rng = np.random.default_rng(seed)
+        return rng.dirichlet(np.ones(n_assets), size=n_samples)
+
+    def optimize(self, tickers: Optional[List[str]] = None, objective: str = "max_sharpe",
+                 n_samples: int = 5000, seed: Optional[int] = 42) -> Dict[str, object]:
+        """
+        Best long-only allocation for an objective among sampled candidates.
+
+        The closed-form minimum-variance portfolio and equal weights are added
+        to the random candidates so the optimum is found even with few samples.
+
+        Args:
+            tickers: Tickers to allocate across (defaults to all)
+            objective: "max_sharpe" or "min_variance"
+            n_samples: Number of random candidate allocations
+        """
+        tickers = tickers or self.tickers
+        candidates = self._candidates(tickers, n_samples, seed)
+        metrics = self.evaluate(candidates, tickers)
+
+        if objective == "min_variance":
+            best = int(np.argmin(metrics['volatility']))
+        elif objective == "max_sharpe":
+            best = int(np.argmax(metrics['sharpe_ratio']))
+        else:
+            raise ValueError(f"Unknown objective: {objective}")
+
+        return {
+            'weights': {ticker: round(float(w) * 100, 1) for ticker, w in zip(tickers, candidates[best])},
+            'expected_return': round(float(metrics['expected_return'][best]), 2),
+            'volatility': round(float(metrics['volatility'][best]), 2),
+            'sharpe_ratio': round(float(metrics['sharpe_ratio'][best]), 2),
+            'candidates_evaluated': len(candidates)
+        }
+
+    def efficient_frontier(self, tickers: Optional[List[str]] = None, n_samples: int = 5000,
+                           points: int = 20, seed: Optional[int] = 42) -> List[Dict[str, float]]:
+        """
+        Approximate efficient frontier from sampled allocations.
+
+        Candidates are bucketed by volatility and the highest-return allocation
+        of each bucket is kept, dropping points dominated by a lower-risk one.
+        """
+        tickers = tickers or self.tickers
+        candidates = self._candidates(tickers, n_samples, seed)
+        metrics = self.evaluate(candidates, tickers)
+        volatility, expected = metrics['volatility'], metrics['expected_return']
+
+        edges = np.linspace(volatility.min(), volatility.max(), points + 1)
+        buckets = np.clip(np.digitize(volatility, edges[1:-1]), 0, points - 1)
+
+        frontier = []
+        best_return = -np.inf
+        for bucket in range(points):
+            members = np.flatnonzero(buckets == bucket)
+            if members.size == 0:
+                continue
+            top = members[np.argmax(expected[members])]
+            if expected[top] <= best_return:
+                continue
+            best_return = expected[top]
+            frontier.append({
+                'expected_return': round(float(expected[top]), 2),
+                'volatility': round(float(volatility[top]), 2),
+                'sharpe_ratio': round(float(metrics['sharpe_ratio'][top]), 2),
+                'weights': {ticker: round(float(w) * 100, 1) for ticker, w in zip(tickers, candidates[top])}
+            })
+        return frontier
+
+    def _candidates(self, tickers: List[str], n_samples: int, seed: Optional[int]) -> np.ndarray:
+        n_assets = len(tickers)
+        extra = [np.full(n_assets, 1.0 / n_assets)]
+
+        _, _, covariance = self.subset(tickers)
+        try:
+            inverse_ones = np.linalg.solve(covariance, np.ones(n_assets))
+            min_variance = inverse_ones / inverse_ones.sum()
+            if np.all(min_variance >= 0):
+                extra.append(min_variance)
+        except np.linalg.LinAlgError:
+            pass
+
+        return np.vstack([self.random_weights(n_assets, n_samples, seed)] + extra)
+
+
+_engine_cache: Dict[Tuple[int, str], PortfolioEngine] = {}
+
+
+def get_portfolio_engine(dataset: str = "daily_prices") -> Optional[PortfolioEngine]:
+    """
+    Shared engine for the daily prices last stored by get_stock_data, rebuilt only when the store changes.
+
+    Returns:
+        PortfolioEngine, or None when no daily prices have been stored yet
+    """
+    store = get_price_store()
+    recorded = store.recorded_range(dataset)
+    if recorded is None:
+        return None
+    key = (store.version, dataset)
+    if key not in _engine_cache:
+        prices = store.get_prices(recorded['tickers'], recorded['start'], recorded['end'])
+        if prices.empty:
+            return None
+        _engine_cache.clear()
+        _engine_cache[key] = PortfolioEngine(prices)
+    return _engine_cache[key]
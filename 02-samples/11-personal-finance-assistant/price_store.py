@@ -0,0 +1,310 @@
+"""
+On-disk daily price store for the Multi-Agent Portfolio Orchestrator
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "price_store")
+LIVE_EDGE_TTL = 15 * 60  # seconds before today's prices are fetched again
+PRICE_DTYPE = np.dtype([('date', 'datetime64[D]'), ('close', 'float64')])
+
+
+class YFinanceFetcher:
+    """
+    Default fetcher backed by yfinance.
+
+    A fetcher provides history(tickers, start, end) returning {ticker: close Series}
+    for the half-open range [start, end), and info(ticker) returning company details.
+    Any object with these two methods can be passed to PriceStore, e.g. a local fake.
+    """
+
+    def history(self, tickers: List[str], start: str, end: str) -> Dict[str, pd.Series]:
+        import yfinance as yf
+
+        data = yf.download(tickers, start=start, end=end, auto_adjust=True,
+                           progress=False, group_by='column', threads=False)
+        if data.empty:
+            return {}
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        prices = {}
+        for ticker in close.columns:
+            series = close[ticker].dropna()
+            if not series.empty:  # failed downloads come back as all-NaN columns
+                prices[str(ticker)] = series
+        return prices
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        import yfinance as yf
+
+        return yf.Ticker(ticker).info
+
+
+class PriceStore:
+    """
+    Daily close prices persisted as one memory-mapped NumPy file per ticker.
+
+    The fetched date ranges of each ticker are recorded in metadata.json, so a
+    request only downloads the days that are not already stored.
+    Missing ranges are fetched in batches on a thread pool. Loaded arrays and
+    metadata stay in memory, so repeated calls do not touch the disk.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_DIR, fetcher=None, batch_size: int = 8, max_workers: int = 4):
+        self.root = root
+        self.fetcher = fetcher or YFinanceFetcher()
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.version = 0  # bumped on every write, lets derived caches detect changes
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._live_fetched: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self._metadata = self._read_metadata()
+
+    def get_prices(self, tickers: List[str], start: str, end: str, refresh: bool = False) -> pd.DataFrame:
+        """
+        Daily closes for [start, end), fetching only ranges not already stored.
+
+        Args:
+            tickers: Stock symbols
+            start: First date (inclusive), YYYY-MM-DD
+            end: Last date (exclusive), YYYY-MM-DD
+            refresh: Re-download the whole range even if it is stored
+
+        Returns:
+            DataFrame with dates as rows and one column per ticker that has data
+        """
+        start_day, end_day = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        self._fill_gaps(tickers, start_day, end_day, refresh)
+
+        columns = {}
+        with self._lock:
+            for ticker in tickers:
+                array = self._load(ticker)
+                if array is None:
+                    continue
+                lo, hi = np.searchsorted(array['date'], [start_day, end_day])
+                if hi > lo:
+                    # Copies, so no view keeps the mapped file open once it is replaced
+                    rows = np.array(array[lo:hi])
+                    columns[ticker] = pd.Series(rows['close'], index=pd.DatetimeIndex(rows['date']))
+        return pd.DataFrame(columns)
+
+    def get_info(self, tickers: List[str]) -> Dict[str, Dict[str, str]]:
+        """Company name and sector per ticker, fetched once and kept in metadata"""
+        with self._lock:
+            missing = [ticker for ticker in dict.fromkeys(tickers) if 'company' not in self._entry(ticker)]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                infos = list(pool.map(self._fetch_info, missing))
+            with self._lock:
+                for ticker, info in zip(missing, infos):
+                    self._entry(ticker).update(info)
+                self._write_metadata()
+        with self._lock:
+            return {ticker: {'company': self._entry(ticker)['company'], 'sector': self._entry(ticker)['sector']}
+                    for ticker in tickers}
+
+    def record_range(self, name: str, tickers: List[str], start: str, end: str):
+        """Remember a named dataset (tickers and date range) for later consumers"""
+        with self._lock:
+            self._metadata.setdefault('ranges', {})[name] = {'tickers': list(tickers), 'start': start, 'end': end}
+            self._write_metadata()
+            self.version += 1
+
+    def recorded_range(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._metadata.get('ranges', {}).get(name)
+
+    # --- internals ---
+
+    def _entry(self, ticker: str) -> Dict[str, Any]:
+        return self._metadata.setdefault('tickers', {}).setdefault(ticker, {})
+
+    def _covered(self, ticker: str) -> List[Tuple[np.datetime64, np.datetime64]]:
+        """Sorted, non-overlapping [start, end) ranges already stored for the ticker"""
+        entry = self._entry(ticker)
+        if 'start' in entry:
+            # Metadata written before ranges were tracked separately
+            entry['covered'] = [[entry.pop('start'), entry.pop('end')]]
+        return [(np.datetime64(start, 'D'), np.datetime64(end, 'D')) for start, end in entry.get('covered', [])]
+
+    def _missing_ranges(self, ticker: str, start: np.datetime64, end: np.datetime64,
+                        refresh: bool) -> List[Tuple[np.datetime64, np.datetime64]]:
+        if refresh:
+            return [(start, end)]
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self._covered(ticker):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+
+        # Today's close keeps changing, so the live edge is never recorded as
+        # covered; it is re-fetched at most once per LIVE_EDGE_TTL instead.
+        if gaps and gaps[-1][0] >= _today() and time.monotonic() - self._live_fetched.get(ticker, -LIVE_EDGE_TTL) < LIVE_EDGE_TTL:
+            gaps.pop()
+        return gaps
+
+    def _fill_gaps(self, tickers: List[str], start: np.datetime64, end: np.datetime64, refresh: bool):
+        requests: Dict[Tuple[np.datetime64, np.datetime64], List[str]] = {}
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                for gap in self._missing_ranges(ticker, start, end, refresh):
+                    requests.setdefault(gap, []).append(ticker)
+        if not requests:
+            return
+
+        batches = [(gap_start, gap_end, group[i:i + self.batch_size])
+                   for (gap_start, gap_end), group in requests.items()
+                   for i in range(0, len(group), self.batch_size)]
+        print(f"🌐 Fetching {sum(len(batch) for _, _, batch in batches)} missing price ranges in {len(batches)} batches...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda batch: self._fetch_batch(*batch), batches))
+
+        with self._lock:
+            for (gap_start, gap_end, batch), fetched in zip(batches, results):
+                if fetched is None:
+                    continue
+                for ticker in batch:
+                    self._merge(ticker, fetched.get(ticker), gap_start, gap_end)
+            self._write_metadata()
+            self.version += 1
+
+    def _fetch_batch(self, start: np.datetime64, end: np.datetime64, tickers: List[str]) -> Optional[Dict[str, pd.Series]]:
+        try:
+            return self.fetcher.history(tickers, str(start), str(end))
+        except Exception as e:
+            print(f"⚠️ Could not fetch prices for {', '.join(tickers)}: {e}")
+            return None
+
+    def _fetch_info(self, ticker: str) -> Dict[str, str]:
+        try:
+            info = self.fetcher.info(ticker)
+        except Exception as e:
+            print(f"⚠️ Could not fetch company info for {ticker}: {e}")
+            info = {}
+        return {'company': info.get('longName', ticker), 'sector': info.get('sector', 'Unknown')}
+
+    def _merge(self, ticker: str, series: Optional[pd.Series], start: np.datetime64, end: np.datetime64):
+        if series is None or series.empty:
+            # Nothing came back (e.g. a failed download), so the range stays missing and is retried
+            return
+
+        index = pd.DatetimeIndex(series.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        new = np.empty(len(series), dtype=PRICE_DTYPE)
+        new['date'] = index.normalize().values.astype('datetime64[D]')
+        new['close'] = series.to_numpy(dtype=float)
+
+        existing = self._load(ticker)
+        if existing is not None:
+            keep = (existing['date'] < start) | (existing['date'] >= end)
+            new = np.concatenate([existing[keep], new])
+        new = np.sort(new, order='date', kind='stable')
+        _, unique = np.unique(new['date'][::-1], return_index=True)
+        new = new[len(new) - 1 - unique]  # last write wins for duplicated dates
+
+        # Release the memory map of the old file before it is replaced
+        self._arrays.pop(ticker, None)
+        del existing
+        path = self._path(ticker)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, new)
+        os.replace(path + ".tmp", path)
+        self._arrays[ticker] = new
+
+        today = _today()
+        if end > today:
+            self._live_fetched[ticker] = time.monotonic()
+        covered_end = min(end, today)
+        ranges = self._covered(ticker)
+        if covered_end > start:
+            ranges.append((start, covered_end))
+        merged: List[List[np.datetime64]] = []
+        for range_start, range_end in sorted(ranges):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        self._entry(ticker)['covered'] = [[str(range_start), str(range_end)] for range_start, range_end in merged]
+
+    def _load(self, ticker: str) -> Optional[np.ndarray]:
+        array = self._arrays.get(ticker)
+        if array is None and os.path.exists(self._path(ticker)):
+            array = self._arrays[ticker] = np.load(self._path(ticker), mmap_mode='r')
+        return array
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.replace('/', '_')}.npy")
+
+    def _read_metadata(self) -> Dict[str, Any]:
+        path = os.path.join(self.root, "metadata.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_metadata(self):
+        path = os.path.join(self.root, "metadata.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._metadata, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+def _today() -> np.datetime64:
+    return np.datetime64(pd.Timestamp.today().date(), 'D')
+
+
+def period_to_range(period: str) -> Tuple[str, str]:
+    """
+    Convert a yfinance-style period ("1y", "6mo", "3mo", "5d", "ytd") to a [start, end) date range.
+    """
+    today = pd.Timestamp.today().normalize()
+    end = today + pd.Timedelta(days=1)
+    if period == "ytd":
+        start = pd.Timestamp(year=today.year, month=1, day=1)
+    else:
+        units = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+        unit = next((u for u in ('mo', 'wk', 'd', 'y') if period.endswith(u)), None)
+        if unit is None or not period[:-len(unit)].isdigit():
+            raise ValueError(f"Unsupported period: {period}")
+        start = today - pd.DateOffset(**{units[unit]: int(period[:-len(unit)])})
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+_store: Optional[PriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Shared process-wide price store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
+
+
+def set_price_store(store: PriceStore):
+    """Replace the shared store, e.g. with one using a local fake fetcher"""
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1 @@
+"""Tests for the Multi-Agent Portfolio Orchestrator."""
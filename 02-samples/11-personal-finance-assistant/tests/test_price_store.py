@@ -0,0 +1,57 @@
+"""
+Unit tests for the on-disk price store.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from price_store import PriceStore
+
+
+class FakeFetcher:
+    """Returns a flat price series, except for tickers listed in failing"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def history(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        dates = pd.date_range(start, end, freq='D', inclusive='left')
+        return {ticker: pd.Series(100.0, index=dates) for ticker in tickers if ticker not in self.failing}
+
+    def info(self, ticker):
+        return {'longName': ticker, 'sector': 'Technology'}
+
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.fetcher = FakeFetcher(failing={'MSFT'})
+        self.store = PriceStore(root=self.root, fetcher=self.fetcher)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_stored_range_is_not_fetched_again(self):
+        self.store.get_prices(['AAPL'], '2024-01-01', '2024-01-31')
+        self.store.get_prices(['AAPL'], '2024-01-05', '2024-01-20')
+        self.assertEqual(len(self.fetcher.calls), 1)
+
+    def test_failed_ticker_is_fetched_again(self):
+        prices = self.store.get_prices(['AAPL', 'MSFT'], '2024-01-01', '2024-01-31')
+        self.assertEqual(list(prices.columns), ['AAPL'])
+
+        self.fetcher.failing.clear()
+        self.fetcher.calls.clear()
+        prices = self.store.get_prices(['AAPL', 'MSFT'], '2024-01-01', '2024-01-31')
+        self.assertEqual(self.fetcher.calls, [(('MSFT',), '2024-01-01', '2024-01-31')])
+        self.assertEqual(list(prices.columns), ['AAPL', 'MSFT'])
+        self.assertEqual(len(prices), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,11 +6,32 @@ from strands import tool
 from typing import Dict, Any, List
 import pandas as pd
 import os
-import yfinance as yf
 import numpy as np
 from datetime import datetime
 import time
 import matplotlib.pyplot as plt
+from portfolio_engine import get_portfolio_engine
+from price_store import get_price_store, period_to_range
+
+# Parsed summary CSVs keyed by (path, mtime, size), so repeated tool calls skip the disk
+_summary_csv_cache: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _read_summary_csv(csv_filename: str, fields: List[str]) -> Dict[str, Any]:
+    """Parse a summary CSV once per file version into {ticker: row} dicts."""
+    stat = os.stat(csv_filename)
+    key = (os.path.abspath(csv_filename), stat.st_mtime_ns, stat.st_size)
+    if key not in _summary_csv_cache:
+        df = pd.read_csv(csv_filename, index_col='ticker')
+        for column, default in (('company', 'Unknown'), ('sector', 'Unknown')):
+            df[column] = df[column].fillna(default) if column in df.columns else default
+        for column in fields + ['sharpe_ratio', 'current_price']:
+            df[column] = df[column].fillna(0).astype(float) if column in df.columns else 0.0
+        period = df['period'].iloc[0] if 'period' in df.columns and not df.empty else 'Unknown'
+        stocks = df[['company', 'sector'] + fields + ['sharpe_ratio', 'current_price']].to_dict('index')
+        _summary_csv_cache[key] = {'stocks': stocks, 'period': period}
+    cached = _summary_csv_cache[key]
+    return {'stocks': {ticker: dict(row) for ticker, row in cached['stocks'].items()}, 'period': cached['period']}
 
 
 def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_stock_data.csv") -> Dict[str, Any]:
@@ -31,28 +52,16 @@ def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_s
                 'action': 'file_missing'
             }
         
-        df = pd.read_csv(csv_filename, index_col='ticker')
-        if df.empty:
+        cached = _read_summary_csv(csv_filename, ['annual_return', 'volatility'])
+        if not cached['stocks']:
             return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
         
-        stocks = {}
-        period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
-        
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'annual_return': float(row.get('annual_return', 0)),
-                'volatility': float(row.get('volatility', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
+        stocks = cached['stocks']
         
         return {
             'success': True,
             'stocks': stocks,
-            'period': period,
+            'period': cached['period'],
             'count': len(stocks),
             'source': 'csv_cache',
             'csv_filename': csv_filename
@@ -80,28 +89,16 @@ def _load_simple_stock_data_from_csv(csv_filename: str = "simple_stock_data.csv"
                 'action': 'file_missing'
             }
         
-        df = pd.read_csv(csv_filename, index_col='ticker')
-        if df.empty:
+        cached = _read_summary_csv(csv_filename, ['return_pct', 'volatility_pct'])
+        if not cached['stocks']:
             return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
         
-        stocks = {}
-        period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
-        
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'return_pct': float(row.get('return_pct', 0)),
-                'volatility_pct': float(row.get('volatility_pct', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
+        stocks = cached['stocks']
         
         return {
             'success': True,
             'stocks': stocks,
-            'period': period,
+            'period': cached['period'],
             'count': len(stocks),
             'source': 'csv_cache',
             'csv_filename': csv_filename
@@ -162,10 +159,12 @@ def get_stock_data(tickers: List[str] = None, year: int = 2024, save_csv: bool =
             'META', 'NVDA'                            # Growth/AI
         ]
     
+    period = f"{start_date} to {end_date}"
+    
     # Try to load from cache first if enabled
     if use_cache:
-        cache_result = load_comprehensive_stock_data_from_csv()
-        if cache_result['success']:
+        cache_result = _load_comprehensive_stock_data_from_csv()
+        if cache_result['success'] and cache_result['period'] in (period, 'Unknown'):
             cached_tickers = set(cache_result['stocks'].keys())
             needed_tickers = set(tickers)
             
@@ -175,73 +174,79 @@ def get_stock_data(tickers: List[str] = None, year: int = 2024, save_csv: bool =
                 return {
                     'success': True,
                     'stocks': filtered_stocks,
-                    'period': cache_result['period'],
+                    'period': period,
                     'source': 'cache'
                 }
     
-    # Fetch fresh data
-    print("🌐 Fetching fresh comprehensive stock data with daily prices...")
+    # Daily prices come from the price store, which only downloads missing date ranges
+    print("🌐 Loading comprehensive stock data with daily prices...")
     try:
+        store = get_price_store()
+        prices = store.get_prices(tickers, start_date, end_date, refresh=not use_cache)
+        info = store.get_info(list(prices.columns))
+        
         stock_data = {}
         daily_prices = {}
         
-        for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
-                info = stock.info
-                
-                if len(hist) > 0:
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
-                    total_return = ((end_price - start_price) / start_price) * 100
-                    
-                    daily_returns = hist['Close'].pct_change().dropna()
-                    volatility = daily_returns.std() * np.sqrt(252) * 100
-                    
-                    # Calculate annual return
-                    years = len(hist) / 252
-                    annual_return = total_return / years if years > 0 else total_return
-                    sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
-                    
-                    # Summary metrics
-                    stock_data[ticker] = {
-                        'company': info.get('longName', ticker),
-                        'sector': info.get('sector', 'Unknown'),
-                        'annual_return': round(annual_return, 2),
-                        'volatility': round(volatility, 2),
-                        'sharpe_ratio': round(sharpe_ratio, 2),
-                        'current_price': round(end_price, 2)
-                    }
-                    
-                    # Store DAILY PRICES (key difference from get_stock_analysis)
-                    daily_prices[ticker] = hist['Close'].round(2).to_dict()
-                    
-            except Exception as e:
-                print(f"Warning: Could not fetch data for {ticker}: {e}")
+        for ticker in prices.columns:
+            hist = prices[ticker].dropna()
+            if len(hist) == 0:
                 continue
+            
+            start_price = hist.iloc[0]
+            end_price = hist.iloc[-1]
+            total_return = ((end_price - start_price) / start_price) * 100
+            
+            daily_returns = hist.pct_change().dropna()
+            volatility = daily_returns.std() * np.sqrt(252) * 100
+            
+            # Calculate annual return
+            years = len(hist) / 252
+            annual_return = total_return / years if years > 0 else total_return
+            sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
+            
+            # Summary metrics
+            stock_data[ticker] = {
+                'company': info[ticker]['company'],
+                'sector': info[ticker]['sector'],
+                'annual_return': round(annual_return, 2),
+                'volatility': round(volatility, 2),
+                'sharpe_ratio': round(sharpe_ratio, 2),
+                'current_price': round(end_price, 2)
+            }
+            
+            # Store DAILY PRICES (key difference from get_stock_analysis)
+            daily_prices[ticker] = hist.round(2).to_dict()
+        
+        for ticker in tickers:
+            if ticker not in stock_data:
+                print(f"Warning: Could not fetch data for {ticker}")
         
         result = {
             'success': True, 
             'stocks': stock_data, 
             'daily_prices': daily_prices,  # This is what makes it comprehensive
-            'period': f"{start_date} to {end_date}", 
+            'period': period, 
             'source': 'fresh'
         }
         
+        if stock_data:
+            # The portfolio engine builds its covariance model from this range
+            store.record_range("daily_prices", list(stock_data), start_date, end_date)
+        
         # Save to CSV if caching is enabled OR explicitly requested
         if (use_cache or save_csv) and stock_data:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             # Save summary data
             df = pd.DataFrame.from_dict(stock_data, orient='index')
+            df['period'] = period
             df.to_csv("comprehensive_stock_data.csv", index_label='ticker')
-            
-            # Save DAILY PRICES (comprehensive feature)
-            if daily_prices:
-                prices_df = pd.DataFrame(daily_prices)
-                prices_df.to_csv(f"stock_daily_prices_{start_date}_to_{end_date}_{timestamp}.csv")
-                print(f"💾 Comprehensive data + daily prices saved to CSV")
+            print(f"💾 Comprehensive summary saved to CSV, daily prices kept in {store.root}/")
+        
+        # Export DAILY PRICES only when explicitly requested
+        if save_csv and daily_prices:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            prices[list(stock_data)].round(2).to_csv(f"stock_daily_prices_{start_date}_to_{end_date}_{timestamp}.csv")
+            print(f"💾 Daily prices exported to CSV")
         
         return result
         
@@ -268,8 +273,8 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     
     # Try to load from cache first if enabled
     if use_cache:
-        cache_result = load_simple_stock_data_from_csv()
-        if cache_result['success']:
+        cache_result = _load_simple_stock_data_from_csv()
+        if cache_result['success'] and cache_result['period'] in (period, 'Unknown'):
             cached_tickers = set(cache_result['stocks'].keys())
             needed_tickers = set(tickers)
             
@@ -278,44 +283,51 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
                 filtered_stocks = {t: cache_result['stocks'][t] for t in tickers if t in cache_result['stocks']}
                 return {
                     'success': True,
-                    'period': cache_result['period'],
+                    'period': period,
                     'stocks': filtered_stocks,
                     'count': len(filtered_stocks),
                     'source': 'cache'
                 }
     
-    # Fetch fresh data
-    print("🌐 Fetching fresh market data for summary analysis...")
+    # Prices come from the price store, which only downloads missing date ranges
+    print("🌐 Loading market data for summary analysis...")
     stock_data = {}
     
-    for ticker in tickers:
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            info = stock.info
-            
-            if len(hist) > 0:
-                start_price = hist['Close'].iloc[0]
-                end_price = hist['Close'].iloc[-1]
-                total_return = ((end_price - start_price) / start_price) * 100
-                
-                daily_returns = hist['Close'].pct_change().dropna()
-                volatility = daily_returns.std() * np.sqrt(252) * 100
-                sharpe_ratio = (total_return - 2.0) / volatility if volatility > 0 else 0
-                
-                # SUMMARY METRICS ONLY (no daily prices)
-                stock_data[ticker] = {
-                    'company': info.get('longName', ticker),
-                    'sector': info.get('sector', 'Unknown'),
-                    'return_pct': round(total_return, 1),
-                    'volatility_pct': round(volatility, 1),
-                    'sharpe_ratio': round(sharpe_ratio, 2),
-                    'current_price': round(end_price, 2)
-                }
-                
-        except Exception as e:
-            print(f"⚠️ Could not analyze {ticker}: {e}")
+    try:
+        start_date, end_date = period_to_range(period)
+        store = get_price_store()
+        prices = store.get_prices(tickers, start_date, end_date, refresh=not use_cache)
+        info = store.get_info(list(prices.columns))
+    except Exception as e:
+        print(f"⚠️ Could not load market data: {e}")
+        prices, info = pd.DataFrame(), {}
+    
+    for ticker in prices.columns:
+        hist = prices[ticker].dropna()
+        if len(hist) == 0:
             continue
+        
+        start_price = hist.iloc[0]
+        end_price = hist.iloc[-1]
+        total_return = ((end_price - start_price) / start_price) * 100
+        
+        daily_returns = hist.pct_change().dropna()
+        volatility = daily_returns.std() * np.sqrt(252) * 100
+        sharpe_ratio = (total_return - 2.0) / volatility if volatility > 0 else 0
+        
+        # SUMMARY METRICS ONLY (no daily prices)
+        stock_data[ticker] = {
+            'company': info[ticker]['company'],
+            'sector': info[ticker]['sector'],
+            'return_pct': round(total_return, 1),
+            'volatility_pct': round(volatility, 1),
+            'sharpe_ratio': round(sharpe_ratio, 2),
+            'current_price': round(end_price, 2)
+        }
+    
+    for ticker in tickers:
+        if ticker not in stock_data:
+            print(f"⚠️ Could not analyze {ticker}")
     
     result = {
         'success': len(stock_data) > 0,
@@ -329,12 +341,35 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     # Save to CSV if enabled
     if result['success'] and use_cache:
         df = pd.DataFrame.from_dict(stock_data, orient='index')
+        df['period'] = period
         df.to_csv("simple_stock_data.csv", index_label='ticker')
         print(f"💾 Simple analysis (summary only) saved to CSV")
     
     return result
 
 
+def _portfolio_volatility(stocks: Dict[str, Any], allocation: Dict[str, float]) -> float:
+    """
+    Annualized portfolio volatility (%) for a {ticker: percentage} allocation.
+
+    Uses the covariance of daily returns from the cached daily prices when every
+    ticker is covered, so correlations between holdings are accounted for. Falls
+    back to the weighted average of single-stock volatilities otherwise.
+    """
+    holdings = {ticker: pct for ticker, pct in allocation.items() if ticker in stocks and pct > 0}
+    if not holdings:
+        return 0.0
+
+    try:
+        engine = get_portfolio_engine()
+        if engine is not None and engine.covers(holdings):
+            return engine.portfolio_volatility(holdings) * sum(holdings.values()) / 100.0
+    except Exception as e:
+        print(f"⚠️ Covariance model unavailable, using weighted volatility: {e}")
+
+    return sum(stocks[ticker]['volatility_pct'] * (pct / 100) for ticker, pct in holdings.items())
+
+
 # Portfolio creation functions moved from lab3
 @tool
 def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_count: int = 4, allocation_method: str = "performance_weighted") -> Dict[str, Any]:
@@ -344,7 +379,8 @@ def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_co
     Args:
         stock_analysis: Stock analysis data (if None, loads from cache)
         allocation_count: Number of stocks to include in portfolio
-        allocation_method: "equal_weight", "performance_weighted", or "risk_adjusted"
+        allocation_method: "equal_weight", "performance_weighted", "risk_adjusted",
+                           "max_sharpe" or "min_variance" (the last two need cached daily prices)
     
     Returns:
         Dictionary with portfolio allocations and metrics
@@ -412,13 +448,20 @@ def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_co
         total_weight = sum(portfolio.values())
         for ticker in portfolio:
             portfolio[ticker] = round((portfolio[ticker] / total_weight) * 100, 1)
+            
+    elif allocation_method in ("max_sharpe", "min_variance"):
+        # Optimize weights over the covariance of daily returns
+        tickers = [ticker for ticker, _ in selected_stocks]
+        engine = get_portfolio_engine()
+        if engine is None or not engine.covers(tickers):
+            return {'success': False, 'error': 'No cached daily prices for these stocks. Run get_stock_data first.'}
+        portfolio = engine.optimize(tickers, objective=allocation_method)['weights']
     
     # Calculate portfolio metrics - simple analysis uses return_pct, volatility_pct
     total_return = sum(stocks[ticker]['return_pct'] * (portfolio[ticker]/100) 
                       for ticker in portfolio.keys())
     
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (portfolio[ticker]/100) 
-                        for ticker in portfolio.keys())
+    avg_volatility = _portfolio_volatility(stocks, portfolio)
     
     return {
         'success': True,
@@ -426,6 +469,7 @@ def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_co
         'allocation_method': allocation_method,
         'portfolio': portfolio,
         'expected_return': round(total_return, 1),
+        'portfolio_volatility': round(avg_volatility, 1),
         'risk_level': 'High' if avg_volatility > 25 else 'Moderate',
         'stock_count': len(portfolio),
         'data_source': stock_analysis.get('source', 'unknown')
@@ -494,14 +538,14 @@ def create_diversified_portfolio(stock_analysis: Dict[str, Any] = None, allocati
     total_return = sum(stocks[ticker]['return_pct'] * (allocation/100) 
                       for ticker, allocation in portfolio.items())
     
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (allocation/100) 
-                        for ticker, allocation in portfolio.items())
+    avg_volatility = _portfolio_volatility(stocks, portfolio)
     
     return {
         'success': True,
         'strategy': 'Diversified',
         'portfolio': portfolio,
         'expected_return': round(total_return, 1),
+        'portfolio_volatility': round(avg_volatility, 1),
         'risk_level': 'Low' if avg_volatility < 20 else 'Moderate',
         'sectors': len(sectors),
         'stock_count': len(portfolio),
@@ -536,14 +580,15 @@ def calculate_portfolio_performance(portfolios: Dict[str, Dict[str, float]], inv
         try:
             # Calculate weighted portfolio return
             total_return = 0.0
-            total_volatility = 0.0
             
             for ticker, percentage in allocation.items():
                 if ticker in stocks:
                     weight = percentage / 100.0
                     # Use simple analysis field names: return_pct, volatility_pct
                     total_return += stocks[ticker]['return_pct'] * weight
-                    total_volatility += stocks[ticker]['volatility_pct'] * weight
+            
+            # Covariance-based when daily prices are cached
+            total_volatility = _portfolio_volatility(stocks, allocation)
             
             # Calculate investment outcome
             final_value = investment_amount * (1 + total_return / 100.0)
@@ -580,6 +625,41 @@ def calculate_portfolio_performance(portfolios: Dict[str, Dict[str, float]], inv
     }
 
 
+@tool
+def optimize_portfolio(tickers: List[str] = None, objective: str = "max_sharpe", n_samples: int = 5000) -> Dict[str, Any]:
+    """
+    Optimize a long-only allocation using the covariance of cached daily returns.
+    
+    Args:
+        tickers: Stocks to allocate across (if None, uses every cached stock)
+        objective: "max_sharpe", "min_variance" or "efficient_frontier"
+        n_samples: Number of candidate allocations evaluated in batch
+    
+    Returns:
+        Dictionary with optimal weights and metrics, or the frontier points
+    """
+    engine = get_portfolio_engine()
+    if engine is None:
+        return {'success': False, 'error': 'No cached daily prices available. Run get_stock_data first.'}
+    
+    tickers = tickers or engine.tickers
+    missing = [ticker for ticker in tickers if not engine.covers([ticker])]
+    if missing:
+        return {'success': False, 'error': f'No cached daily prices for: {", ".join(missing)}'}
+    
+    start = time.time()
+    try:
+        if objective == "efficient_frontier":
+            result = {'frontier': engine.efficient_frontier(tickers, n_samples=n_samples)}
+        else:
+            result = engine.optimize(tickers, objective=objective, n_samples=n_samples)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    
+    print(f"📐 Evaluated {n_samples} allocations for {objective} in {(time.time() - start) * 1000:.1f} ms")
+    return {'success': True, 'objective': objective, 'tickers': tickers, **result}
+
+
 # Visualization functions moved from lab3
 @tool
 def visualize_portfolio_allocation(portfolios: Dict[str, Dict[str, float]], title: str = "Portfolio Allocation Comparison") -> str:
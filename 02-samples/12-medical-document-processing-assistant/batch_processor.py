@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Set, Tuple
+
+from document_processor import process_document
+from medical_coding_tools import code_clinical_entities, extract_clinical_entities
+
+TEXT_EXTENSIONS = {'.txt', '.md'}
+DOCUMENT_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.tiff', '.bmp'}
+
+
+def iter_documents(input_path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (document id, source) pairs from a directory or a JSONL file.
+
+    Directory entries are text files (.txt, .md) or documents (PDF, images),
+    keyed by file name. JSONL lines need an "id" and either "text" or "path".
+    """
+    if os.path.isdir(input_path):
+        for name in sorted(os.listdir(input_path)):
+            extension = os.path.splitext(name)[1].lower()
+            if extension in TEXT_EXTENSIONS | DOCUMENT_EXTENSIONS:
+                yield name, {"path": os.path.join(input_path, name)}
+        return
+
+    with open(input_path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield str(record.get("id", line_number)), record
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Ids of documents already written successfully to the output JSONL.
+
+    The output is compacted first: error records, duplicates and partial
+    lines from an interrupted run are dropped, so retried documents end up
+    with a single line each.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    kept = []
+    dropped = 0
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                dropped += 1  # Partial line from an interrupted run
+                continue
+            if "error" in record or record.get("id") in done:
+                dropped += 1
+                continue
+            done.add(record["id"])
+            kept.append(line if line.endswith("\n") else line + "\n")
+
+    if dropped:
+        with open(output_path + ".tmp", 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(output_path + ".tmp", output_path)
+    return done
+
+
+def read_document_text(source: Dict[str, Any]) -> str:
+    """Clinical text of a source, running PDFs and images through process_document."""
+    if source.get("text"):
+        return source["text"]
+
+    path = source["path"]
+    if os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    text = process_document(path)
+    try:
+        error = json.loads(text).get("error")
+    except (ValueError, AttributeError):
+        error = None
+    if error:
+        raise RuntimeError(error)
+    return text
+
+
+def process_note(doc_id: str, source: Dict[str, Any], lookup_pool: ThreadPoolExecutor) -> Dict[str, Any]:
+    """Extract and code one document; errors are returned in the record, not raised."""
+    started = time.perf_counter()
+    try:
+        entities = extract_clinical_entities(read_document_text(source))
+        record = {"id": doc_id, **code_clinical_entities(entities, lookup_pool)}
+    except Exception as e:
+        record = {"id": doc_id, "error": str(e)}
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    return record
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 4, lookup_workers: int = 8,
+              report_every: int = 25) -> Dict[str, Any]:
+    """
+    Process every document of a directory or JSONL file into a JSONL output.
+
+    Documents run concurrently on `workers` threads, each with one combined
+    extraction call; code lookups share a pool of `lookup_workers` threads.
+    The output file doubles as the checkpoint: documents already written
+    without an error are skipped when the batch is restarted, and the error
+    lines of documents that are retried are removed.
+
+    Returns:
+        Dict with processed, failed and skipped counts and documents per minute
+    """
+    done = load_checkpoint(output_path)
+    stats = {"processed": 0, "failed": 0, "skipped": 0}
+    write_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def report():
+        elapsed = time.perf_counter() - started
+        total = stats["processed"] + stats["failed"]
+        rate = total / elapsed * 60 if elapsed > 0 else 0.0
+        print(f"📊 {total} documents ({stats['failed']} failed, {stats['skipped']} skipped) "
+              f"in {elapsed:.0f}s - {rate:.1f} documents/minute")
+        return rate
+
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=lookup_workers) as lookup_pool, \
+            ThreadPoolExecutor(max_workers=workers) as document_pool:
+
+        def write(record):
+            with write_lock:
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+                stats["failed" if "error" in record else "processed"] += 1
+                if (stats["processed"] + stats["failed"]) % report_every == 0:
+                    report()
+
+        # Keep a bounded number of documents in flight so huge inputs are streamed
+        pending = set()
+        for doc_id, source in iter_documents(input_path):
+            if doc_id in done:
+                stats["skipped"] += 1
+                continue
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+            pending.add(document_pool.submit(process_note, doc_id, source, lookup_pool))
+
+        for future in wait(pending).done:
+            write(future.result())
+
+    stats["documents_per_minute"] = round(report(), 1)
+    return stats
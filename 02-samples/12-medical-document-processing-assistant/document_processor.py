@@ -1,100 +1,193 @@
 #!/usr/bin/env python3
 
 import os
+import io
 import json
 import boto3
 import base64
-from pypdf import PdfReader
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from pypdf import PdfReader, PdfWriter
 from strands import tool
 
+DOCUMENT_CACHE_DIR = os.environ.get("DOCUMENT_CACHE_DIR", ".document_cache")
+MIN_PAGE_TEXT = 20  # characters of text layer below which a page is treated as scanned
+PAGES_PER_REQUEST = int(os.environ.get("PDF_PAGES_PER_REQUEST", "5"))
+PAGES_PER_WORKER = 8  # text layer pages extracted per process pool task
+VISION_WORKERS = 4
+
+EXTRACTION_PROMPT = "Extract all text content from this medical document. Preserve the formatting as much as possible. Include all medical terms, diagnoses, medications, and treatments. Be thorough and capture all details from the document."
+
+IMAGE_MEDIA_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.tiff': 'image/tiff',
+    '.bmp': 'image/bmp',
+}
+
+_text_cache: Dict[str, str] = {}
+_text_cache_lock = threading.Lock()
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
 @tool
 def process_document(file_path: str) -> str:
     """
-    Process a medical document (PDF or image) and extract its content using Amazon Bedrock.
-    
+    Process a medical document (PDF or image) and extract its content.
+
+    PDF pages with a text layer are read directly; only scanned pages are sent
+    to Amazon Bedrock. Results are cached by file content.
+
     Args:
         file_path: Path to the document file (PDF or image)
-        
+
     Returns:
         Extracted text content from the document
     """
     if not os.path.exists(file_path):
         return json.dumps({"error": f"File not found: {file_path}"})
-    
+
     file_extension = os.path.splitext(file_path)[1].lower()
-    
+    if file_extension != '.pdf' and file_extension not in IMAGE_MEDIA_TYPES:
+        return json.dumps({"error": f"Unsupported file format: {file_extension}"})
+
     try:
-        # Use Bedrock for all document types
+        content_hash = _file_hash(file_path)
+        cached = _get_cached_text(content_hash)
+        if cached is not None:
+            return cached
+
+        errors: List[str] = []
         if file_extension == '.pdf':
-            # For PDFs, try Bedrock first, then fall back to traditional PDF extraction
-            try:
-                return _use_bedrock_for_document(file_path)
-            except Exception as e:
-                print(f"Bedrock processing failed, falling back to PDF extraction: {str(e)}")
-                return _process_pdf_traditional(file_path)
-        
-        # Process image files with Bedrock
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-            return _use_bedrock_for_document(file_path)
-        
+            text = "\n".join(text for _, text in iter_pdf_pages(file_path, errors))
+            if len(text.strip()) <= 50:
+                return json.dumps({"error": "PDF appears to be image-based and could not be processed with Bedrock"})
         else:
-            return json.dumps({"error": f"Unsupported file format: {file_extension}"})
-            
+            with open(file_path, 'rb') as file:
+                text = _invoke_vision_model(file.read(), IMAGE_MEDIA_TYPES[file_extension])
+
+        # Don't cache text-layer stand-ins for pages the vision model failed on
+        if not errors:
+            _set_cached_text(content_hash, text)
+        return text
+
     except Exception as e:
         return json.dumps({"error": f"Error processing document: {str(e)}"})
 
-def _process_pdf_traditional(file_path: str) -> str:
-    """Extract text from a PDF file using PyPDF."""
-    try:
-        # Extract text directly from PDF
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        # If text extraction yields meaningful content, return it
-        if len(text.strip()) > 50:
-            return text
-        
-        # If minimal text was extracted, the PDF might be scanned/image-based
-        # In this case, we can't extract text using traditional methods
-        return json.dumps({"error": "PDF appears to be image-based and requires Bedrock for processing"})
-        
-    except Exception as e:
-        return json.dumps({"error": f"Error processing PDF: {str(e)}"})
+def iter_pdf_pages(file_path: str, errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page number, text) entries covering every page of a PDF, in order.
 
-def _use_bedrock_for_document(file_path: str) -> str:
-    """Use Amazon Bedrock for document processing."""
-    try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        
-        # Read file as base64
-        with open(file_path, 'rb') as file:
-            file_bytes = file.read()
-            base64_data = base64.b64encode(file_bytes).decode('utf-8')
-        
-        # Determine media type based on file extension
-        file_extension = os.path.splitext(file_path)[1].lower()
-        if file_extension == '.pdf':
-            media_type = 'application/pdf'
-        elif file_extension == '.png':
-            media_type = 'image/png'
-        elif file_extension in ['.jpg', '.jpeg']:
-            media_type = 'image/jpeg'
-        elif file_extension == '.tiff':
-            media_type = 'image/tiff'
-        elif file_extension == '.bmp':
-            media_type = 'image/bmp'
+    The text layer is extracted with pypdf in a process pool. Pages with a
+    text layer yield one entry each. Pages without a usable text layer are
+    grouped into chunks of PAGES_PER_REQUEST and sent to the vision model
+    concurrently; the model returns one text for the whole chunk, so a chunk
+    yields a single entry numbered with its first page and the page numbers
+    skip past the rest of the chunk. Text-layer pages are yielded as soon as
+    every scanned page before them has been processed. If a chunk fails,
+    its text layer is used instead, one entry per page, and the error is
+    appended to `errors`.
+    """
+    page_texts = _extract_text_layer(file_path)
+    scanned = [i for i, text in enumerate(page_texts) if len(text.strip()) < MIN_PAGE_TEXT]
+
+    # Consecutive runs of scanned pages, split into chunks of at most PAGES_PER_REQUEST
+    chunks: List[List[int]] = []
+    for page in scanned:
+        if chunks and chunks[-1][-1] == page - 1 and len(chunks[-1]) < PAGES_PER_REQUEST:
+            chunks[-1].append(page)
         else:
-            media_type = 'application/octet-stream'
-        
+            chunks.append([page])
+
+    if not chunks:
+        yield from enumerate(page_texts, 1)
+        return
+
+    with ThreadPoolExecutor(max_workers=VISION_WORKERS) as pool:
+        futures = {chunk[0]: (chunk, pool.submit(_extract_pages_with_vision, file_path, chunk)) for chunk in chunks}
+        page = 0
+        while page < len(page_texts):
+            if page not in futures:
+                yield page + 1, page_texts[page]
+                page += 1
+                continue
+            chunk, future = futures[page]
+            try:
+                yield chunk[0] + 1, future.result()
+            except Exception as e:
+                print(f"Bedrock processing failed for pages {chunk[0] + 1}-{chunk[-1] + 1}, using text layer: {str(e)}")
+                if errors is not None:
+                    errors.append(str(e))
+                for i in chunk:
+                    yield i + 1, page_texts[i]
+            page = chunk[-1] + 1
+
+def _extract_text_layer(file_path: str) -> List[str]:
+    """Text layer of every page, extracted in parallel for larger PDFs."""
+    page_count = len(PdfReader(file_path).pages)
+    if page_count <= PAGES_PER_WORKER:
+        return _extract_text_range(file_path, 0, page_count)
+
+    ranges = [(start, min(start + PAGES_PER_WORKER, page_count)) for start in range(0, page_count, PAGES_PER_WORKER)]
+    pool = _get_process_pool()
+    futures = [pool.submit(_extract_text_range, file_path, start, stop) for start, stop in ranges]
+    return [text for future in futures for text in future.result()]
+
+def _extract_text_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text layer of pages [start, stop); runs in a worker process."""
+    reader = PdfReader(file_path)
+    texts = []
+    for i in range(start, stop):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+def _extract_pages_with_vision(file_path: str, pages: List[int]) -> str:
+    """Send a chunk of pages to Bedrock as a standalone PDF."""
+    reader = PdfReader(file_path)
+    writer = PdfWriter()
+    for i in pages:
+        writer.add_page(reader.pages[i])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return _invoke_vision_model(buffer.getvalue(), 'application/pdf')
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned, not forked: the pool may be created from a worker thread
+            # (batch mode) while other threads hold boto3 or logging locks
+            _process_pool = ProcessPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+@lru_cache(maxsize=1)
+def _get_bedrock_client():
+    """Shared Bedrock runtime client."""
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name=os.environ.get('AWS_REGION', 'us-east-1')
+    )
+
+def _invoke_vision_model(data: bytes, media_type: str) -> str:
+    """Use Amazon Bedrock to extract text from a PDF chunk or an image."""
+    try:
+        # PDFs are sent as document blocks, images as image blocks
+        block_type = 'document' if media_type == 'application/pdf' else 'image'
+
         # Prepare request for Claude model
         model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
-        
+
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 4096,
@@ -103,33 +196,62 @@ def _use_bedrock_for_document(file_path: str) -> str:
                     "role": "user",
                     "content": [
                         {
-                            "type": "image",
+                            "type": block_type,
                             "source": {
                                 "type": "base64",
                                 "media_type": media_type,
-                                "data": base64_data
+                                "data": base64.b64encode(data).decode('utf-8')
                             }
                         },
                         {
                             "type": "text",
-                            "text": "Extract all text content from this medical document. Preserve the formatting as much as possible. Include all medical terms, diagnoses, medications, and treatments. Be thorough and capture all details from the document."
+                            "text": EXTRACTION_PROMPT
                         }
                     ]
                 }
             ]
         }
-        
+
         # Invoke Bedrock model
-        response = bedrock_runtime.invoke_model(
+        response = _get_bedrock_client().invoke_model(
             modelId=model_id,
             body=json.dumps(request_body)
         )
-        
+
         # Parse response
         response_body = json.loads(response['body'].read().decode('utf-8'))
         extracted_text = response_body['content'][0]['text']
-        
+
         return extracted_text
-        
+
     except Exception as e:
         raise Exception(f"Error using Bedrock for document processing: {str(e)}")
+
+def _file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _get_cached_text(content_hash: str):
+    with _text_cache_lock:
+        if content_hash in _text_cache:
+            return _text_cache[content_hash]
+    path = os.path.join(DOCUMENT_CACHE_DIR, f"{content_hash}.txt")
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        with _text_cache_lock:
+            _text_cache[content_hash] = text
+        return text
+    return None
+
+def _set_cached_text(content_hash: str, text: str):
+    with _text_cache_lock:
+        _text_cache[content_hash] = text
+    os.makedirs(DOCUMENT_CACHE_DIR, exist_ok=True)
+    path = os.path.join(DOCUMENT_CACHE_DIR, f"{content_hash}.txt")
+    with open(path + ".tmp", 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(path + ".tmp", path)
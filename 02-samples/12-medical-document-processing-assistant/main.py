@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging
 import os
 
@@ -9,6 +10,7 @@ from medical_coding_tools import (
     get_icd,
     get_rx,
     get_snomed,
+    link_all,
     link_icd,
     link_rx,
     link_snomed,
@@ -49,6 +51,7 @@ medical_agent = Agent(
         get_icd,
         get_rx,
         get_snomed,
+        link_all,
         link_icd,
         link_rx,
         link_snomed,
@@ -132,4 +135,17 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Medical Document Processing Assistant")
+    parser.add_argument("--batch", metavar="INPUT", help="Process a directory of documents or a JSONL file of notes without prompting")
+    parser.add_argument("--output", default="coded_notes.jsonl", help="JSONL output for batch mode, also used to resume")
+    parser.add_argument("--workers", type=int, default=4, help="Documents processed concurrently in batch mode")
+    parser.add_argument("--lookup-workers", type=int, default=8, help="Concurrent code lookups in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        from batch_processor import run_batch
+
+        stats = run_batch(args.batch, args.output, workers=args.workers, lookup_workers=args.lookup_workers)
+        print(f"\n✅ Batch complete: {stats}")
+    else:
+        main()
\ No newline at end of file
@@ -3,9 +3,13 @@
 import os
 import json
 import requests
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional
 import boto3
+from requests.adapters import HTTPAdapter
 from strands import tool
+from terminology_index import get_lookup_cache, get_terminology_index
 
 # Base URLs for medical terminology APIs
 ICD10_API_BASE_URL = "https://clinicaltables.nlm.nih.gov/api/icd10cm/v3/search"
@@ -14,10 +18,120 @@ RXNORM_INFO_API_BASE_URL = "https://rxnav.nlm.nih.gov/REST/rxcui/{rxcui}/allrela
 SNOMED_API_BASE_URL = "https://browser.ihtsdotools.org/snowstorm/snomed-ct/MAIN/concepts"
 SNOMED_BROWSER_URL = "https://browser.ihtsdotools.org/?perspective=full&edition=MAIN/SNOMEDCT-US/2025-03-01&languages=en"
 
+REQUEST_TIMEOUT = 10  # seconds per terminology API call
+# Skip the remote APIs and Bedrock when a term is not in the local index
+OFFLINE_MODE = os.environ.get("MEDICAL_CODING_OFFLINE", "").lower() in ("1", "true", "yes")
+
+# Placeholder codes for terms that could not be resolved, never cached
+UNRESOLVED_CODES = {"", "Not found", "Unknown", "Error"}
+
+# Output field names per code system: (term field, code field)
+CODE_FIELDS = {
+    "ICD-10": ("diagnosis", "ICD10_code"),
+    "RxNorm": ("medication", "RxNorm_code"),
+    "SNOMED CT": ("procedure", "SNOMED_code"),
+}
+
+
+@lru_cache(maxsize=1)
+def _get_http_session() -> requests.Session:
+    """Shared HTTP session so terminology API calls reuse pooled keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("https://", adapter)
+    return session
+
+
+@lru_cache(maxsize=1)
+def _get_bedrock_client():
+    """Shared Bedrock runtime client."""
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name=os.environ.get('AWS_REGION', 'us-east-1')
+    )
+
+
+def _lookup_code(code_system: str, term: str, api_lookup: Callable[[str], str], instruction: str) -> str:
+    """
+    Resolve a term to codes through the lookup cache, the local index, the remote API and Bedrock, in that order.
+
+    Only results that carry a real code are written back to the cache, so
+    repeated terms skip every other step while misses, errors and offline
+    placeholders are looked up again next time.
+    """
+    cache = get_lookup_cache()
+    cached = cache.get(code_system, term)
+    if cached is not None:
+        return cached
+
+    term_field, code_field = CODE_FIELDS[code_system]
+    result = _get_code_from_local_index(code_system, term)
+
+    if result is None and OFFLINE_MODE:
+        return json.dumps([{
+            term_field: term,
+            code_field: "Not found",
+            "confidence_score": "0%"
+        }])
+
+    if result is None:
+        try:
+            result = api_lookup(term)
+        except Exception:
+            # Fallback to Bedrock for code lookup if API fails, errors are returned in the result
+            result = _get_medical_code_from_bedrock(term, code_system, instruction)
+
+    if _is_cacheable(result, code_field):
+        cache.set(code_system, term, result)
+    return result
+
+
+def _is_cacheable(result: str, code_field: str) -> bool:
+    """True when every item of a lookup result is a dict with a real code and no error."""
+    try:
+        items = json.loads(result)
+    except (TypeError, ValueError):
+        return False
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list) or not items:
+        return False
+    return all(
+        isinstance(item, dict)
+        and "error" not in item
+        and str(item.get(code_field) or "") not in UNRESOLVED_CODES
+        for item in items
+    )
+
+
+def _get_code_from_local_index(code_system: str, term: str) -> Optional[str]:
+    """Look a term up in the local terminology index, or return None when it has no match."""
+    try:
+        matches = get_terminology_index().search(code_system, term)
+    except Exception as e:
+        print(f"Local terminology index unavailable: {str(e)}")
+        return None
+    if not matches:
+        return None
+
+    term_field, code_field = CODE_FIELDS[code_system]
+    return json.dumps([
+        {
+            term_field: term,
+            code_field: match["code"],
+            "description": match["description"],
+            # Higher for earlier and closer matches
+            "confidence_score": f"{min(max(95 - (i * 5), 70), round(match['score'] * 100))}%"
+        }
+        for i, match in enumerate(matches)
+    ])
+
+
 @tool
 def get_icd(diagnosis: str) -> str:
     """
-    Get ICD-10 codes for a given diagnosis using the NLM Clinical Tables API.
+    Get ICD-10 codes for a given diagnosis from the local terminology index,
+    falling back to the NLM Clinical Tables API.
     
     Args:
         diagnosis: The medical diagnosis to look up
@@ -25,27 +139,18 @@ def get_icd(diagnosis: str) -> str:
     Returns:
         JSON string containing matching ICD-10 codes and descriptions
     """
-    try:
-        # Use the NLM Clinical Tables API (no authentication required)
-        return _get_icd_from_api(diagnosis)
-    except Exception as e:
-        # Fallback to Bedrock for code lookup if API fails
-        try:
-            return _get_medical_code_from_bedrock(
-                diagnosis, 
-                "ICD-10", 
-                "Find the most appropriate ICD-10 codes for this diagnosis"
-            )
-        except Exception as inner_e:
-            return json.dumps({
-                "error": f"Error retrieving ICD-10 codes: {str(e)}. Fallback error: {str(inner_e)}",
-                "diagnosis": diagnosis
-            })
+    return _lookup_code(
+        "ICD-10",
+        diagnosis,
+        _get_icd_from_api,
+        "Find the most appropriate ICD-10 codes for this diagnosis"
+    )
 
 @tool
 def get_rx(medication: str) -> str:
     """
-    Get RxNorm codes for a given medication using the NLM RxNav API.
+    Get RxNorm codes for a given medication from the local terminology index,
+    falling back to the NLM RxNav API.
     
     Args:
         medication: The medication name to look up
@@ -53,27 +158,18 @@ def get_rx(medication: str) -> str:
     Returns:
         JSON string containing matching RxNorm codes and information
     """
-    try:
-        # Use the NLM RxNav API (no authentication required)
-        return _get_rx_from_api(medication)
-    except Exception as e:
-        # Fallback to Bedrock for code lookup if API fails
-        try:
-            return _get_medical_code_from_bedrock(
-                medication, 
-                "RxNorm", 
-                "Find the most appropriate RxNorm codes for this medication"
-            )
-        except Exception as inner_e:
-            return json.dumps({
-                "error": f"Error retrieving RxNorm codes: {str(e)}. Fallback error: {str(inner_e)}",
-                "medication": medication
-            })
+    return _lookup_code(
+        "RxNorm",
+        medication,
+        _get_rx_from_api,
+        "Find the most appropriate RxNorm codes for this medication"
+    )
 
 @tool
 def get_snomed(treatment: str) -> str:
     """
-    Get SNOMED CT codes for a given treatment or procedure using the SNOMED CT browser API.
+    Get SNOMED CT codes for a given treatment or procedure from the local terminology
+    index, falling back to the SNOMED CT browser API.
     
     Args:
         treatment: The medical treatment or procedure to look up
@@ -81,22 +177,12 @@ def get_snomed(treatment: str) -> str:
     Returns:
         JSON string containing matching SNOMED CT codes and descriptions
     """
-    try:
-        # Use the SNOMED CT browser API
-        return _get_snomed_from_api(treatment)
-    except Exception as e:
-        # Fallback to Bedrock for code lookup if API fails
-        try:
-            return _get_medical_code_from_bedrock(
-                treatment, 
-                "SNOMED CT", 
-                "Find the most appropriate SNOMED CT codes for this treatment or procedure"
-            )
-        except Exception as inner_e:
-            return json.dumps({
-                "error": f"Error retrieving SNOMED CT codes: {str(e)}. Fallback error: {str(inner_e)}",
-                "treatment": treatment
-            })
+    return _lookup_code(
+        "SNOMED CT",
+        treatment,
+        _get_snomed_from_api,
+        "Find the most appropriate SNOMED CT codes for this treatment or procedure"
+    )
 
 @tool
 def link_icd(clinical_text: str) -> str:
@@ -237,6 +323,118 @@ def link_snomed(clinical_text: str) -> str:
             "confidence_score": "0%"
         }])
 
+@tool
+def link_all(clinical_text: str) -> str:
+    """
+    Extract diagnoses, medications and procedures from clinical text in one pass
+    and link them to ICD-10, RxNorm and SNOMED CT codes.
+    
+    Args:
+        clinical_text: The clinical text to analyze
+        
+    Returns:
+        JSON string with "diagnoses", "medications" and "procedures" arrays
+    """
+    try:
+        entities = extract_clinical_entities(clinical_text)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            return json.dumps(code_clinical_entities(entities, pool))
+    except Exception as e:
+        return json.dumps({"error": f"Error linking clinical entities: {str(e)}"})
+
+def extract_clinical_entities(clinical_text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Extract diagnoses, medications and procedures with a single Bedrock call.
+    
+    Returns:
+        Dict with "diagnoses", "medications" and "procedures" lists of entity dicts
+    """
+    prompt = f"""
+    Extract all diagnoses, medications, and treatments/procedures from the following clinical text.
+    
+    Clinical text:
+    {clinical_text}
+    
+    Return only a JSON object with this exact format:
+    {{
+        "diagnoses": [{{"diagnosis": "The diagnosis as mentioned in the text"}}],
+        "medications": [{{"medication": "The medication name as mentioned in the text", "dosage": "The dosage if specified (or null)", "frequency": "The frequency if specified (or null)"}}],
+        "procedures": [{{"procedure": "The treatment/procedure as mentioned in the text"}}]
+    }}
+    """
+    
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 2048,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    }
+    
+    response = _get_bedrock_client().invoke_model(
+        modelId=os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0'),
+        body=json.dumps(request_body)
+    )
+    
+    response_body = json.loads(response['body'].read().decode('utf-8'))
+    result = response_body['content'][0]['text']
+    
+    # The object may be surrounded by prose or a code fence, decode from its first brace
+    start = result.find('{')
+    entities, _ = json.JSONDecoder().raw_decode(result, start) if start != -1 else (json.loads(result), None)
+    return {key: [item for item in entities.get(key) or [] if isinstance(item, dict)]
+            for key in ("diagnoses", "medications", "procedures")}
+
+def code_clinical_entities(entities: Dict[str, List[Dict[str, Any]]], executor) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Look up codes for extracted entities concurrently.
+    
+    Each entity is matched to its best code through the lookup cache, local
+    index and remote APIs (see _lookup_code).
+    
+    Args:
+        entities: Output of extract_clinical_entities
+        executor: Executor the lookups are submitted to, bounding concurrency
+        
+    Returns:
+        The entities with code, description and confidence_score filled in
+    """
+    lookups = {
+        "diagnoses": ("ICD-10", _get_icd_from_api, "Find the most appropriate ICD-10 codes for this diagnosis"),
+        "medications": ("RxNorm", _get_rx_from_api, "Find the most appropriate RxNorm codes for this medication"),
+        "procedures": ("SNOMED CT", _get_snomed_from_api, "Find the most appropriate SNOMED CT codes for this treatment or procedure"),
+    }
+    
+    futures = {}
+    for key, (code_system, api_lookup, instruction) in lookups.items():
+        term_field, _ = CODE_FIELDS[code_system]
+        for i, entity in enumerate(entities.get(key, [])):
+            term = str(entity.get(term_field) or "").strip()
+            if term:
+                futures[(key, i)] = executor.submit(_lookup_code, code_system, term, api_lookup, instruction)
+    
+    coded = {key: [dict(entity) for entity in entities.get(key, [])] for key in lookups}
+    for (key, i), future in futures.items():
+        code_system = lookups[key][0]
+        _, code_field = CODE_FIELDS[code_system]
+        try:
+            matches = json.loads(future.result())
+            best = matches[0] if isinstance(matches, list) and matches else matches
+        except Exception as e:
+            best = {"error": str(e)}
+        if not isinstance(best, dict):
+            best = {"error": f"Unexpected {code_system} lookup result: {best}"}
+        coded[key][i].update({
+            code_field: best.get(code_field, "Error" if "error" in best else "Not found"),
+            "description": best.get("description", ""),
+            "confidence_score": best.get("confidence_score", "0%"),
+            **({"error": best["error"]} if "error" in best else {})
+        })
+    return coded
+
 def _get_icd_from_api(diagnosis: str, api_key: str = None) -> str:
     """
     Query NLM Clinical Tables API for ICD-10 codes.
@@ -251,7 +449,7 @@ def _get_icd_from_api(diagnosis: str, api_key: str = None) -> str:
     }
     
     # Note: This API doesn't require authentication for basic usage
-    response = requests.get(ICD10_API_BASE_URL, params=params)
+    response = _get_http_session().get(ICD10_API_BASE_URL, params=params, timeout=REQUEST_TIMEOUT)
     
     if response.status_code == 200:
         data = response.json()
@@ -295,7 +493,7 @@ def _get_rx_from_api(medication: str, api_key: str = None) -> str:
     }
     
     # RxNav API doesn't require authentication
-    response = requests.get(f"{RXNORM_API_BASE_URL}", params=params)
+    response = _get_http_session().get(f"{RXNORM_API_BASE_URL}", params=params, timeout=REQUEST_TIMEOUT)
     
     if response.status_code != 200:
         return json.dumps([{
@@ -318,15 +516,17 @@ def _get_rx_from_api(medication: str, api_key: str = None) -> str:
         }])
     
     results = []
+    rxcuis = [rxcui_element.text for rxcui_element in rxcui_elements[:3]]  # Limit to first 3 results
     
-    # For each RxCUI, get additional information
-    for i, rxcui_element in enumerate(rxcui_elements[:3]):  # Limit to first 3 results
-        rxcui = rxcui_element.text
-        
-        # Step 2: Get related information for this RxCUI
+    # Step 2: Get related information for each RxCUI concurrently
+    def get_related(rxcui):
         info_url = RXNORM_INFO_API_BASE_URL.format(rxcui=rxcui)
-        info_response = requests.get(info_url)
-        
+        return _get_http_session().get(info_url, timeout=REQUEST_TIMEOUT)
+    
+    with ThreadPoolExecutor(max_workers=len(rxcuis)) as pool:
+        info_responses = list(pool.map(get_related, rxcuis))
+    
+    for i, (rxcui, info_response) in enumerate(zip(rxcuis, info_responses)):
         if info_response.status_code == 200:
             info_root = ET.fromstring(info_response.content)
             
@@ -388,7 +588,7 @@ def _get_snomed_from_api(treatment: str, api_key: str = None) -> str:
         headers["Authorization"] = f"Bearer {api_key}"
     
     try:
-        response = requests.get(search_url, params=params, headers=headers)
+        response = _get_http_session().get(search_url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
@@ -437,11 +637,7 @@ def _get_snomed_from_api(treatment: str, api_key: str = None) -> str:
 def _get_medical_code_from_bedrock(term: str, code_system: str, instruction: str) -> str:
     """Use Amazon Bedrock to look up medical codes."""
     try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        bedrock_runtime = _get_bedrock_client()
         
         # Prepare request for Claude model
         model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
@@ -535,11 +731,7 @@ def _get_medical_code_from_bedrock(term: str, code_system: str, instruction: str
 def _get_structured_data_from_bedrock(prompt: str, data_type: str) -> str:
     """Use Amazon Bedrock to extract structured data from clinical text."""
     try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        bedrock_runtime = _get_bedrock_client()
         
         # Prepare request for Claude model
         model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
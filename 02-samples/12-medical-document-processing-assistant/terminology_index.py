@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Databases live next to this module unless configured, whatever the working directory
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+TERMINOLOGY_DB = os.environ.get("TERMINOLOGY_DB", os.path.join(MODULE_DIR, "terminology.db"))
+TERMINOLOGY_CACHE_DB = os.environ.get("TERMINOLOGY_CACHE_DB", os.path.join(MODULE_DIR, "terminology_cache.db"))
+TERMINOLOGY_CACHE_TTL = float(os.environ.get("TERMINOLOGY_CACHE_TTL", str(30 * 24 * 3600)))
+
+CODE_SYSTEMS = ("ICD-10", "RxNorm", "SNOMED CT")
+
+# RxNorm term types worth indexing, best first (ingredient, brand, clinical and branded drugs)
+RXNORM_TERM_TYPES = {"IN": 0, "BN": 1, "SCD": 2, "SBD": 3, "PIN": 4, "MIN": 5, "SCDF": 6, "SBDF": 7}
+SNOMED_SYNONYM_TYPE = "900000000000013009"
+
+
+def normalize_term(term: str) -> str:
+    """Lower-case a term and collapse whitespace, used as the lookup key."""
+    return " ".join(term.lower().split())
+
+
+class TerminologyIndex:
+    """
+    Local code-set index backed by SQLite FTS5 with a trigram tokenizer.
+
+    Concepts from the official ICD-10-CM, RxNorm and SNOMED CT release files
+    are loaded once with `python terminology_index.py <system> <file>`.
+    Searches try an exact description match, then a substring match, then
+    a fuzzy match over shared trigrams re-scored by string similarity, so
+    misspelled terms still resolve without a network call.
+    """
+
+    def __init__(self, db_path: str = TERMINOLOGY_DB):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS concepts (
+                id INTEGER PRIMARY KEY,
+                system TEXT NOT NULL,
+                code TEXT NOT NULL,
+                description TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS concepts_description
+                ON concepts (system, description COLLATE NOCASE);
+            CREATE VIRTUAL TABLE IF NOT EXISTS concepts_fts
+                USING fts5(description, content='concepts', content_rowid='id', tokenize='trigram');
+        """)
+        self._counts = dict(self._conn.execute("SELECT system, COUNT(*) FROM concepts GROUP BY system"))
+
+    def has_system(self, system: str) -> bool:
+        return self._counts.get(system, 0) > 0
+
+    def search(self, system: str, term: str, limit: int = 5, min_score: float = 0.5) -> List[Dict[str, object]]:
+        """
+        Find concepts whose description best matches a term.
+
+        Args:
+            system: Code system, one of CODE_SYSTEMS
+            term: Diagnosis, medication or procedure to look up
+            limit: Maximum number of concepts to return
+            min_score: Minimum similarity (0-1) for fuzzy matches
+
+        Returns:
+            List of {"code", "description", "score"} dicts, best match first
+        """
+        term = normalize_term(term)
+        if not term or not self.has_system(system):
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT code, description, priority FROM concepts "
+                "WHERE system = ? AND description = ? COLLATE NOCASE ORDER BY priority LIMIT ?",
+                (system, term, limit)
+            ).fetchall()
+            if len(term) >= 3:
+                # Substring match first, then any shared trigram for misspellings
+                for query in (_fts_phrase(term), _fts_trigrams(term)):
+                    if len(rows) >= limit:
+                        break
+                    rows += self._conn.execute(
+                        "SELECT c.code, c.description, c.priority FROM concepts_fts "
+                        "JOIN concepts c ON c.id = concepts_fts.rowid "
+                        "WHERE concepts_fts MATCH ? AND c.system = ? ORDER BY rank LIMIT ?",
+                        (query, system, limit * 20)
+                    ).fetchall()
+            else:
+                rows += self._conn.execute(
+                    "SELECT code, description, priority FROM concepts "
+                    "WHERE system = ? AND description LIKE ? ORDER BY priority, length(description) LIMIT ?",
+                    (system, f"{term}%", limit)
+                ).fetchall()
+
+        best: Dict[str, Tuple[float, int, str]] = {}
+        for code, description, priority in rows:
+            score = _similarity(term, description.lower())
+            if score >= min_score and (code not in best or (score, -priority) > (best[code][0], -best[code][1])):
+                best[code] = (score, priority, description)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1], len(item[1][2])))
+        return [{"code": code, "description": description, "score": round(score, 3)}
+                for code, (score, _, description) in ranked[:limit]]
+
+    def load(self, system: str, concepts: Iterator[Tuple[str, str, int]], replace: bool = True) -> int:
+        """
+        Load (code, description, priority) rows for a code system and rebuild the full-text index.
+
+        Returns:
+            Number of concepts loaded
+        """
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM concepts WHERE system = ?", (system,))
+            cursor = self._conn.executemany(
+                "INSERT INTO concepts (system, code, description, priority) VALUES (?, ?, ?, ?)",
+                ((system, code, description, priority) for code, description, priority in concepts)
+            )
+            count = cursor.rowcount
+            self._conn.execute("INSERT INTO concepts_fts (concepts_fts) VALUES ('rebuild')")
+        self._counts = dict(self._conn.execute("SELECT system, COUNT(*) FROM concepts GROUP BY system"))
+        return count
+
+    def close(self):
+        self._conn.close()
+
+
+class LookupCache:
+    """
+    Two-level memo cache for code lookups: an in-process LRU in front of a SQLite table.
+
+    Entries are keyed by code system and normalized term and expire after
+    `ttl` seconds, so terms repeated across documents and runs skip both the
+    local index and the remote APIs.
+    """
+
+    def __init__(self, db_path: str = TERMINOLOGY_CACHE_DB, maxsize: int = 4096, ttl: float = TERMINOLOGY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                system TEXT NOT NULL,
+                term TEXT NOT NULL,
+                result TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (system, term)
+            )
+        """)
+
+    def get(self, system: str, term: str) -> Optional[str]:
+        key = (system, normalize_term(term))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT expires_at, result FROM lookups WHERE system = ? AND term = ?", key
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = tuple(row)
+                self._remember(key, entry)
+            if entry[0] <= now:
+                self._memory.pop(key, None)
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def set(self, system: str, term: str, result: str):
+        key = (system, normalize_term(term))
+        entry = (time.time() + self.ttl, result)
+        with self._lock, self._conn:
+            self._remember(key, entry)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (system, term, result, expires_at) VALUES (?, ?, ?, ?)",
+                (*key, result, entry[0])
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM lookups")
+
+    def _remember(self, key: Tuple[str, str], entry: Tuple[float, str]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _fts_trigrams(term: str) -> str:
+    trigrams = dict.fromkeys(term[i:i + 3] for i in range(len(term) - 2))
+    return " OR ".join(_fts_phrase(trigram) for trigram in trigrams)
+
+
+def _similarity(term: str, description: str) -> float:
+    """Similarity of a term to a description; a whole-word substring counts as a strong match."""
+    if term == description:
+        return 1.0
+    ratio = SequenceMatcher(None, term, description).ratio()
+    if re.search(rf"\b{re.escape(term)}\b", description):
+        ratio = max(ratio, 0.9 - min(len(description) - len(term), 100) / 1000)
+    return ratio
+
+
+# --- code-set file readers ---
+
+def read_icd10cm(path: str) -> Iterator[Tuple[str, str, int]]:
+    """Read the CMS ICD-10-CM code file (icd10cm_codes_YYYY.txt): code, whitespace, description."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                code = parts[0] if "." in parts[0] or len(parts[0]) <= 3 else f"{parts[0][:3]}.{parts[0][3:]}"
+                yield code, parts[1], 0
+
+
+def read_rxnconso(path: str) -> Iterator[Tuple[str, str, int]]:
+    """Read RxNorm concept names from RXNCONSO.RRF (pipe-delimited, RXNORM source only)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split("|")
+            # RXCUI|LAT|TS|LUI|STT|SUI|ISPREF|RXAUI|SAUI|SCUI|SDUI|SAB|TTY|CODE|STR|...
+            if len(fields) > 14 and fields[11] == "RXNORM" and fields[12] in RXNORM_TERM_TYPES:
+                yield fields[0], fields[14], RXNORM_TERM_TYPES[fields[12]]
+
+
+def read_snomed_descriptions(path: str) -> Iterator[Tuple[str, str, int]]:
+    """Read active descriptions from an RF2 sct2_Description_Snapshot file, synonyms before FSNs."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if row["active"] == "1":
+                yield row["conceptId"], row["term"], 0 if row["typeId"] == SNOMED_SYNONYM_TYPE else 1
+
+
+def read_code_csv(path: str) -> Iterator[Tuple[str, str, int]]:
+    """Read a generic CSV with code and description columns."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["code"], row["description"], int(row.get("priority") or 0)
+
+
+READERS = {
+    "icd10": ("ICD-10", read_icd10cm),
+    "rxnorm": ("RxNorm", read_rxnconso),
+    "snomed": ("SNOMED CT", read_snomed_descriptions),
+}
+
+
+_index: Optional[TerminologyIndex] = None
+_cache: Optional[LookupCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_terminology_index() -> TerminologyIndex:
+    """Shared terminology index for the coding tools."""
+    global _index
+    with _shared_lock:
+        if _index is None:
+            _index = TerminologyIndex()
+        return _index
+
+
+def get_lookup_cache() -> LookupCache:
+    """Shared lookup cache for the coding tools."""
+    global _cache
+    with _shared_lock:
+        if _cache is None:
+            _cache = LookupCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a code-set file into the local terminology index")
+    parser.add_argument("system", choices=sorted(READERS) + ["csv"], help="Format of the code-set file")
+    parser.add_argument("path", help="ICD-10-CM code file, RXNCONSO.RRF, SNOMED CT description snapshot or CSV")
+    parser.add_argument("--code-system", choices=CODE_SYSTEMS, help="Code system for csv files")
+    parser.add_argument("--db", default=TERMINOLOGY_DB, help="Index database path")
+    args = parser.parse_args()
+
+    if args.system == "csv":
+        if not args.code_system:
+            parser.error("--code-system is required for csv files")
+        code_system, reader = args.code_system, read_code_csv
+    else:
+        code_system, reader = READERS[args.system]
+
+    started = time.perf_counter()
+    index = TerminologyIndex(args.db)
+    count = index.load(code_system, reader(args.path))
+    index.close()
+    # Cached API answers predate the new code set
+    LookupCache().clear()
+    print(f"Loaded {count} {code_system} concepts into {args.db} in {time.perf_counter() - started:.1f}s")
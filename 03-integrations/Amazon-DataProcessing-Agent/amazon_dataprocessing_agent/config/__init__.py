@@ -19,6 +19,19 @@ from amazon_dataprocessing_agent.config.prompts import SYSTEM_PROMPT
 
 __all__ = [
     "SYSTEM_PROMPT",
-    "MAX_CONTEXT_MESSAGES",
+    "CONTEXT_TOKEN_BUDGET",
+    "TOOL_RESULT_EXCERPT_CHARS",
+    "STREAM_RENDERS_PER_SECOND",
+    "DATAPROCESSING_MCP_PACKAGE",
+    "DATAPROCESSING_MCP_VERSION",
+    "MCP_SERVER_IDLE_SECONDS",
+    "MODEL_MAX_ATTEMPTS",
+    "MODEL_RETRY_BASE_SECONDS",
+    "MODEL_RETRY_CAP_SECONDS",
+    "CIRCUIT_FAILURE_THRESHOLD",
+    "CIRCUIT_RESET_SECONDS",
+    "MODEL_REQUESTS_PER_SECOND",
+    "MODEL_REQUEST_BURST",
+    "S3TABLES_CATALOG_TTL_SECONDS",
     "PAGE_STYLE",
 ]
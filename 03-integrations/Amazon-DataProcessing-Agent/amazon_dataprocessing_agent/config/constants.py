@@ -14,8 +14,37 @@
 
 """Constants and configuration values for the DataProcessing Agent."""
 
-# Maximum number of messages to keep in context
-MAX_CONTEXT_MESSAGES = 10
+# Estimated token budget for the conversation history sent to the model
+CONTEXT_TOKEN_BUDGET = 40000
+
+# Older tool results longer than this are cut to an excerpt of this many characters
+TOOL_RESULT_EXCERPT_CHARS = 2000
+
+# DataProcessing MCP server launched with uvx; a pinned version starts from the
+# uv cache instead of resolving the package index on every launch
+DATAPROCESSING_MCP_PACKAGE = "awslabs.aws-dataprocessing-mcp-server"
+DATAPROCESSING_MCP_VERSION = "0.2.2"  # override with DATAPROCESSING_MCP_VERSION ("latest" to float)
+
+# Seconds an MCP server with no sessions is kept running before it is stopped
+MCP_SERVER_IDLE_SECONDS = 600
+
+# Bedrock model calls: attempts per call, with decorrelated-jitter backoff between them
+MODEL_MAX_ATTEMPTS = 4
+MODEL_RETRY_BASE_SECONDS = 1.0
+MODEL_RETRY_CAP_SECONDS = 20.0
+
+# Per-model limits shared by all sessions: consecutive failures that open the
+# circuit, seconds before a probe call is let through, and request rate
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+MODEL_REQUESTS_PER_SECOND = 1.0
+MODEL_REQUEST_BURST = 10
+
+# Seconds S3 Tables catalog listings and table details are served from cache
+S3TABLES_CATALOG_TTL_SECONDS = 300
+
+# Maximum number of times per second the streaming response is re-rendered
+STREAM_RENDERS_PER_SECOND = 8
 
 # Page styling CSS
 PAGE_STYLE = """
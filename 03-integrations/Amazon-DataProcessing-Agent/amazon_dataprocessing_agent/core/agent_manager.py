@@ -15,16 +15,13 @@
 """MCP Agent Manager for the DataProcessing Agent."""
 
 import logging
-import os
 import re
 import traceback
+import weakref
 from typing import Any, Dict
 
 import streamlit as st
-from mcp import StdioServerParameters, stdio_client
 from strands import Agent
-from strands.agent.conversation_manager import SlidingWindowConversationManager
-from strands.tools.mcp import MCPClient
 
 from amazon_dataprocessing_agent.tools.email_tools import \
     create_send_email_tools
@@ -34,7 +31,10 @@ from amazon_dataprocessing_agent.tools.s3_tables_tools import \
 from ..config.prompts import SYSTEM_PROMPT
 from .strands_bedrock_agent import StrandsBedrockAgent
 from .chat_history_manager import ChatHistoryManager
+from .mcp_server_pool import get_mcp_server_pool
+from .resilience import CONNECTION_ERRORS, THROTTLED, ModelUnavailableError
 from .streaming_handler import StreamingHandler
+from .token_budget import TokenBudgetConversationManager
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +47,7 @@ class MCPAgentManager:
         self.bedrock_agent = None
         self.mcp_client = None
         self.agent = None
+        self._mcp_release = None
 
     def initialize_agent(
         self,
@@ -59,33 +60,18 @@ class MCPAgentManager:
         """Initialize the agent with MCP tools and Bedrock model"""
         try:
 
-            # Set up MCP client for DataProcessing
-            self.mcp_client = MCPClient(
-                lambda: stdio_client(
-                    StdioServerParameters(
-                        command="uvx",
-                        args=[
-                            "awslabs.aws-dataprocessing-mcp-server@latest",
-                            "--allow-write",
-                        ],
-                        env={
-                            "FASTMCP_LOG_LEVEL": os.getenv(
-                                "FASTMCP_LOG_LEVEL", "ERROR"
-                            ),
-                            "AWS_PROFILE": os.getenv("AWS_PROFILE", "dp-mcp"),
-                            "AWS_REGION": region,
-                        },
-                    ),
-                )
-            )
-
-            # Initialize the MCP client
-            self.mcp_client.__enter__()
+            # Share the process-wide DataProcessing MCP server with other sessions,
+            # releasing the one this session held before
+            self._release_mcp_server()
+            pool = get_mcp_server_pool()
+            server = pool.acquire(region)
+            # Released when this manager (i.e. the session) is garbage collected
+            self._mcp_release = weakref.finalize(self, pool.release, server.key)
+            self.mcp_client = server.client
 
             # Get all tools
-            dataprocessing_tools = self.mcp_client.list_tools_sync()
             all_tools = (
-                dataprocessing_tools
+                server.tools
                 + create_send_email_tools()
                 + create_s3tables_tools()
             )
@@ -104,10 +90,8 @@ class MCPAgentManager:
                 system_prompt=SYSTEM_PROMPT,
                 tools=all_tools,
                 model=self.bedrock_agent.model,
-                conversation_manager=SlidingWindowConversationManager(
-                    window_size=10,  # Maximum number of messages to keep
-                    should_truncate_results=True,  # Enable truncating the tool result when a message is too large for the model's context window
-                ),
+                # Keep the history within a token budget, cutting old tool results first
+                conversation_manager=TokenBudgetConversationManager(),
             )
 
             return True
@@ -130,8 +114,9 @@ class MCPAgentManager:
             }
 
         try:
-            # Get context messages (last N messages)
-            context_messages = ChatHistoryManager.get_context_messages()
+            # Get context messages within the token budget; the latest one is this
+            # prompt, which the agent adds to its conversation itself
+            context_messages = ChatHistoryManager.get_context_messages()[:-1]
 
             # Setup streaming handler with container
             streaming_handler = StreamingHandler()
@@ -179,18 +164,7 @@ class MCPAgentManager:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
 
             # Provide user-friendly error messages
-            error_str = str(e).lower()
-            if (
-                "unable to connect to aws bedrock" in error_str
-                or "connection timeout" in error_str
-            ):
-                user_friendly_msg = "🔌 I'm having trouble connecting to the AI service. This is usually temporary - please try your request again in a moment."
-            elif "service temporarily unavailable" in error_str:
-                user_friendly_msg = "⏳ The AI service is temporarily busy. Please wait a moment and try again."
-            elif "throttling" in error_str:
-                user_friendly_msg = "🚦 The service is currently experiencing high demand. Please wait a moment before trying again."
-            else:
-                user_friendly_msg = f"❌ I encountered an unexpected error while processing your request. Please try again or contact support if the issue persists."
+            user_friendly_msg = self._user_friendly_error(e)
 
             return {
                 "content": user_friendly_msg,
@@ -206,8 +180,9 @@ class MCPAgentManager:
             }
 
         try:
-            # Get context messages (last N messages)
-            context_messages = ChatHistoryManager.get_context_messages()
+            # Get context messages within the token budget; the latest one is this
+            # prompt, which the agent adds to its conversation itself
+            context_messages = ChatHistoryManager.get_context_messages()[:-1]
 
             # Setup streaming handler
             streaming_handler = StreamingHandler()
@@ -260,18 +235,7 @@ class MCPAgentManager:
             )
 
             # Provide user-friendly error messages
-            error_str = str(e).lower()
-            if (
-                "unable to connect to aws bedrock" in error_str
-                or "connection timeout" in error_str
-            ):
-                user_friendly_msg = "🔌 I'm having trouble connecting to the AI service. This is usually temporary - please try your request again in a moment."
-            elif "service temporarily unavailable" in error_str:
-                user_friendly_msg = "⏳ The AI service is temporarily busy. Please wait a moment and try again."
-            elif "throttling" in error_str:
-                user_friendly_msg = "🚦 The service is currently experiencing high demand. Please wait a moment before trying again."
-            else:
-                user_friendly_msg = f"❌ I encountered an unexpected error while processing your request. Please try again or contact support if the issue persists."
+            user_friendly_msg = self._user_friendly_error(e)
 
             # Display the user-friendly error in the streaming placeholder if available
             streaming_handler = StreamingHandler()
@@ -289,6 +253,16 @@ class MCPAgentManager:
                 "thinking": f"Technical Error Details:\n{str(e)}\n\nFull Traceback:\n{traceback.format_exc()}",
             }
 
+    def _user_friendly_error(self, error: Exception) -> str:
+        """Message shown in the chat for an error raised while processing a message"""
+        if not isinstance(error, ModelUnavailableError):
+            return "❌ I encountered an unexpected error while processing your request. Please try again or contact support if the issue persists."
+        if error.kind == THROTTLED:
+            return "🚦 The service is currently experiencing high demand. Please wait a moment before trying again."
+        if isinstance(error.__cause__, CONNECTION_ERRORS):
+            return "🔌 I'm having trouble connecting to the AI service. This is usually temporary - please try your request again in a moment."
+        return "⏳ The AI service is temporarily busy. Please wait a moment and try again."
+
     def _extract_thinking(self, content: str) -> str:
         """Extract thinking steps from the response"""
         thinking_pattern = r"<thinking>(.*?)</thinking>"
@@ -464,8 +438,11 @@ class MCPAgentManager:
 
     def cleanup(self):
         """Clean up resources"""
-        if self.mcp_client:
-            try:
-                self.mcp_client.__exit__(None, None, None)
-            except Exception as e:
-                print(f"Error during MCP client cleanup: {str(e)}")
+        self._release_mcp_server()
+        self.mcp_client = None
+
+    def _release_mcp_server(self):
+        """Give this session's reference to the shared MCP server back to the pool"""
+        if self._mcp_release is not None:
+            self._mcp_release()
+            self._mcp_release = None
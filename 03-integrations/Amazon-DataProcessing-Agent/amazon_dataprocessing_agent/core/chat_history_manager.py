@@ -15,15 +15,21 @@
 """Chat history management for the DataProcessing Agent."""
 
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import streamlit as st
 
-from ..config.constants import MAX_CONTEXT_MESSAGES
+from ..config.constants import CONTEXT_TOKEN_BUDGET
+from .token_budget import estimate_tokens, is_turn_start
 
 
 class ChatHistoryManager:
-    """Manage chat history with context window limits"""
+    """Manage chat history with a token budget for the model context
+
+    Alongside st.session_state.chat_history, the model-formatted messages and
+    their token estimates are kept in st.session_state.context_cache and
+    extended as messages are added, so the context is not rebuilt every turn.
+    """
 
     @staticmethod
     def add_message(role: str, content: str, thinking: str = ""):
@@ -37,41 +43,79 @@ class ChatHistoryManager:
         if thinking:
             message["thinking"] = thinking
 
+        cache = ChatHistoryManager._get_cache()
         st.session_state.chat_history.append(message)
+        ChatHistoryManager._cache_message(cache, message)
 
     @staticmethod
     def get_context_messages() -> List[Dict[str, Any]]:
-        """Get the last N messages for context, formatted for the model"""
-        # Get the last MAX_CONTEXT_MESSAGES messages
-        recent_messages = st.session_state.chat_history[-MAX_CONTEXT_MESSAGES:]
-
-        # Format for the model (only user and assistant messages)
-        formatted_messages = []
-        for msg in recent_messages:
-            if msg["role"] in ["user", "assistant"]:
-                # Convert string content to list format for Bedrock
-                content = (
-                    [{"text": msg["content"]}]
-                    if isinstance(msg["content"], str)
-                    else msg["content"]
-                )
-                formatted_messages.append({"role": msg["role"], "content": content})
-
-        return formatted_messages
+        """Get the most recent messages that fit the token budget, formatted for the model"""
+        cache = ChatHistoryManager._get_cache()
+        start, _ = ChatHistoryManager._context_window(cache)
+        return cache["messages"][start:]
 
     @staticmethod
     def get_context_info() -> str:
         """Get information about current context window usage"""
+        cache = ChatHistoryManager._get_cache()
+        start, tokens = ChatHistoryManager._context_window(cache)
         total_messages = len(st.session_state.chat_history)
-        context_messages = min(total_messages, MAX_CONTEXT_MESSAGES)
+        context_messages = len(cache["messages"]) - start
 
-        if total_messages > MAX_CONTEXT_MESSAGES:
-            return f"📝 Using last {context_messages} of {total_messages} messages for context"
+        if context_messages < len(cache["messages"]):
+            return (
+                f"📝 Using last {context_messages} of {total_messages} messages for context "
+                f"(~{tokens:,} of {CONTEXT_TOKEN_BUDGET:,} tokens)"
+            )
         else:
-            return f"📝 Using all {total_messages} messages for context"
+            return f"📝 Using all {total_messages} messages for context (~{tokens:,} tokens)"
 
     @staticmethod
     def clear_history():
         """Clear chat history"""
         st.session_state.chat_history = []
         st.session_state.show_thinking = {}
+        st.session_state.context_cache = None
+
+    @staticmethod
+    def _get_cache() -> Dict[str, Any]:
+        """Formatted messages and token estimates, rebuilt only if the history was replaced"""
+        cache = st.session_state.get("context_cache")
+        history = st.session_state.chat_history
+        if cache is None or cache["history_length"] != len(history):
+            cache = {"history_length": 0, "messages": [], "tokens": []}
+            for message in history:
+                ChatHistoryManager._cache_message(cache, message)
+            st.session_state.context_cache = cache
+        return cache
+
+    @staticmethod
+    def _cache_message(cache: Dict[str, Any], message: Dict[str, Any]):
+        cache["history_length"] += 1
+        # Format for the model (only user and assistant messages)
+        if message["role"] not in ["user", "assistant"]:
+            return
+        # Convert string content to list format for Bedrock
+        content = (
+            [{"text": message["content"]}]
+            if isinstance(message["content"], str)
+            else message["content"]
+        )
+        formatted = {"role": message["role"], "content": content}
+        cache["messages"].append(formatted)
+        cache["tokens"].append(estimate_tokens(formatted))
+
+    @staticmethod
+    def _context_window(cache: Dict[str, Any]) -> Tuple[int, int]:
+        """Index of the first message within the token budget, and the tokens used"""
+        messages, tokens = cache["messages"], cache["tokens"]
+        start, used = len(messages), 0
+        # Walk back from the newest message; the newest is always included
+        while start > 0 and (start == len(messages) or used + tokens[start - 1] <= CONTEXT_TOKEN_BUDGET):
+            start -= 1
+            used += tokens[start]
+        # The model expects the history to start with a user message
+        while start < len(messages) - 1 and not is_turn_start(messages[start]):
+            used -= tokens[start]
+            start += 1
+        return start, used
@@ -0,0 +1,220 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide pool of DataProcessing MCP servers shared by all Streamlit sessions."""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+from mcp import StdioServerParameters, stdio_client
+from strands.tools.mcp import MCPClient
+
+from ..config.constants import (DATAPROCESSING_MCP_PACKAGE,
+                                DATAPROCESSING_MCP_VERSION,
+                                MCP_SERVER_IDLE_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# (package spec, region, profile)
+ServerKey = Tuple[str, str, str]
+
+
+def server_spec() -> str:
+    """uvx package spec of the MCP server, pinned unless the version is "latest"."""
+    version = os.getenv("DATAPROCESSING_MCP_VERSION", DATAPROCESSING_MCP_VERSION)
+    if version == "latest":
+        return f"{DATAPROCESSING_MCP_PACKAGE}@latest"
+    return f"{DATAPROCESSING_MCP_PACKAGE}=={version}"
+
+
+def create_dataprocessing_mcp_client(spec: str, region: str, profile: str) -> MCPClient:
+    """MCP client that launches the DataProcessing MCP server over stdio"""
+    return MCPClient(
+        lambda: stdio_client(
+            StdioServerParameters(
+                command="uvx",
+                args=[spec, "--allow-write"],
+                env={
+                    "FASTMCP_LOG_LEVEL": os.getenv("FASTMCP_LOG_LEVEL", "ERROR"),
+                    "AWS_PROFILE": profile,
+                    "AWS_REGION": region,
+                },
+            ),
+        )
+    )
+
+
+class PooledServer:
+    """A running MCP server with its tools and the number of sessions using it"""
+
+    def __init__(self, key: ServerKey, client: MCPClient, tools: List[Any], startup_seconds: float):
+        self.key = key
+        self.client = client
+        self.tools = tools
+        self.startup_seconds = startup_seconds
+        self.refcount = 0
+        self.idle_timer: Optional[threading.Timer] = None
+
+    def is_running(self) -> bool:
+        thread = getattr(self.client, "_background_thread", None)
+        return thread is not None and thread.is_alive()
+
+
+class MCPServerPool:
+    """Share one MCP server per package version, region and profile across sessions
+
+    The MCP client runs its session on a background event loop, so tool calls
+    from any number of agents and sessions are multiplexed over one server
+    process. Sessions acquire a server and release it when they are done; a
+    server nobody holds is stopped after ``idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str, str, str], MCPClient] = create_dataprocessing_mcp_client,
+        idle_seconds: float = MCP_SERVER_IDLE_SECONDS,
+    ):
+        self.client_factory = client_factory
+        self.idle_seconds = idle_seconds
+        self._servers: Dict[ServerKey, PooledServer] = {}
+        self._start_locks: Dict[ServerKey, threading.Lock] = defaultdict(threading.Lock)
+        self._warming = set()
+        self._lock = threading.Lock()
+
+    def key(self, region: str) -> ServerKey:
+        return (server_spec(), region, os.getenv("AWS_PROFILE", "dp-mcp"))
+
+    def acquire(self, region: str) -> PooledServer:
+        """Get a running server for the region, starting it if needed; pair with release()"""
+        key = self.key(region)
+        with self._lock:
+            start_lock = self._start_locks[key]
+
+        # Concurrent sessions wait for one start instead of each launching a server
+        with start_lock:
+            # Look up and take the reference together, so an idle stop cannot slip in between
+            with self._lock:
+                server = self._servers.get(key)
+                if server is not None and server.is_running():
+                    server.refcount += 1
+                    if server.idle_timer is not None:
+                        server.idle_timer.cancel()
+                        server.idle_timer = None
+                    return server
+            return self._start(key)
+
+    def release(self, key: ServerKey):
+        """Drop one reference; the server stops once it has been idle for idle_seconds"""
+        with self._lock:
+            server = self._servers.get(key)
+            if server is None:
+                return
+            server.refcount = max(server.refcount - 1, 0)
+            if server.refcount == 0 and server.idle_timer is None:
+                server.idle_timer = threading.Timer(self.idle_seconds, self._stop_if_idle, args=(server,))
+                server.idle_timer.daemon = True
+                server.idle_timer.start()
+
+    def prewarm(self, region: str):
+        """Start the region's server in the background so the first session finds it running"""
+        key = self.key(region)
+        with self._lock:
+            if key in self._servers or key in self._warming:
+                return
+            self._warming.add(key)
+
+        def warm():
+            try:
+                self.release(self.acquire(region).key)
+            except Exception as e:
+                logger.warning(f"Could not pre-warm MCP server for {region}: {e}")
+            finally:
+                with self._lock:
+                    self._warming.discard(key)
+
+        threading.Thread(target=warm, name="mcp-prewarm", daemon=True).start()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Running servers with their reference counts and startup times"""
+        with self._lock:
+            return [
+                {
+                    "spec": key[0],
+                    "region": key[1],
+                    "sessions": server.refcount,
+                    "startup_seconds": round(server.startup_seconds, 2),
+                }
+                for key, server in self._servers.items()
+            ]
+
+    def close_all(self):
+        """Stop every server, e.g. at process exit"""
+        with self._lock:
+            servers = list(self._servers.values())
+            self._servers.clear()
+        for server in servers:
+            if server.idle_timer is not None:
+                server.idle_timer.cancel()
+            self._stop(server)
+
+    def _start(self, key: ServerKey) -> PooledServer:
+        spec, region, profile = key
+        started = time.perf_counter()
+        client = self.client_factory(spec, region, profile)
+        client.__enter__()
+        try:
+            tools = client.list_tools_sync()
+        except Exception:
+            self._stop(PooledServer(key, client, [], 0.0))
+            raise
+        server = PooledServer(key, client, tools, time.perf_counter() - started)
+        logger.info(f"Started MCP server {spec} for {region} in {server.startup_seconds:.1f}s")
+
+        with self._lock:
+            previous = self._servers.get(key)
+            # A server that died keeps its sessions on the replacement, plus the caller's reference
+            server.refcount = (previous.refcount if previous is not None else 0) + 1
+            self._servers[key] = server
+        return server
+
+    def _stop_if_idle(self, server: PooledServer):
+        with self._lock:
+            if server.refcount > 0 or self._servers.get(server.key) is not server:
+                return
+            del self._servers[server.key]
+        logger.info(f"Stopping idle MCP server {server.key[0]} for {server.key[1]}")
+        self._stop(server)
+
+    @staticmethod
+    def _stop(server: PooledServer):
+        if not server.is_running():
+            return
+        try:
+            server.client.__exit__(None, None, None)
+        except Exception as e:
+            print(f"Error during MCP client cleanup: {str(e)}")
+
+
+@st.cache_resource
+def get_mcp_server_pool() -> MCPServerPool:
+    """Shared pool for the whole Streamlit process"""
+    pool = MCPServerPool()
+    atexit.register(pool.close_all)
+    return pool
@@ -0,0 +1,307 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retries, circuit breaking and rate limiting for Bedrock model calls."""
+
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from botocore.config import Config
+from botocore.exceptions import (ClientError, ConnectionError,
+                                 ReadTimeoutError)
+from strands.models import BedrockModel
+from strands.types.exceptions import ModelThrottledException
+from urllib3.exceptions import ProtocolError
+from urllib3.exceptions import ReadTimeoutError as Urllib3ReadTimeoutError
+
+from ..config.constants import (CIRCUIT_FAILURE_THRESHOLD,
+                                CIRCUIT_RESET_SECONDS, MODEL_MAX_ATTEMPTS,
+                                MODEL_REQUEST_BURST, MODEL_REQUESTS_PER_SECOND,
+                                MODEL_RETRY_BASE_SECONDS,
+                                MODEL_RETRY_CAP_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# Error classes
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+# Error codes are compared lower-cased: errors raised while reading a response
+# stream (EventStreamError) use camelCase codes such as "throttlingException"
+THROTTLED_ERROR_CODES = {
+    "throttlingexception",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+}
+TRANSIENT_ERROR_CODES = {
+    "internalserverexception",
+    "modelnotreadyexception",
+    "modelstreamerrorexception",
+    "modeltimeoutexception",
+    "serviceunavailableexception",
+}
+CONNECTION_ERRORS = (ConnectionError, ReadTimeoutError, Urllib3ReadTimeoutError, ProtocolError)
+
+
+class ModelUnavailableError(Exception):
+    """A model call failed with a retryable error and was not retried further"""
+
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class CircuitOpenError(ModelUnavailableError):
+    """Calls to the model are failing fast until the circuit closes again"""
+
+    def __init__(self, message: str):
+        super().__init__(message, TRANSIENT)
+
+
+def classify(error: BaseException) -> str:
+    """THROTTLED, TRANSIENT or FATAL, from the exception type and AWS error code"""
+    if isinstance(error, ModelThrottledException):
+        return THROTTLED
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "").lower()
+        if code in THROTTLED_ERROR_CODES:
+            return THROTTLED
+        if code in TRANSIENT_ERROR_CODES:
+            return TRANSIENT
+        return FATAL
+    if isinstance(error, CONNECTION_ERRORS):
+        return TRANSIENT
+    # Exceptions raised by strands keep the AWS error as their cause
+    if error.__cause__ is not None and error.__cause__ is not error:
+        return classify(error.__cause__)
+    return FATAL
+
+
+def decorrelated_jitter(
+    base: float = MODEL_RETRY_BASE_SECONDS,
+    cap: float = MODEL_RETRY_CAP_SECONDS,
+    rng: random.Random = random,
+) -> Iterator[float]:
+    """Endless backoff delays, each drawn between base and three times the previous one"""
+    delay = base
+    while True:
+        delay = min(cap, rng.uniform(base, delay * 3))
+        yield delay
+
+
+class CircuitBreaker:
+    """Fail fast after consecutive failures, letting one probe call through after a pause
+
+    closed: calls pass, consecutive failures are counted
+    open: calls fail fast until reset_seconds have passed since the last failure
+    half-open: one probe call passes; success closes the circuit, failure opens it
+    again, and another probe is let through if it reports neither in reset_seconds
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.clock() - self.opened_at >= self.reset_seconds:
+                self.state = "half-open"
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(self.reset_seconds - (self.clock() - self.opened_at), 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Opening circuit after {self.failures} consecutive failures")
+                self.state = "open"
+                self.opened_at = self.clock()
+
+
+class TokenBucket:
+    """Allow bursts of up to capacity requests, refilled at rate per second"""
+
+    def __init__(
+        self,
+        rate: float = MODEL_REQUESTS_PER_SECOND,
+        capacity: int = MODEL_REQUEST_BURST,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: later callers queue behind earlier reservations
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class ModelGuard:
+    """Retry policy, circuit breaker and rate limiter for one model"""
+
+    def __init__(
+        self,
+        max_attempts: int = MODEL_MAX_ATTEMPTS,
+        breaker: Optional[CircuitBreaker] = None,
+        bucket: Optional[TokenBucket] = None,
+        delays: Callable[[], Iterator[float]] = decorrelated_jitter,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker()
+        self.bucket = bucket or TokenBucket()
+        self.delays = delays
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def admit(self):
+        """Wait for the rate limiter, or raise CircuitOpenError while the circuit is open"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(
+                "Service temporarily unavailable: Bedrock calls are paused after repeated failures, "
+                f"retrying in {self.breaker.retry_after():.0f} seconds."
+            )
+        self.bucket.acquire()
+        self.calls += 1
+
+    def stream(
+        self,
+        open_stream: Callable[[], Iterable[Any]],
+        on_retry: Optional[Callable[[BaseException, int, float], None]] = None,
+    ) -> Iterator[Any]:
+        """Yield the events of open_stream(), retrying it on retryable errors
+
+        A stream is only retried while none of its events have been yielded;
+        an error after that ends the call, as the events already consumed
+        cannot be taken back.
+
+        The backoff between attempts sleeps on the calling thread. In the
+        Streamlit app that is the script thread running the agent turn, so the
+        page cannot take new input until the retry starts or gives up; on_retry
+        is called before each wait so the user sees why.
+        """
+        delays = self.delays()
+        for attempt in range(1, self.max_attempts + 1):
+            self.admit()
+            started = False
+            try:
+                for event in open_stream():
+                    started = True
+                    yield event
+            except Exception as e:
+                kind = classify(e)
+                if kind == FATAL:
+                    # The model answered, so it is not the model that is failing
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if started:
+                    raise ModelUnavailableError(
+                        f"Service temporarily unavailable: the response stream was interrupted ({e})", kind
+                    ) from e
+                if attempt == self.max_attempts:
+                    raise ModelUnavailableError(_exhausted_message(kind, attempt, e), kind) from e
+
+                delay = next(delays)
+                self.retries += 1
+                logger.warning(f"{kind.capitalize()} error on attempt {attempt}, retrying in {delay:.1f}s: {e}")
+                if on_retry:
+                    on_retry(e, attempt, delay)
+                self.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return
+
+
+def _exhausted_message(kind: str, attempts: int, error: BaseException) -> str:
+    if kind == THROTTLED:
+        return f"Bedrock is throttling requests; still throttling after {attempts} attempts ({error})"
+    if isinstance(error, CONNECTION_ERRORS):
+        return f"Unable to connect to AWS Bedrock service after {attempts} attempts ({error})"
+    return f"Service temporarily unavailable after {attempts} attempts ({error})"
+
+
+@functools.lru_cache(maxsize=None)
+def get_model_guard(model_id: str, region: str) -> ModelGuard:
+    """Guard shared by all sessions calling the model in the region"""
+    return ModelGuard()
+
+
+class ResilientBedrockModel(BedrockModel):
+    """BedrockModel whose calls go through the model's shared ModelGuard
+
+    Only the model request is retried, so tools the agent has already run in
+    the turn are not run again. Retries that run out raise
+    ModelUnavailableError rather than ModelThrottledException, which the
+    strands event loop would otherwise retry on top.
+    """
+
+    def __init__(self, guard: Optional[ModelGuard] = None, **model_config):
+        # Retries happen here, not also inside botocore
+        model_config.setdefault("boto_client_config", Config(retries={"mode": "standard", "total_max_attempts": 1}))
+        super().__init__(**model_config)
+        self.guard = guard or get_model_guard(self.config["model_id"], self.client.meta.region_name)
+        self.on_retry: Optional[Callable[[BaseException, int, float], None]] = None
+
+    def stream(self, request: Any) -> Iterable[Any]:
+        return self.guard.stream(lambda: super(ResilientBedrockModel, self).stream(request), self.on_retry)
@@ -26,6 +26,9 @@ class SessionState:
         if "chat_history" not in st.session_state:
             st.session_state.chat_history = []
 
+        if "context_cache" not in st.session_state:
+            st.session_state.context_cache = None
+
         if "agent" not in st.session_state:
             st.session_state.agent = None
 
@@ -14,15 +14,11 @@
 
 """Bedrock agent for handling interactions with Amazon Bedrock models."""
 
+import asyncio
 import logging
-import time
 from typing import Any, Callable, Dict, List, Optional
 
-import streamlit as st
-from botocore.exceptions import (ConnectTimeoutError, EndpointConnectionError,
-                                 ReadTimeoutError)
-from strands.models import BedrockModel
-from urllib3.exceptions import ReadTimeoutError as Urllib3ReadTimeoutError
+from .resilience import ResilientBedrockModel
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -31,9 +27,6 @@ logger = logging.getLogger(__name__)
 class StrandsBedrockAgent:
     """Class to handle interactions with Amazon Bedrock models"""
 
-    MAX_RETRIES = 3
-    INITIAL_RETRY_DELAY = 2  # seconds
-
     def __init__(
         self,
         model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
@@ -48,7 +41,9 @@ class StrandsBedrockAgent:
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.streaming = streaming
-        self.model = BedrockModel(
+        # Model calls are retried, rate limited and circuit broken per model,
+        # shared with the other sessions using it
+        self.model = ResilientBedrockModel(
             model_id=model_id,
             region_name=region,
             max_tokens=max_tokens,
@@ -70,89 +65,52 @@ class StrandsBedrockAgent:
         prompt: str,
         messages: Optional[List[Dict[str, Any]]] = None,
         stream_callback: Optional[Callable] = None,
-        max_retries: int = MAX_RETRIES,
-        initial_delay: int = INITIAL_RETRY_DELAY,
     ) -> Any:
-        """Call the agent with retry logic for handling transient errors"""
-        retry_delay = initial_delay
-        last_exception = None
-
-        for attempt in range(max_retries):
-            try:
-                if self.streaming and stream_callback:
-                    if messages:
-                        return agent(
-                            prompt,
-                            messages=messages,
-                            stream=True,
-                            callback_handler=stream_callback,
-                        )
-                    else:
-                        return agent(
-                            prompt, stream=True, callback_handler=stream_callback
-                        )
-                else:
-                    if messages:
-                        return agent(prompt, messages=messages)
-                    else:
-                        return agent(prompt)
-
-            except (
-                ReadTimeoutError,
-                ConnectTimeoutError,
-                EndpointConnectionError,
-                Urllib3ReadTimeoutError,
-            ) as e:
-                # Handle specific AWS connection timeout errors
-                last_exception = e
-                logger.warning(
-                    f"AWS connection timeout on attempt {attempt + 1}: {str(e)}"
-                )
-
-                if attempt < max_retries - 1:
-                    st.warning(
-                        f"🔄 Connection timeout, retrying in {retry_delay} seconds (attempt {attempt+1}/{max_retries})..."
-                    )
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    # Final attempt failed, show user-friendly error
-                    error_msg = "Unable to connect to AWS Bedrock service after multiple attempts. Please check your internet connection and try again."
-                    logger.error(f"All retry attempts failed: {str(e)}")
-                    raise Exception(error_msg) from e
-
-            except Exception as e:
-                last_exception = e
-                error_str = str(e).lower()
-
-                # Check if it's a retryable error
-                if (
-                    "modelstreamerrorexception" in error_str
-                    or "throttling" in error_str
-                    or "timeout" in error_str
-                    or "unexpected error" in error_str
-                    or "read timed out" in error_str
-                    or "connection pool" in error_str
-                    or "awshttpsconnectionpool" in error_str
-                ):
-                    logger.warning(
-                        f"Retryable error on attempt {attempt + 1}: {str(e)}"
-                    )
-
-                    if attempt < max_retries - 1:
-                        st.warning(
-                            f"🔄 Temporary service issue, retrying in {retry_delay} seconds (attempt {attempt+1}/{max_retries})..."
-                        )
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                        continue
-                    else:
-                        # Final attempt failed, show user-friendly error
-                        error_msg = "Service temporarily unavailable after multiple attempts. Please try again in a few moments."
-                        logger.error(f"All retry attempts failed: {str(e)}")
-                        raise Exception(error_msg) from e
-
-                # Non-retryable error, log and re-raise immediately
-                logger.error(f"Non-retryable error: {str(e)}")
-                raise last_exception
+        """Call the agent, retrying its individual model calls on transient errors
+
+        Retries happen inside the model (see ResilientBedrockModel), so a failed
+        model call does not repeat tools already run in the turn. Errors that
+        outlast the retries raise ModelUnavailableError.
+
+        messages is the conversation history before the prompt; the agent
+        appends the prompt and its response to it.
+        """
+        if messages is not None:
+            # The history is held by the agent so that its conversation manager
+            # keeps it within budget
+            agent.messages = list(messages)
+
+        if stream_callback:
+            # Let the streaming display show retries instead of going quiet
+            self.model.on_retry = lambda e, attempt, delay: stream_callback(
+                model_retry={
+                    "attempt": attempt,
+                    "max_attempts": self.model.guard.max_attempts,
+                    "delay": delay,
+                    "error": str(e),
+                }
+            )
+        try:
+            if self.streaming and stream_callback:
+                return agent(prompt, stream=True, callback_handler=stream_callback)
+            else:
+                return agent(prompt)
+        finally:
+            self.model.on_retry = None
+
+    async def call_agent_async(
+        self,
+        agent: Callable,
+        prompt: str,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        stream_callback: Optional[Callable] = None,
+    ) -> Any:
+        """call_agent_with_retry for asyncio callers
+
+        The agent runs on a worker thread, so retry backoff and rate limiting
+        wait there without blocking the event loop. stream_callback is called
+        from that thread.
+        """
+        return await asyncio.to_thread(
+            self.call_agent_with_retry, agent, prompt, messages, stream_callback
+        )
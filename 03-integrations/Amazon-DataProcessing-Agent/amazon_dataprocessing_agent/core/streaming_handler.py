@@ -16,19 +16,42 @@
 
 import re
 import time
+from typing import List
 
 import streamlit as st
 
+from ..config.constants import STREAM_RENDERS_PER_SECOND
+
+# Markdown headers (# to ######) are shown as bold text to prevent UI formatting issues
+HEADER_PATTERN = re.compile(r"^#{1,6}\s+(.+)$")
+
 
 class StreamingHandler:
-    """Handle streaming responses from the LLM using Strands callback handlers"""
+    """Handle streaming responses from the LLM using Strands callback handlers
 
-    def __init__(self):
-        self.content = ""
+    Text chunks are sanitized line by line as they arrive, so each chunk only
+    costs the work for its own text. The message is re-rendered at most
+    ``renders_per_second`` times per second, and always once more at the end
+    of each event loop cycle and in finalize().
+    """
+
+    def __init__(self, renders_per_second: float = STREAM_RENDERS_PER_SECOND):
         self.message_placeholder = None
         self.tool_placeholder = None
         self.current_tool = None
         self.tool_count = 0
+        self.render_count = 0
+        self._render_interval = 1.0 / renders_per_second if renders_per_second else 0.0
+        self._chunks: List[str] = []
+        self._sanitized_lines: List[str] = []
+        self._partial_line = ""
+        self._last_render = 0.0
+        self._dirty = False
+
+    @property
+    def content(self) -> str:
+        """Raw response text streamed so far"""
+        return "".join(self._chunks)
 
     def setup_placeholders(self):
         """Setup placeholders for streaming content using Streamlit chat"""
@@ -42,15 +65,8 @@ class StreamingHandler:
         try:
             # Handle text generation events
             if "data" in kwargs:
-                text_chunk = kwargs["data"]
-                self.content += text_chunk
-                # print(f"DEBUG: Text chunk: '{text_chunk}'")
-
-                # Update UI with streaming content
-                if self.message_placeholder:
-                    self.message_placeholder.markdown(
-                        self._sanitize_markdown(self.content) + "\n"
-                    )
+                self._append(kwargs["data"])
+                self._render()
 
             # Handle tool usage events
             if "current_tool_use" in kwargs and kwargs["current_tool_use"].get("name"):
@@ -60,20 +76,31 @@ class StreamingHandler:
                     self.tool_count += 1
                     print(f"DEBUG: Tool started: {tool_name}")
 
+                    # Show the text so far before the tool runs
+                    self._render(force=True)
                     if self.tool_placeholder:
                         self.tool_placeholder.info(
                             f"🔧 **Tool #{self.tool_count}:** {tool_name} - Running..."
                         )
 
+            # Handle model call retries
+            if "model_retry" in kwargs:
+                retry = kwargs["model_retry"]
+                if self.tool_placeholder:
+                    self.tool_placeholder.warning(
+                        f"🔄 Temporary service issue, retrying in {retry['delay']:.0f} seconds "
+                        f"(attempt {retry['attempt']}/{retry['max_attempts']})..."
+                    )
+
             # Handle completion events
             if kwargs.get("complete", False):
                 print("DEBUG: Stream completed")
+                self._render(force=True)
+                # The status stays until the next tool starts or finalize() clears it
                 if self.tool_placeholder and self.current_tool:
                     self.tool_placeholder.success(
                         f"✅ **Tool #{self.tool_count}:** {self.current_tool} - Completed!"
                     )
-                    time.sleep(0.5)
-                    self.tool_placeholder.empty()
                 self.current_tool = None
 
             # Handle lifecycle events for debugging
@@ -102,47 +129,50 @@ class StreamingHandler:
         """Finalize streaming and return content"""
         if self.message_placeholder:
             # Remove the typing indicator and show final content
-            self.message_placeholder.markdown(self._sanitize_markdown(self.content))
+            self.message_placeholder.markdown(self._sanitized_content())
+            self.render_count += 1
         if self.tool_placeholder:
             self.tool_placeholder.empty()
+        self._dirty = False
         return self.content
 
     def reset(self):
         """Reset streaming state"""
-        self.content = ""
+        self._chunks = []
+        self._sanitized_lines = []
+        self._partial_line = ""
+        self._dirty = False
         self.current_tool = None
         self.tool_count = 0
 
-    def _sanitize_markdown(self, text: str) -> str:
-        """Sanitize markdown headers and other problematic formatting"""
-        if not text:
-            return text
-
-        # Convert markdown headers to bold text to prevent UI formatting issues
+    def _append(self, text_chunk: str):
+        """Add a chunk, sanitizing only the lines it completes"""
+        self._chunks.append(text_chunk)
+        self._dirty = True
+        if "\n" not in text_chunk:
+            self._partial_line += text_chunk
+            return
+
+        lines = (self._partial_line + text_chunk).split("\n")
+        self._partial_line = lines.pop()
+        self._sanitized_lines.extend(self._sanitize_line(line) + "\n" for line in lines)
+
+    def _render(self, force: bool = False):
+        """Repaint the message if it changed and the throttle interval has passed"""
+        if not self.message_placeholder or not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_render < self._render_interval:
+            return
+        self.message_placeholder.markdown(self._sanitized_content() + "\n")
+        self._last_render = now
+        self._dirty = False
+        self.render_count += 1
+
+    def _sanitized_content(self) -> str:
+        return "".join(self._sanitized_lines) + self._sanitize_line(self._partial_line)
+
+    @staticmethod
+    def _sanitize_line(line: str) -> str:
         # ## Header -> **Header**
-        text = re.sub(r"^##\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # ### Header -> **Header**
-        text = re.sub(r"^###\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # #### Header -> **Header**
-        text = re.sub(r"^####\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # ##### Header -> **Header**
-        text = re.sub(r"^#####\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # ###### Header -> **Header**
-        text = re.sub(r"^######\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # # Header -> **Header** (main headers)
-        text = re.sub(r"^#\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
-
-        # Also handle headers that might be in the middle of lines
-        text = re.sub(r"\n##\s+(.+)", r"\n**\1**", text)
-        text = re.sub(r"\n###\s+(.+)", r"\n**\1**", text)
-        text = re.sub(r"\n####\s+(.+)", r"\n**\1**", text)
-        text = re.sub(r"\n#####\s+(.+)", r"\n**\1**", text)
-        text = re.sub(r"\n######\s+(.+)", r"\n**\1**", text)
-        text = re.sub(r"\n#\s+(.+)", r"\n**\1**", text)
-
-        return text
+        return HEADER_PATTERN.sub(r"**\1**", line)
@@ -0,0 +1,159 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Token-budget conversation management for the DataProcessing Agent."""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+from ..config.constants import CONTEXT_TOKEN_BUDGET, TOOL_RESULT_EXCERPT_CHARS
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+MEDIA_BLOCK_TOKENS = 1600  # rough cost of an image or document block
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """Rough token count of a Bedrock message (about four characters per token)"""
+    chars = 0
+    for block in message.get("content", []):
+        if not isinstance(block, dict):
+            chars += len(str(block))
+        elif "text" in block:
+            chars += len(block["text"])
+        elif "toolUse" in block:
+            tool_use = block["toolUse"]
+            chars += len(tool_use.get("name", "")) + len(json.dumps(tool_use.get("input", {}), default=str))
+        elif "toolResult" in block:
+            chars += sum(len(_result_text(item)) for item in block["toolResult"].get("content", []))
+        elif "image" in block or "document" in block:
+            chars += MEDIA_BLOCK_TOKENS * CHARS_PER_TOKEN
+        else:
+            chars += len(json.dumps(block, default=str))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def excerpt_tool_results(message: Dict[str, Any], max_chars: int) -> bool:
+    """Cut the tool results of a message to excerpts of max_chars; returns True if any changed"""
+    changed = False
+    for block in message.get("content", []):
+        if not isinstance(block, dict) or "toolResult" not in block:
+            continue
+        content = block["toolResult"].get("content", [])
+        text = "\n".join(_result_text(item) for item in content)
+        if len(text) <= max_chars:
+            continue
+        head = max_chars * 3 // 4
+        tail = max_chars - head
+        block["toolResult"]["content"] = [{
+            "text": f"{text[:head]}\n... [{len(text) - max_chars} characters of this tool result "
+                    f"were removed to fit the context budget] ...\n{text[-tail:]}"
+        }]
+        changed = True
+    return changed
+
+
+def is_turn_start(message: Dict[str, Any]) -> bool:
+    """A user message that is not a tool result, where a history may start"""
+    return message.get("role") == "user" and not any(
+        isinstance(block, dict) and "toolResult" in block for block in message.get("content", [])
+    )
+
+
+def _result_text(item: Dict[str, Any]) -> str:
+    if "text" in item:
+        return item["text"]
+    if "json" in item:
+        return json.dumps(item["json"], default=str)
+    return json.dumps(item, default=str)
+
+
+class TokenBudgetConversationManager(SlidingWindowConversationManager):
+    """Keep the agent's conversation within an estimated token budget
+
+    After every agent call the history is fitted to the budget: tool results
+    in older messages are cut to excerpts first, then the oldest turns are
+    dropped. The token estimate of each message is cached, so only new or
+    changed messages are measured. On a context window overflow the latest
+    tool results are cut as well and the history is fitted to a smaller budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        tool_result_chars: int = TOOL_RESULT_EXCERPT_CHARS,
+    ):
+        super().__init__(should_truncate_results=True)
+        self.token_budget = token_budget
+        self.tool_result_chars = tool_result_chars
+        # id(message) -> (message, tokens); the message is kept to detect reused ids
+        self._estimates: Dict[int, Tuple[Dict[str, Any], int]] = {}
+
+    def apply_management(self, agent) -> None:
+        messages = agent.messages
+        self._remove_dangling_messages(messages)
+        self.fit(messages, self.token_budget)
+
+    def reduce_context(self, agent, e: Optional[Exception] = None) -> None:
+        messages = agent.messages
+        total = self.total_tokens(messages)
+        if not self.fit(messages, min(self.token_budget, total * 3 // 4), include_latest=True):
+            raise ContextWindowOverflowException("Unable to trim conversation context!") from e
+
+    def total_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        if len(self._estimates) > 2 * len(messages) + 64:
+            live = {id(message) for message in messages}
+            self._estimates = {key: value for key, value in self._estimates.items() if key in live}
+        return sum(self.tokens(message) for message in messages)
+
+    def tokens(self, message: Dict[str, Any], refresh: bool = False) -> int:
+        entry = self._estimates.get(id(message))
+        if refresh or entry is None or entry[0] is not message:
+            entry = self._estimates[id(message)] = (message, estimate_tokens(message))
+        return entry[1]
+
+    def fit(self, messages: List[Dict[str, Any]], budget: int, include_latest: bool = False) -> bool:
+        """Shrink messages in place to fit the budget; returns True if anything changed"""
+        total = self.total_tokens(messages)
+        if total <= budget:
+            return False
+
+        changed = False
+        # Cut tool results, oldest first; the latest one is usually still being worked on
+        last = len(messages) if include_latest else len(messages) - 1
+        for message in messages[:last]:
+            if total <= budget:
+                break
+            before = self.tokens(message)
+            if excerpt_tool_results(message, self.tool_result_chars):
+                total += self.tokens(message, refresh=True) - before
+                changed = True
+
+        # Drop the oldest turns, always starting the history at a user message
+        while total > budget:
+            start = next((i for i in range(1, len(messages)) if is_turn_start(messages[i])), None)
+            if start is None:
+                break
+            total -= sum(self.tokens(message) for message in messages[:start])
+            del messages[:start]
+            changed = True
+
+        logger.debug("messages=<%s>, tokens=<%s>, budget=<%s> | fitted context", len(messages), total, budget)
+        return changed
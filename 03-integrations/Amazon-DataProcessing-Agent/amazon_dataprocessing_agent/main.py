@@ -15,11 +15,14 @@
 """Main application entry point for the DataProcessing Agent."""
 
 import atexit
+import os
 
 import streamlit as st
 from dotenv import load_dotenv
 
 from amazon_dataprocessing_agent.core.agent_manager import MCPAgentManager
+from amazon_dataprocessing_agent.core.mcp_server_pool import \
+    get_mcp_server_pool
 from amazon_dataprocessing_agent.core.session_state import SessionState
 from amazon_dataprocessing_agent.ui.components import UIComponents
 
@@ -29,14 +32,8 @@ load_dotenv()
 
 def cleanup():
     """Clean up resources when the app is closed"""
-    if (
-        "dataprocessing_mcp_client" in st.session_state
-        and st.session_state.dataprocessing_mcp_client
-    ):
-        try:
-            st.session_state.dataprocessing_mcp_client.__exit__(None, None, None)
-        except Exception as e:
-            print(f"Error during MCP client cleanup: {str(e)}")
+    # MCP servers are shared by all sessions, so they are stopped with the pool
+    get_mcp_server_pool().close_all()
 
 
 def main():
@@ -47,6 +44,9 @@ def main():
     # Initialize session state
     SessionState.initialize()
 
+    # Start the shared MCP server in the background on the first page load
+    get_mcp_server_pool().prewarm(os.getenv("AWS_REGION", "us-east-1"))
+
     # Create or retrieve agent manager from session state
     if (
         "agent_manager" not in st.session_state
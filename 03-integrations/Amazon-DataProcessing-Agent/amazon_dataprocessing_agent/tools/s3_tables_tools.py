@@ -14,16 +14,259 @@
 
 """S3 Tables tools for the DataProcessing Agent."""
 
-from typing import Any, Dict, List, Optional
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import boto3
 from botocore.exceptions import ClientError
 from strands import tool
 
+from ..config.constants import S3TABLES_CATALOG_TTL_SECONDS
+
+
+def _namespace_name(namespace: Any) -> str:
+    """Namespaces are returned as single-element lists"""
+    if isinstance(namespace, list):
+        return namespace[0] if namespace else ""
+    return namespace
+
+
+class S3TablesCatalog:
+    """Cached view of S3 Tables buckets, namespaces and tables
+
+    Listings are read across all pages and, like table details (metadata
+    location and version token), served from memory for ``ttl_seconds``.
+    Changes made through the catalog invalidate the entries they affect, so
+    the agent sees its own writes immediately; changes made elsewhere show up
+    once the entries expire, or straight away with ``refresh=True``.
+    """
+
+    def __init__(self, client=None, ttl_seconds: float = S3TABLES_CATALOG_TTL_SECONDS):
+        self.client = client or boto3.client("s3tables", region_name=os.getenv("AWS_REGION", "us-east-1"))
+        self.ttl_seconds = ttl_seconds
+        self.api_calls = 0
+        # ("buckets", prefix), ("namespaces", bucket ARN, prefix),
+        # ("tables", bucket ARN, namespace, prefix) and ("table", bucket ARN, namespace, name)
+        # -> (time fetched, value)
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        # Bumped on every invalidation so a read that raced a write is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # Pagination
+
+    def _paginate(self, operation: str, result_key: str, **params) -> Iterator[Dict[str, Any]]:
+        params = {key: value for key, value in params.items() if value}
+        for page in self.client.get_paginator(operation).paginate(**params):
+            self.api_calls += 1
+            yield from page.get(result_key, [])
+
+    def iter_table_buckets(self, prefix: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield every table bucket, fetching pages as they are consumed"""
+        return self._paginate("list_table_buckets", "tableBuckets", prefix=prefix)
+
+    def iter_namespaces(self, table_bucket_arn: str, prefix: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield every namespace of a table bucket"""
+        return self._paginate("list_namespaces", "namespaces", tableBucketARN=table_bucket_arn, prefix=prefix)
+
+    def iter_tables(
+        self, table_bucket_arn: str, namespace: Optional[str] = None, prefix: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every table of a table bucket, or of one of its namespaces"""
+        return self._paginate(
+            "list_tables", "tables", tableBucketARN=table_bucket_arn, namespace=namespace, prefix=prefix
+        )
+
+    # Cached reads
+
+    def table_buckets(self, prefix: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        return self._cached(("buckets", prefix), lambda: list(self.iter_table_buckets(prefix)), refresh)
+
+    def namespaces(
+        self, table_bucket_arn: str, prefix: Optional[str] = None, refresh: bool = False
+    ) -> List[Dict[str, Any]]:
+        return self._cached(
+            ("namespaces", table_bucket_arn, prefix),
+            lambda: list(self.iter_namespaces(table_bucket_arn, prefix)),
+            refresh,
+        )
+
+    def tables(
+        self,
+        table_bucket_arn: str,
+        namespace: Optional[str] = None,
+        prefix: Optional[str] = None,
+        refresh: bool = False,
+    ) -> List[Dict[str, Any]]:
+        return self._cached(
+            ("tables", table_bucket_arn, namespace, prefix),
+            lambda: list(self.iter_tables(table_bucket_arn, namespace, prefix)),
+            refresh,
+        )
+
+    def table(
+        self,
+        table_bucket_arn: Optional[str] = None,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        table_arn: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """Table details, by table_arn or by bucket ARN, namespace and name"""
+        if table_arn:
+            cached = None if refresh else self._find_table(table_arn)
+            if cached is not None:
+                return cached
+            with self._lock:
+                generation = self._generation
+            response = self._get_table(tableArn=table_arn)
+            # arn:aws:s3tables:<region>:<account>:bucket/<bucket name>/table/<table id>
+            key = ("table", table_arn.split("/table/")[0], _namespace_name(response["namespace"]), response["name"])
+            self._store(key, response, generation)
+            return response
+
+        return self._cached(
+            ("table", table_bucket_arn, namespace, name),
+            lambda: self._get_table(tableBucketARN=table_bucket_arn, namespace=namespace, name=name),
+            refresh,
+        )
+
+    # Writes, invalidating what they change
+
+    def create_table_bucket(self, **params) -> Dict[str, Any]:
+        response = self._call("create_table_bucket", **params)
+        self.invalidate("buckets")
+        return response
+
+    def delete_table_bucket(self, table_bucket_arn: str):
+        self._call("delete_table_bucket", tableBucketARN=table_bucket_arn)
+        self.invalidate("buckets")
+        for kind in ("namespaces", "tables", "table"):
+            self.invalidate(kind, table_bucket_arn)
+
+    def create_namespace(self, table_bucket_arn: str, namespace: str) -> Dict[str, Any]:
+        response = self._call("create_namespace", tableBucketARN=table_bucket_arn, namespace=[namespace])
+        self.invalidate("namespaces", table_bucket_arn)
+        return response
+
+    def delete_namespace(self, table_bucket_arn: str, namespace: str):
+        self._call("delete_namespace", tableBucketARN=table_bucket_arn, namespace=namespace)
+        self.invalidate("namespaces", table_bucket_arn)
+        self.invalidate("tables", table_bucket_arn)
+        self.invalidate("table", table_bucket_arn, namespace)
+
+    def create_table(self, table_bucket_arn: str, namespace: str, name: str, **params) -> Dict[str, Any]:
+        response = self._call(
+            "create_table", tableBucketARN=table_bucket_arn, namespace=namespace, name=name, **params
+        )
+        self.invalidate("tables", table_bucket_arn)
+        return response
+
+    def delete_table(self, table_bucket_arn: str, namespace: str, name: str, **params):
+        self._call("delete_table", tableBucketARN=table_bucket_arn, namespace=namespace, name=name, **params)
+        self.invalidate("tables", table_bucket_arn)
+        self.invalidate("table", table_bucket_arn, namespace, name)
+
+    def rename_table(self, table_bucket_arn: str, namespace: str, name: str, **params):
+        self._call("rename_table", tableBucketARN=table_bucket_arn, namespace=namespace, name=name, **params)
+        self.invalidate("tables", table_bucket_arn)
+        self.invalidate("table", table_bucket_arn, namespace, name)
+
+    def update_table_metadata_location(
+        self, table_bucket_arn: str, namespace: str, name: str, version_token: str, metadata_location: str
+    ) -> Dict[str, Any]:
+        try:
+            response = self._call(
+                "update_table_metadata_location",
+                tableBucketARN=table_bucket_arn,
+                namespace=namespace,
+                name=name,
+                versionToken=version_token,
+                metadataLocation=metadata_location,
+            )
+        except ClientError:
+            # A stale version token is the usual cause (ConflictException); drop the
+            # cached details so the next read returns the current token
+            self.invalidate("table", table_bucket_arn, namespace, name)
+            raise
+        # Write the new location and token through to cached details instead of dropping them
+        key = ("table", table_bucket_arn, namespace, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                updated = dict(entry[1], versionToken=response["versionToken"],
+                               metadataLocation=response["metadataLocation"])
+                self._entries[key] = (entry[0], updated)
+        return response
+
+    # Cache management
+
+    def invalidate(self, *key_prefix):
+        """Drop every entry whose key starts with key_prefix (everything without arguments)"""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[:len(key_prefix)] == key_prefix]:
+                del self._entries[key]
+
+    def _fresh(self, fetched: float) -> bool:
+        return time.monotonic() - fetched < self.ttl_seconds
+
+    def _cached(self, key: Tuple, fetch, refresh: bool):
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+        if not refresh and entry is not None and self._fresh(entry[0]):
+            return entry[1]
+        value = fetch()
+        self._store(key, value, generation)
+        return value
+
+    def _store(self, key: Tuple, value: Any, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic(), value)
+
+    def _find_table(self, table_arn: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for key, (fetched, value) in self._entries.items():
+                if key[0] == "table" and value["tableARN"] == table_arn and self._fresh(fetched):
+                    return value
+        return None
+
+    def _get_table(self, **params) -> Dict[str, Any]:
+        response = self._call("get_table", **params)
+        response.pop("ResponseMetadata", None)
+        return response
+
+    def _call(self, operation: str, **params) -> Dict[str, Any]:
+        self.api_calls += 1
+        return getattr(self.client, operation)(**params)
+
+
+@functools.lru_cache(maxsize=None)
+def get_s3tables_catalog(region: str) -> S3TablesCatalog:
+    """Catalog shared by all sessions of the process, one per region"""
+    return S3TablesCatalog(boto3.client("s3tables", region_name=region))
+
+
+def _limited(items: List[Dict[str, Any]], limit: Optional[int], line) -> str:
+    """Format one line per item, up to limit items"""
+    shown = items[:limit] if limit else items
+    result = "".join(line(item) for item in shown)
+    if len(shown) < len(items):
+        result += f"... and {len(items) - len(shown)} more\n"
+    return result
+
 
 def create_s3tables_tools():
     """Create and return S3 Tables tools"""
-    from botocore.exceptions import ClientError
+
+    def catalog() -> S3TablesCatalog:
+        return get_s3tables_catalog(os.getenv("AWS_REGION", "us-east-1"))
 
     @tool
     def manage_s3_table_buckets(
@@ -36,7 +279,7 @@ def create_s3tables_tools():
         maintenance_config: dict = None,
         prefix: str = None,
         max_buckets: int = None,
-        continuation_token: str = None,
+        refresh: bool = False,
     ) -> str:
         """
         Manage S3 Table Buckets with comprehensive operations.
@@ -64,14 +307,13 @@ def create_s3tables_tools():
             maintenance_type: Type of maintenance (e.g., 'icebergUnreferencedFileRemoval')
             maintenance_config: Maintenance configuration dict
             prefix: Prefix filter for list operations
-            max_buckets: Maximum number of buckets to return
-            continuation_token: Token for pagination
+            max_buckets: Maximum number of buckets to show (all pages are always read)
+            refresh: Read from S3 Tables instead of the catalog cache
         """
         try:
-            # Create S3 Tables client
-            s3tables_client = boto3.client(
-                "s3tables", region_name=os.getenv("AWS_REGION", "us-east-1")
-            )
+            # Shared S3 Tables client and catalog cache
+            s3tables = catalog()
+            s3tables_client = s3tables.client
 
             if operation == "create_table_bucket":
                 if not table_bucket_name:
@@ -83,14 +325,14 @@ def create_s3tables_tools():
                         encryption_configuration
                     )
 
-                response = s3tables_client.create_table_bucket(**params)
+                response = s3tables.create_table_bucket(**params)
                 return f"✅ Table bucket created successfully! ARN: {response['arn']}"
 
             elif operation == "delete_table_bucket":
                 if not table_bucket_arn:
                     return "❌ Error: table_bucket_arn is required for delete_table_bucket operation"
 
-                s3tables_client.delete_table_bucket(tableBucketARN=table_bucket_arn)
+                s3tables.delete_table_bucket(table_bucket_arn)
                 return f"✅ Table bucket {table_bucket_arn} deleted successfully!"
 
             elif operation == "get_table_bucket":
@@ -110,24 +352,14 @@ def create_s3tables_tools():
                 )
 
             elif operation == "list_table_buckets":
-                params = {}
-                if prefix:
-                    params["prefix"] = prefix
-                if max_buckets:
-                    params["maxBuckets"] = max_buckets
-                if continuation_token:
-                    params["continuationToken"] = continuation_token
-
-                response = s3tables_client.list_table_buckets(**params)
-                buckets = response.get("tableBuckets", [])
+                buckets = s3tables.table_buckets(prefix, refresh=refresh)
 
                 result = f"✅ Found {len(buckets)} table buckets:\n"
-                for bucket in buckets:
-                    result += f"- {bucket['name']} (ARN: {bucket['arn']}, Created: {bucket['createdAt']})\n"
-
-                if response.get("continuationToken"):
-                    result += f"\nContinuation Token: {response['continuationToken']}"
-
+                result += _limited(
+                    buckets,
+                    max_buckets,
+                    lambda bucket: f"- {bucket['name']} (ARN: {bucket['arn']}, Created: {bucket['createdAt']})\n",
+                )
                 return result
 
             elif operation == "put_table_bucket_encryption":
@@ -240,7 +472,7 @@ def create_s3tables_tools():
         namespace: str = None,
         prefix: str = None,
         max_namespaces: int = None,
-        continuation_token: str = None,
+        refresh: bool = False,
     ) -> str:
         """
         Manage S3 Tables Namespaces.
@@ -256,13 +488,12 @@ def create_s3tables_tools():
             table_bucket_arn: ARN of the table bucket
             namespace: Name of the namespace
             prefix: Prefix filter for list operations
-            max_namespaces: Maximum number of namespaces to return
-            continuation_token: Token for pagination
+            max_namespaces: Maximum number of namespaces to show (all pages are always read)
+            refresh: Read from S3 Tables instead of the catalog cache
         """
         try:
-            s3tables_client = boto3.client(
-                "s3tables", region_name=os.getenv("AWS_REGION", "us-east-1")
-            )
+            s3tables = catalog()
+            s3tables_client = s3tables.client
 
             if operation == "create_namespace":
                 if not namespace:
@@ -270,9 +501,7 @@ def create_s3tables_tools():
                         "❌ Error: namespace is required for create_namespace operation"
                     )
 
-                response = s3tables_client.create_namespace(
-                    tableBucketARN=table_bucket_arn, namespace=[namespace]
-                )
+                s3tables.create_namespace(table_bucket_arn, namespace)
                 return f"✅ Namespace '{namespace}' created successfully in {table_bucket_arn}"
 
             elif operation == "delete_namespace":
@@ -281,9 +510,7 @@ def create_s3tables_tools():
                         "❌ Error: namespace is required for delete_namespace operation"
                     )
 
-                s3tables_client.delete_namespace(
-                    tableBucketARN=table_bucket_arn, namespace=namespace
-                )
+                s3tables.delete_namespace(table_bucket_arn, namespace)
                 return f"✅ Namespace '{namespace}' deleted successfully from {table_bucket_arn}"
 
             elif operation == "get_namespace":
@@ -304,26 +531,16 @@ def create_s3tables_tools():
                 )
 
             elif operation == "list_namespaces":
-                params = {"tableBucketARN": table_bucket_arn}
-                if prefix:
-                    params["prefix"] = prefix
-                if max_namespaces:
-                    params["maxNamespaces"] = max_namespaces
-                if continuation_token:
-                    params["continuationToken"] = continuation_token
-
-                response = s3tables_client.list_namespaces(**params)
-                namespaces = response.get("namespaces", [])
+                namespaces = s3tables.namespaces(table_bucket_arn, prefix, refresh=refresh)
 
                 result = (
                     f"✅ Found {len(namespaces)} namespaces in {table_bucket_arn}:\n"
                 )
-                for ns in namespaces:
-                    result += f"- {ns['namespace']} (Created: {ns['createdAt']}, Owner: {ns['ownerAccountId']})\n"
-
-                if response.get("continuationToken"):
-                    result += f"\nContinuation Token: {response['continuationToken']}"
-
+                result += _limited(
+                    namespaces,
+                    max_namespaces,
+                    lambda ns: f"- {ns['namespace']} (Created: {ns['createdAt']}, Owner: {ns['ownerAccountId']})\n",
+                )
                 return result
 
             else:
@@ -355,7 +572,7 @@ def create_s3tables_tools():
         metadata_location: str = None,
         prefix: str = None,
         max_tables: int = None,
-        continuation_token: str = None,
+        refresh: bool = False,
     ) -> str:
         """
         Manage S3 Tables with comprehensive operations.
@@ -393,24 +610,17 @@ def create_s3tables_tools():
             version_token: Version token for operations that require it
             metadata_location: Metadata location for update operations
             prefix: Prefix filter for list operations
-            max_tables: Maximum number of tables to return
-            continuation_token: Token for pagination
+            max_tables: Maximum number of tables to show (all pages are always read)
+            refresh: Read from S3 Tables instead of the catalog cache
         """
         try:
-            s3tables_client = boto3.client(
-                "s3tables", region_name=os.getenv("AWS_REGION", "us-east-1")
-            )
+            s3tables = catalog()
 
             if operation == "create_table":
                 if not all([table_bucket_arn, namespace, table_name, table_format]):
                     return "❌ Error: table_bucket_arn, namespace, table_name, and table_format are required"
 
-                params = {
-                    "tableBucketARN": table_bucket_arn,
-                    "namespace": namespace,
-                    "name": table_name,
-                    "format": table_format,
-                }
+                params = {"format": table_format}
                 if table_metadata:
                     params["metadata"] = json.dumps(table_metadata)
                 if encryption_configuration:
@@ -418,7 +628,7 @@ def create_s3tables_tools():
                         encryption_configuration
                     )
 
-                response = s3tables_client.create_table(**params)
+                response = s3tables.create_table(table_bucket_arn, namespace, table_name, **params)
                 return (
                     f"✅ Table '{table_name}' created successfully!\n"
                     + f"Table ARN: {response['tableARN']}\n"
@@ -429,30 +639,20 @@ def create_s3tables_tools():
                 if not all([table_bucket_arn, namespace, table_name]):
                     return "❌ Error: table_bucket_arn, namespace, and table_name are required"
 
-                params = {
-                    "tableBucketARN": table_bucket_arn,
-                    "namespace": namespace,
-                    "name": table_name,
-                }
+                params = {}
                 if version_token:
                     params["versionToken"] = version_token
 
-                s3tables_client.delete_table(**params)
+                s3tables.delete_table(table_bucket_arn, namespace, table_name, **params)
                 return f"✅ Table '{table_name}' deleted successfully from namespace '{namespace}'"
 
             elif operation == "get_table":
-                if table_arn:
-                    params = {"tableArn": table_arn}
-                elif all([table_bucket_arn, namespace, table_name]):
-                    params = {
-                        "tableBucketARN": table_bucket_arn,
-                        "namespace": namespace,
-                        "name": table_name,
-                    }
-                else:
+                if not table_arn and not all([table_bucket_arn, namespace, table_name]):
                     return "❌ Error: Either table_arn OR (table_bucket_arn + namespace + table_name) is required"
 
-                response = s3tables_client.get_table(**params)
+                response = s3tables.table(
+                    table_bucket_arn, namespace, table_name, table_arn=table_arn, refresh=refresh
+                )
                 return (
                     f"✅ Table details:\n"
                     + f"Name: {response['name']}\n"
@@ -472,34 +672,70 @@ def create_s3tables_tools():
                 if not table_bucket_arn:
                     return "❌ Error: table_bucket_arn is required"
 
-                params = {"tableBucketARN": table_bucket_arn}
-                if namespace:
-                    params["namespace"] = namespace
-                if prefix:
-                    params["prefix"] = prefix
-                if max_tables:
-                    params["maxTables"] = max_tables
-                if continuation_token:
-                    params["continuationToken"] = continuation_token
-
-                response = s3tables_client.list_tables(**params)
-                tables = response.get("tables", [])
+                tables = s3tables.tables(table_bucket_arn, namespace, prefix, refresh=refresh)
 
                 result = f"✅ Found {len(tables)} tables in {table_bucket_arn}"
                 if namespace:
                     result += f" (namespace: {namespace})"
                 result += ":\n"
 
-                for table in tables:
-                    result += (
+                result += _limited(
+                    tables,
+                    max_tables,
+                    lambda table: (
                         f"- {table['name']} (Namespace: {table['namespace']}, "
                         + f"Type: {table['type']}, Created: {table['createdAt']})\n"
-                    )
+                    ),
+                )
+                return result
 
-                if response.get("continuationToken"):
-                    result += f"\nContinuation Token: {response['continuationToken']}"
+            elif operation == "rename_table":
+                if not all([table_bucket_arn, namespace, table_name]):
+                    return "❌ Error: table_bucket_arn, namespace, and table_name are required"
+                if not new_namespace_name and not new_table_name:
+                    return "❌ Error: new_namespace_name or new_table_name is required"
 
-                return result
+                params = {}
+                if new_namespace_name:
+                    params["newNamespaceName"] = new_namespace_name
+                if new_table_name:
+                    params["newName"] = new_table_name
+                if version_token:
+                    params["versionToken"] = version_token
+
+                s3tables.rename_table(table_bucket_arn, namespace, table_name, **params)
+                return (
+                    f"✅ Table '{namespace}.{table_name}' renamed to "
+                    + f"'{new_namespace_name or namespace}.{new_table_name or table_name}'"
+                )
+
+            elif operation == "get_table_metadata_location":
+                if not all([table_bucket_arn, namespace, table_name]):
+                    return "❌ Error: table_bucket_arn, namespace, and table_name are required"
+
+                response = s3tables.table(table_bucket_arn, namespace, table_name, refresh=refresh)
+                return (
+                    f"✅ Metadata location of '{namespace}.{table_name}':\n"
+                    + f"Metadata Location: {response.get('metadataLocation', 'N/A')}\n"
+                    + f"Version Token: {response['versionToken']}\n"
+                    + f"Warehouse Location: {response['warehouseLocation']}"
+                )
+
+            elif operation == "update_table_metadata_location":
+                if not all([table_bucket_arn, namespace, table_name, version_token, metadata_location]):
+                    return (
+                        "❌ Error: table_bucket_arn, namespace, table_name, version_token, "
+                        + "and metadata_location are required"
+                    )
+
+                response = s3tables.update_table_metadata_location(
+                    table_bucket_arn, namespace, table_name, version_token, metadata_location
+                )
+                return (
+                    f"✅ Metadata location of '{namespace}.{table_name}' updated\n"
+                    + f"Metadata Location: {response['metadataLocation']}\n"
+                    + f"Version Token: {response['versionToken']}"
+                )
 
             else:
                 return f"❌ Error: Unknown operation '{operation}'"
@@ -14,19 +14,64 @@
 
 """S3 tools for the DataProcessing Agent."""
 
-from typing import Any, Dict, List, Optional
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+MAX_WORKERS = 16  # shared pool for parallel listing, bulk transfers and deletes
+DELETE_BATCH_SIZE = 1000  # maximum keys per DeleteObjects request
+
+# Multipart above 64 MB in 16 MB parts, up to 8 parts of one file in flight
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all S3Tools instances"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="s3-tools")
+        return _executor
+
+
+def _object_info(obj: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "key": obj["Key"],
+        "size": obj["Size"],
+        "last_modified": obj["LastModified"].isoformat(),
+        "etag": obj["ETag"],
+    }
+
 
 class S3Tools:
     """Tools for interacting with Amazon S3"""
 
-    def __init__(self, region_name: str = "us-east-1"):
+    def __init__(self, region_name: str = "us-east-1", transfer_config: TransferConfig = TRANSFER_CONFIG):
         """Initialize S3 client"""
-        self.s3_client = boto3.client("s3", region_name=region_name)
+        # Enough connections for the shared pool plus multipart parts of each transfer
+        self.s3_client = boto3.client(
+            "s3",
+            region_name=region_name,
+            config=Config(max_pool_connections=MAX_WORKERS * transfer_config.max_concurrency),
+        )
         self.region_name = region_name
+        self.transfer_config = transfer_config
 
     def list_buckets(self) -> List[Dict[str, Any]]:
         """List all S3 buckets"""
@@ -43,22 +88,56 @@ class S3Tools:
             raise Exception(f"Error listing buckets: {str(e)}")
 
     def list_objects(
-        self, bucket_name: str, prefix: str = "", max_keys: int = 1000
+        self, bucket_name: str, prefix: str = "", max_keys: Optional[int] = 1000
     ) -> List[Dict[str, Any]]:
-        """List objects in an S3 bucket"""
+        """List objects in an S3 bucket, across pages, up to max_keys (None for all)"""
+        return list(islice(self.iter_objects(bucket_name, prefix), max_keys))
+
+    def iter_objects(self, bucket_name: str, prefix: str = "", page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield every object under a prefix, fetching pages as they are consumed"""
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=bucket_name, Prefix=prefix, MaxKeys=max_keys
-            )
-            return [
-                {
-                    "key": obj["Key"],
-                    "size": obj["Size"],
-                    "last_modified": obj["LastModified"].isoformat(),
-                    "etag": obj["ETag"],
-                }
-                for obj in response.get("Contents", [])
-            ]
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(
+                Bucket=bucket_name, Prefix=prefix, PaginationConfig={"PageSize": page_size}
+            ):
+                for obj in page.get("Contents", []):
+                    yield _object_info(obj)
+        except ClientError as e:
+            raise Exception(f"Error listing objects in bucket {bucket_name}: {str(e)}")
+
+    def iter_objects_parallel(
+        self, bucket_name: str, prefix: str = "", delimiter: str = "/", shard_depth: int = 1
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every object under a prefix, listing sub-prefixes in parallel
+
+        The prefix is split into shards at its first shard_depth levels of
+        delimiter-separated sub-prefixes, and each shard is listed on the
+        shared thread pool. Objects come in shard completion order, not key order.
+        """
+        shards: List[str] = []
+        for obj in self._split_prefix(bucket_name, prefix, delimiter, shard_depth, shards):
+            yield obj
+
+        futures = [_get_executor().submit(list, self.iter_objects(bucket_name, shard)) for shard in shards]
+        for future in as_completed(futures):
+            yield from future.result()
+
+    def _split_prefix(
+        self, bucket_name: str, prefix: str, delimiter: str, depth: int, shards: List[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield objects directly under prefix and collect the sub-prefixes to list as shards"""
+        if depth <= 0:
+            shards.append(prefix)
+            return
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter=delimiter):
+                for obj in page.get("Contents", []):
+                    yield _object_info(obj)
+                for common_prefix in page.get("CommonPrefixes", []):
+                    yield from self._split_prefix(
+                        bucket_name, common_prefix["Prefix"], delimiter, depth - 1, shards
+                    )
         except ClientError as e:
             raise Exception(f"Error listing objects in bucket {bucket_name}: {str(e)}")
 
@@ -67,7 +146,9 @@ class S3Tools:
     ) -> Dict[str, Any]:
         """Upload a file to S3"""
         try:
-            self.s3_client.upload_file(file_path, bucket_name, object_key)
+            self.s3_client.upload_file(
+                file_path, bucket_name, object_key, Config=self.transfer_config
+            )
             return {
                 "bucket": bucket_name,
                 "key": object_key,
@@ -82,7 +163,9 @@ class S3Tools:
     ) -> Dict[str, Any]:
         """Download a file from S3"""
         try:
-            self.s3_client.download_file(bucket_name, object_key, file_path)
+            self.s3_client.download_file(
+                bucket_name, object_key, file_path, Config=self.transfer_config
+            )
             return {
                 "bucket": bucket_name,
                 "key": object_key,
@@ -92,6 +175,47 @@ class S3Tools:
         except ClientError as e:
             raise Exception(f"Error downloading file from S3: {str(e)}")
 
+    def upload_files(self, bucket_name: str, files: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """Upload many (file path, object key) pairs in parallel"""
+
+        def upload(file_path: str, object_key: str) -> int:
+            self.s3_client.upload_file(file_path, bucket_name, object_key, Config=self.transfer_config)
+            return os.path.getsize(file_path)
+
+        return self._run_bulk(upload, files, "uploaded")
+
+    def download_files(self, bucket_name: str, objects: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """Download many (object key, file path) pairs in parallel"""
+
+        def download(object_key: str, file_path: str) -> int:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.s3_client.download_file(bucket_name, object_key, file_path, Config=self.transfer_config)
+            return os.path.getsize(file_path)
+
+        return self._run_bulk(download, objects, "downloaded")
+
+    def _run_bulk(self, transfer, items: Iterable[Tuple[str, str]], verb: str) -> Dict[str, Any]:
+        """Run transfers on the shared pool, collecting per-item failures instead of raising"""
+        started = time.perf_counter()
+        futures = {_get_executor().submit(transfer, *item): item for item in items}
+        transferred, total_bytes, failed = 0, 0, []
+        for future in as_completed(futures):
+            try:
+                total_bytes += future.result()
+                transferred += 1
+            except Exception as e:
+                failed.append({"item": list(futures[future]), "error": str(e)})
+        seconds = time.perf_counter() - started
+        return {
+            verb: transferred,
+            "failed": failed,
+            "bytes": total_bytes,
+            "seconds": round(seconds, 3),
+            "mb_per_second": round(total_bytes / seconds / 1e6, 1) if seconds > 0 else None,
+        }
+
     def delete_object(self, bucket_name: str, object_key: str) -> Dict[str, Any]:
         """Delete an object from S3"""
         try:
@@ -104,6 +228,39 @@ class S3Tools:
         except ClientError as e:
             raise Exception(f"Error deleting object from S3: {str(e)}")
 
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> Dict[str, Any]:
+        """Delete many objects with DeleteObjects requests of up to 1000 keys, sent in parallel"""
+
+        def delete_batch(keys: List[str]) -> Dict[str, Any]:
+            return self.s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+
+        keys = iter(object_keys)
+        futures = []
+        while batch := list(islice(keys, DELETE_BATCH_SIZE)):
+            futures.append((len(batch), _get_executor().submit(delete_batch, batch)))
+
+        deleted, errors = 0, []
+        for batch_size, future in futures:
+            try:
+                batch_errors = future.result().get("Errors", [])
+            except ClientError as e:
+                raise Exception(f"Error deleting objects from S3: {str(e)}")
+            deleted += batch_size - len(batch_errors)
+            errors.extend(
+                {"key": error.get("Key"), "code": error.get("Code"), "message": error.get("Message")}
+                for error in batch_errors
+            )
+        return {"bucket": bucket_name, "deleted": deleted, "errors": errors}
+
+    def delete_prefix(self, bucket_name: str, prefix: str) -> Dict[str, Any]:
+        """Delete every object under a prefix, streaming the listing into delete batches"""
+        if not prefix:
+            raise Exception("A non-empty prefix is required to delete objects by prefix")
+        return self.delete_objects(bucket_name, (obj["key"] for obj in self.iter_objects(bucket_name, prefix)))
+
     def get_bucket_location(self, bucket_name: str) -> str:
         """Get the region of an S3 bucket"""
         try:
@@ -0,0 +1,95 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for starting the DataProcessing MCP server.
+
+Compares how long sessions wait for their MCP tools when every session
+launches its own server (as before the shared pool) with the shared pool,
+for a number of sessions starting at the same time.
+
+    uv run python benchmark_mcp_startup.py --sessions 4
+    uv run python benchmark_mcp_startup.py --sessions 4 --version latest
+
+Requires uvx; the server package is downloaded on the first run.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from amazon_dataprocessing_agent.core.mcp_server_pool import (
+    MCPServerPool, create_dataprocessing_mcp_client, server_spec)
+
+
+def per_session(sessions: int, region: str, profile: str):
+    """Every session launches and stops its own server"""
+
+    def session(_):
+        started = time.perf_counter()
+        client = create_dataprocessing_mcp_client(server_spec(), region, profile)
+        client.__enter__()
+        tool_count = len(client.list_tools_sync())
+        waited = time.perf_counter() - started
+        client.__exit__(None, None, None)
+        return waited, tool_count
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        return list(pool.map(session, range(sessions)))
+
+
+def shared_pool(sessions: int, region: str):
+    """Sessions acquire the pool's server; returns session waits and servers started"""
+    pool = MCPServerPool()
+    starts = []
+    factory = pool.client_factory
+    pool.client_factory = lambda *args: starts.append(args) or factory(*args)
+
+    def session(_):
+        started = time.perf_counter()
+        server = pool.acquire(region)
+        waited = time.perf_counter() - started
+        pool.release(server.key)
+        return waited, len(server.tools)
+
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        cold = list(executor.map(session, range(sessions)))
+    warm = [session(i) for i in range(sessions)]
+    pool.close_all()
+    return cold, warm, len(starts)
+
+
+def report(name: str, results):
+    waits = [waited for waited, _ in results]
+    print(f"{name:>24}: mean {sum(waits) / len(waits):6.2f}s, max {max(waits):6.2f}s "
+          f"({results[0][1]} tools)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MCP server startup")
+    parser.add_argument("--sessions", type=int, default=4, help="Sessions starting at the same time")
+    parser.add_argument("--region", default=os.getenv("AWS_REGION", "us-east-1"))
+    parser.add_argument("--version", help='Server version to launch, or "latest"')
+    args = parser.parse_args()
+
+    if args.version:
+        os.environ["DATAPROCESSING_MCP_VERSION"] = args.version
+    profile = os.getenv("AWS_PROFILE", "dp-mcp")
+    print(f"{args.sessions} sessions, {server_spec()}")
+
+    report("server per session", per_session(args.sessions, args.region, profile))
+    cold, warm, servers_started = shared_pool(args.sessions, args.region)
+    report("shared pool, cold", cold)
+    report("shared pool, warm", warm)
+    print(f"Servers started by the pool: {servers_started}")
@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fault injection for the Bedrock model resilience layer.
+
+Runs a strands Agent with one tool against a scripted Bedrock client that
+fails on chosen model calls, without calling AWS:
+
+    uv run python benchmark_model_resilience.py
+
+- stream error: a model call fails after the tool has run. Retrying the whole
+  agent turn (as before) runs the tool again; retrying the model call does not.
+- outage: every call fails. Without a circuit breaker each session makes all
+  of its attempts; with it, sessions fail fast once the circuit is open.
+- burst: concurrent sessions share the per-model rate limiter.
+
+Backoff delays are scaled down by --time-scale so the run takes seconds.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError, EventStreamError
+from strands import Agent, tool
+from strands.models import BedrockModel
+
+from amazon_dataprocessing_agent.core.resilience import (
+    CircuitBreaker, ModelGuard, ModelUnavailableError, ResilientBedrockModel,
+    TokenBucket, decorrelated_jitter)
+
+PROMPT = "How many rows are in the orders table?"
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": f"injected {code}"}}, "ConverseStream")
+
+
+def stream_error(code: str) -> EventStreamError:
+    return EventStreamError({"Error": {"Code": code, "Message": f"injected {code}"}}, "ConverseStream")
+
+
+class ScriptedBedrockClient:
+    """Answers converse_stream with a tool call, then with text once the tool result is in
+
+    faults is consumed one entry per call: None succeeds, an exception is raised
+    before any event is streamed. Without entries left, calls succeed (or
+    keep failing with always_fail).
+    """
+
+    def __init__(self, faults=(), always_fail=None, latency=0.0):
+        self.faults = list(faults)
+        self.always_fail = always_fail
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def converse_stream(self, **request):
+        with self._lock:
+            self.calls += 1
+            fault = self.faults.pop(0) if self.faults else self.always_fail
+        time.sleep(self.latency)
+        if fault is not None:
+            raise fault
+
+        has_result = any("toolResult" in block for message in request["messages"] for block in message["content"])
+        return {"stream": iter(self._answer() if has_result else self._tool_call())}
+
+    @staticmethod
+    def _tool_call():
+        return [
+            {"messageStart": {"role": "assistant"}},
+            {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "t1", "name": "count_rows"}}}},
+            {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps({"table": "orders"})}}}},
+            {"contentBlockStop": {}},
+            {"messageStop": {"stopReason": "tool_use"}},
+            {"metadata": {"usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15},
+                          "metrics": {"latencyMs": 1}}},
+        ]
+
+    @staticmethod
+    def _answer():
+        return [
+            {"messageStart": {"role": "assistant"}},
+            {"contentBlockDelta": {"delta": {"text": "The orders table has 1200 rows."}}},
+            {"contentBlockStop": {}},
+            {"messageStop": {"stopReason": "end_turn"}},
+            {"metadata": {"usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15},
+                          "metrics": {"latencyMs": 1}}},
+        ]
+
+
+def make_agent(model, counter):
+    @tool
+    def count_rows(table: str) -> str:
+        """Count the rows of a table"""
+        counter["tool_runs"] += 1
+        return "1200"
+
+    return Agent(model=model, tools=[count_rows], callback_handler=None)
+
+
+def make_guard(args, **overrides):
+    scale = args.time_scale
+    settings = dict(
+        breaker=CircuitBreaker(reset_seconds=30 * scale),
+        bucket=TokenBucket(rate=1000, capacity=1000),
+        delays=lambda: decorrelated_jitter(1.0 * scale, 20.0 * scale),
+    )
+    settings.update(overrides)
+    return ModelGuard(**settings)
+
+
+def resilient_model(client, guard):
+    model = ResilientBedrockModel(guard=guard, model_id="fault-injection", region_name="us-east-1")
+    model.client = client
+    return model
+
+
+def stream_error_scenario(args):
+    print("stream error after the tool has run")
+    fault = stream_error("modelStreamErrorException")
+
+    # Before: plain model, whole agent turn retried on retryable errors
+    counter = {"tool_runs": 0}
+    client = ScriptedBedrockClient(faults=[None, fault])
+    model = BedrockModel(model_id="fault-injection", region_name="us-east-1")
+    model.client = client
+    agent = make_agent(model, counter)
+    for attempt in range(3):
+        try:
+            agent.messages = []
+            agent(PROMPT)
+            break
+        except Exception:
+            time.sleep(2 * args.time_scale * 2 ** attempt)
+    print(f"{'whole turn retried':>28}: {client.calls} model calls, tool ran {counter['tool_runs']}x")
+
+    counter = {"tool_runs": 0}
+    client = ScriptedBedrockClient(faults=[None, fault])
+    agent = make_agent(resilient_model(client, make_guard(args)), counter)
+    agent(PROMPT)
+    print(f"{'model call retried':>28}: {client.calls} model calls, tool ran {counter['tool_runs']}x")
+
+
+def outage_scenario(args):
+    print(f"outage, {args.sessions} sessions in a row")
+    for name, threshold in (("no circuit breaker", 10 ** 9), ("circuit breaker", 5)):
+        client = ScriptedBedrockClient(always_fail=client_error("ServiceUnavailableException"), latency=0.01)
+        guard = make_guard(args, breaker=CircuitBreaker(threshold, reset_seconds=30 * args.time_scale))
+        model = resilient_model(client, guard)
+        started = time.perf_counter()
+        fast_failures = 0
+        for _ in range(args.sessions):
+            session_started = time.perf_counter()
+            try:
+                make_agent(model, {"tool_runs": 0})(PROMPT)
+            except ModelUnavailableError:
+                fast_failures += time.perf_counter() - session_started < 0.005
+        elapsed = time.perf_counter() - started
+        print(f"{name:>28}: {client.calls} model calls, {elapsed:.2f}s, "
+              f"{fast_failures} sessions failed fast")
+
+
+def burst_scenario(args):
+    rate, burst = 10.0, 5
+    print(f"{args.sessions} concurrent sessions, shared limit of {rate:g} requests/s with bursts of {burst}")
+    client = ScriptedBedrockClient()
+    model = resilient_model(client, make_guard(args, bucket=TokenBucket(rate=rate, capacity=burst)))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(lambda _: make_agent(model, {"tool_runs": 0})(PROMPT), range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    print(f"{'rate limited':>28}: {client.calls} model calls in {elapsed:.2f}s "
+          f"(the limit allows them in {(client.calls - burst) / rate:.2f}s at the earliest)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inject Bedrock faults into the model resilience layer")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Factor applied to backoff delays")
+    args = parser.parse_args()
+    # Injected faults are logged as retries and failed cycles; only the results are of interest
+    logging.disable(logging.CRITICAL)
+
+    stream_error_scenario(args)
+    outage_scenario(args)
+    burst_scenario(args)
@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for the bulk S3Tools operations.
+
+Compares listing, uploading, downloading and deleting many objects one request
+at a time with the paginated, parallel and batched S3Tools methods, against a
+local S3 stand-in so no AWS account is touched.
+
+    uv run --with "moto[s3]" python benchmark_s3_tools.py
+    uv run python benchmark_s3_tools.py --endpoint-url http://localhost:9000
+
+Without --endpoint-url the S3 API is served in-process by moto. With it, the
+benchmark runs against that endpoint (e.g. MinIO) using the usual credentials.
+A local stand-in answers in well under a millisecond; --latency-ms adds a
+per-request delay closer to a round trip to a real S3 endpoint.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+
+import boto3
+
+from amazon_dataprocessing_agent.tools.s3_tools import S3Tools
+
+BUCKET = "dataprocessing-benchmark"
+
+
+def timed(name: str, objects: int, total_bytes: int, run):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:>32}: {objects} objects in {elapsed:6.2f}s "
+          f"({objects / elapsed:7.0f} objects/s, {total_bytes / elapsed / 1e6:6.1f} MB/s)")
+    return result
+
+
+def run(objects: int, object_kb: int, shards: int, tools: S3Tools):
+    client = tools.s3_client
+    client.create_bucket(Bucket=BUCKET)
+    total_bytes = objects * object_kb * 1024
+
+    with tempfile.TemporaryDirectory() as workdir:
+        payload = os.urandom(object_kb * 1024)
+        files = []
+        for i in range(objects):
+            path = os.path.join(workdir, f"part-{i:06d}.bin")
+            with open(path, "wb") as f:
+                f.write(payload)
+            files.append((path, f"events/shard={i % shards:03d}/part-{i:06d}.bin"))
+
+        timed("upload_file, one by one", objects, total_bytes,
+              lambda: [tools.upload_file(path, BUCKET, key) for path, key in files])
+        summary = timed("upload_files", objects, total_bytes, lambda: tools.upload_files(BUCKET, files))
+        assert summary["uploaded"] == objects, summary["failed"][:3]
+
+        first_page = timed("list_objects, first page only", objects, 0,
+                           lambda: client.list_objects_v2(Bucket=BUCKET, Prefix="events/").get("Contents", []))
+        listed = timed("iter_objects", objects, 0, lambda: list(tools.iter_objects(BUCKET, "events/")))
+        sharded = timed("iter_objects_parallel", objects, 0,
+                        lambda: list(tools.iter_objects_parallel(BUCKET, "events/")))
+        assert len(listed) == len(sharded) == objects
+        print(f"{'':>32}  a single list_objects_v2 call returned {len(first_page)} of {objects} objects")
+
+        downloads = [(key, os.path.join(workdir, "download", key)) for _, key in files]
+        for shard in range(shards):
+            os.makedirs(os.path.join(workdir, "download", f"events/shard={shard:03d}"), exist_ok=True)
+        timed("download_file, one by one", objects, total_bytes,
+              lambda: [tools.download_file(BUCKET, key, path) for key, path in downloads])
+        summary = timed("download_files", objects, total_bytes, lambda: tools.download_files(BUCKET, downloads))
+        assert summary["downloaded"] == objects, summary["failed"][:3]
+
+        keys = [key for _, key in files]
+        timed("delete_object, one by one", objects // 2, 0,
+              lambda: [tools.delete_object(BUCKET, key) for key in keys[:objects // 2]])
+        summary = timed("delete_prefix", objects - objects // 2, 0, lambda: tools.delete_prefix(BUCKET, "events/"))
+        assert summary["deleted"] == objects - objects // 2, summary["errors"][:3]
+
+    client.delete_bucket(Bucket=BUCKET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk S3 operations")
+    parser.add_argument("--objects", type=int, default=2000, help="Objects to upload, list and delete")
+    parser.add_argument("--object-kb", type=int, default=64, help="Size of each object in KB")
+    parser.add_argument("--shards", type=int, default=16, help="Sub-prefixes the objects are spread over")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Delay added to every S3 request")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint, e.g. MinIO; moto is used without one")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        mock = nullcontext()
+    else:
+        from moto import mock_aws
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        mock = mock_aws()
+
+    with mock:
+        tools = S3Tools(region_name="us-east-1")
+        if args.endpoint_url:
+            tools.s3_client = boto3.client("s3", region_name="us-east-1", endpoint_url=args.endpoint_url,
+                                           config=tools.s3_client.meta.config)
+        if args.latency_ms:
+            tools.s3_client.meta.events.register("before-send", lambda **_: time.sleep(args.latency_ms / 1000))
+        print(f"{args.objects} objects of {args.object_kb} KB over {args.shards} prefixes, "
+              f"{args.latency_ms:g} ms added per request, "
+              f"{'moto' if not args.endpoint_url else args.endpoint_url}")
+        run(args.objects, args.object_kb, args.shards, tools)
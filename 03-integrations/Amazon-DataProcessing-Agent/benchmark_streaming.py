@@ -0,0 +1,116 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for the StreamingHandler renderer.
+
+Replays a token stream through StreamingHandler.callback_handler with a
+placeholder that only counts repaints, and compares it with re-sanitizing and
+repainting the whole response on every chunk.
+
+    uv run python benchmark_streaming.py
+    uv run python benchmark_streaming.py --stream-file recorded_stream.json
+
+A stream file is a JSON list of text chunks as received from the model. Without
+one, a 20k-token markdown answer (headers, lists, tables and code) is generated.
+"""
+
+import argparse
+import json
+import re
+import time
+from typing import List
+
+from amazon_dataprocessing_agent.core.streaming_handler import StreamingHandler
+
+
+class CountingPlaceholder:
+    """Stand-in for st.empty() that records what would be sent to the browser"""
+
+    def __init__(self):
+        self.renders = 0
+        self.bytes_rendered = 0
+
+    def markdown(self, text: str):
+        self.renders += 1
+        self.bytes_rendered += len(text)
+
+    def info(self, text: str):
+        pass
+
+    def success(self, text: str):
+        pass
+
+    def empty(self):
+        pass
+
+
+def generate_stream(tokens: int = 20000) -> List[str]:
+    """A markdown answer split into chunks of about four characters each"""
+    section = (
+        "## Step {n}: Configure the Glue job\n"
+        "The job reads the raw events from the landing bucket and writes Parquet.\n"
+        "- **Worker type:** G.1X with 10 workers\n"
+        "- **Glue version:** 5.0 (Spark 3.5.1)\n\n"
+        "| Setting | Value |\n|---------|-------|\n| Timeout | 60 minutes |\n\n"
+        "```python\n# Read the raw events\ndf = spark.read.json(source_path)\n```\n\n"
+    )
+    text = ""
+    n = 1
+    while len(text) < tokens * 4:
+        text += section.format(n=n)
+        n += 1
+    return [text[i:i + 4] for i in range(0, tokens * 4, 4)]
+
+
+def full_rerender(chunks: List[str], placeholder: CountingPlaceholder):
+    """Previous behaviour: sanitize and repaint the whole response on every chunk"""
+    content = ""
+    for chunk in chunks:
+        content += chunk
+        text = content
+        for level in range(1, 7):
+            text = re.sub(rf"^{'#' * level}\s+(.+)$", r"**\1**", text, flags=re.MULTILINE)
+        placeholder.markdown(text + "\n")
+
+
+def incremental(chunks: List[str], placeholder: CountingPlaceholder) -> StreamingHandler:
+    handler = StreamingHandler()
+    handler.message_placeholder = placeholder
+    for chunk in chunks:
+        handler.callback_handler(data=chunk)
+    handler.callback_handler(complete=True)
+    handler.finalize()
+    return handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the streaming response renderer")
+    parser.add_argument("--stream-file", help="JSON list of recorded text chunks")
+    parser.add_argument("--tokens", type=int, default=20000, help="Chunks to generate without a stream file")
+    args = parser.parse_args()
+
+    if args.stream_file:
+        with open(args.stream_file) as f:
+            chunks = json.load(f)
+    else:
+        chunks = generate_stream(args.tokens)
+
+    for name, run in (("full re-render", full_rerender), ("incremental", incremental)):
+        placeholder = CountingPlaceholder()
+        started = time.perf_counter()
+        run(chunks, placeholder)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>15}: {len(chunks)} chunks in {elapsed:.2f}s "
+              f"({elapsed / len(chunks) * 1e6:.1f} us per chunk), "
+              f"{placeholder.renders} repaints, {placeholder.bytes_rendered / 1e6:.1f} MB rendered")
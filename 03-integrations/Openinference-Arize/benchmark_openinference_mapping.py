@@ -0,0 +1,139 @@
+"""
+Benchmark for StrandsToOpenInferenceProcessor
+
+Replays the spans in sample_strands_trace.json (or another trace file in the
+same format) through the processor and an exporter and reports the time the
+agent's threads spend in on_end, end-to-end export throughput, dropped spans
+and how many spans the processor still holds in memory afterwards.
+
+    python benchmark_openinference_mapping.py --traces 2000 --mode sync
+    python benchmark_openinference_mapping.py --traces 2000 --mode async --exporter otlp-stub
+    python benchmark_openinference_mapping.py --traces 2000 --mode async --enqueue-timeout-ms 1000
+
+In sync mode spans are converted in on_end and exported by a BatchSpanProcessor,
+as in the notebook. In async mode the processor queues spans and converts and
+exports them on its own thread. The replay ends spans as fast as it can, so
+without --enqueue-timeout-ms (back-pressure) a full queue drops spans.
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.util.instrumentation import InstrumentationScope
+from opentelemetry.trace import SpanContext, TraceFlags
+
+from local_exporters import JsonLinesSpanExporter, OTLPStubSpanExporter
+from strands_to_openinference_mapping import StrandsToOpenInferenceProcessor
+
+RESOURCE = Resource.create({"service.name": "strands-benchmark"})
+SCOPE = InstrumentationScope("strands.telemetry.tracer")
+SAMPLED = TraceFlags(TraceFlags.SAMPLED)
+
+
+def end_order(spans: List[Dict[str, Any]]) -> List[int]:
+    """Indices of spans in the order they end: every child before its parent."""
+    children: Dict[Any, List[int]] = {}
+    for i, span in enumerate(spans):
+        children.setdefault(span["parent_span_id"], []).append(i)
+
+    order = []
+    def visit(i):
+        for child in children.get(spans[i]["span_id"], []):
+            visit(child)
+        order.append(i)
+    for root in children.get(None, []):
+        visit(root)
+    return order
+
+
+def replay(processors: List[Any], spans: List[Dict[str, Any]], traces: int) -> float:
+    """Run `traces` copies of the trace through the processors, returning seconds spent in on_start/on_end."""
+    ending = end_order(spans)
+    elapsed = 0.0
+    now = time.time_ns()
+    for trace_id in range(1, traces + 1):
+        # Fresh ids per trace, as a live agent would produce
+        ids = {span["span_id"]: trace_id * 1000 + i for i, span in enumerate(spans)}
+        live = []
+        for span in spans:
+            parent_id = span["parent_span_id"]
+            parent = SpanContext(trace_id, ids[parent_id], False, SAMPLED) if parent_id is not None else None
+            live.append(ReadableSpan(
+                name=span["name"],
+                context=SpanContext(trace_id, ids[span["span_id"]], False, SAMPLED),
+                parent=parent,
+                resource=RESOURCE,
+                attributes=dict(span["attributes"]),
+                start_time=now,
+                end_time=now + 1000,
+                instrumentation_scope=SCOPE,
+            ))
+
+        started = time.perf_counter()
+        for span in live:
+            for processor in processors:
+                processor.on_start(span)
+        for i in ending:
+            for processor in processors:
+                processor.on_end(live[i])
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def build_exporter(name: str, output: str, latency_ms: float):
+    if name == "jsonl":
+        return JsonLinesSpanExporter(output)
+    return OTLPStubSpanExporter(latency_millis=latency_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Strands to OpenInference span processor")
+    parser.add_argument("--trace-file", default="sample_strands_trace.json", help="Trace file with a 'spans' list")
+    parser.add_argument("--traces", type=int, default=2000, help="Number of times the trace is replayed")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync", help="Where spans are converted")
+    parser.add_argument("--exporter", choices=["otlp-stub", "jsonl"], default="otlp-stub", help="Exporter for converted spans")
+    parser.add_argument("--output", default="benchmark_spans.jsonl", help="Output file of the jsonl exporter")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated collector latency per export call")
+    parser.add_argument("--queue-size", type=int, default=2048, help="Queue size of the exporting processor")
+    parser.add_argument("--enqueue-timeout-ms", type=int, default=0,
+                        help="Async mode: how long on_end waits for queue room before dropping a span")
+    args = parser.parse_args()
+
+    with open(args.trace_file) as f:
+        spans = json.load(f)["spans"]
+
+    exporter = build_exporter(args.exporter, args.output, args.latency_ms)
+    if args.mode == "async":
+        processor = StrandsToOpenInferenceProcessor(exporter=exporter, max_queue_size=args.queue_size,
+                                                    enqueue_timeout_millis=args.enqueue_timeout_ms)
+        processors = [processor]
+    else:
+        processor = StrandsToOpenInferenceProcessor()
+        processors = [processor, BatchSpanProcessor(exporter, max_queue_size=args.queue_size)]
+
+    replay(processors, spans, 20)  # warm up
+    for p in processors:
+        p.force_flush()
+    exported_before = exporter.spans_exported
+
+    started = time.perf_counter()
+    hot_path = replay(processors, spans, args.traces)
+    for p in processors:
+        p.force_flush()
+    total_elapsed = time.perf_counter() - started
+
+    total = len(spans) * args.traces
+    exported = exporter.spans_exported - exported_before
+    print(f"{args.mode} mode, {args.exporter} exporter: {total} spans")
+    print(f"  on_end hot path: {hot_path:.2f}s, {hot_path / total * 1e6:.1f} us per span")
+    print(f"  end to end:      {total_elapsed:.2f}s, {exported / total_elapsed:,.0f} spans/second exported")
+    print(f"  dropped:         {total - exported} spans")
+    print(f"Spans still tracked after {args.traces} traces: {len(processor.span_hierarchy)}")
+
+    for p in processors:
+        p.shutdown()
@@ -0,0 +1,76 @@
+"""
+Local span exporters for the OpenInference pipeline
+
+These exporters let the processor's throughput be measured without an Arize
+account: one writes spans to a JSON Lines file, the other encodes them the
+way the OTLP exporter does and discards the payload.
+"""
+
+import threading
+import time
+from typing import Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Append every exported span to a file, one JSON document per line."""
+
+    def __init__(self, path: str = "spans.jsonl"):
+        self.path = path
+        self.spans_exported = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            self._file.write(lines)
+            self._file.flush()
+            self.spans_exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+class OTLPStubSpanExporter(SpanExporter):
+    """
+    Encode spans into an OTLP protobuf request, as OTLPSpanExporter does, without sending it.
+
+    ``latency_millis`` adds a sleep per export call to stand in for the
+    collector round trip. Exported spans, calls and payload bytes are counted.
+    """
+
+    def __init__(self, latency_millis: float = 0):
+        from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+
+        self._encode_spans = encode_spans
+        self.latency = latency_millis / 1000
+        self.spans_exported = 0
+        self.export_calls = 0
+        self.bytes_exported = 0
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        payload = self._encode_spans(spans).SerializeToString()
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.spans_exported += len(spans)
+            self.export_calls += 1
+            self.bytes_exported += len(payload)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: Optional[int] = 30000) -> bool:
+        return True
@@ -25,6 +25,7 @@ import sys
 from botocore.exceptions import ClientError
 from io import StringIO
 import base64
+import traceback
 
 from strands import Agent, tool
 from strands.models import BedrockModel
@@ -32,6 +33,7 @@ from strands.models import BedrockModel
 
 from tools.util import get_current_time
 from tools.site_info import  get_site_info, get_timeseries_data
+from tools.analytics import load_site, load_series, load_frame, Series, Frame, EntityTable
 
 
 
@@ -61,6 +63,7 @@ SYSTEM_PROMPT = """
                     DO NOT do ANY mathematical calculations without generating code. 
                     The code executed inside the execute_code tool call call the get_site_info, get_timeseries_data and get_current_time tools. 
                     CALL these functions to retrieve the data for processing. eg: get_site_info('s123'). Otherwise the code execution DOES NOT have access to your tool_result.
+                    PREFER the preloaded analytics helpers (load_site, load_series, load_frame) described in the execute_code documentation over loops on the raw tool output.
                     ALWAYS use the print statement at the end to return the end result. eg: instead of sum, use print(sum) at the end of the generated code.
                 3. Use the resulting answer to give the response to user
             """
@@ -88,16 +91,38 @@ def execute_code(code: str) -> Dict[str, str]:
         - get_site_info: Retrieves site information
         - get_timeseries_data: Retrieves time series data
         - get_current_time: Gets the current time
- 
+
+    Analytics helpers:
+        These are preloaded too. Prefer them to loops over the raw tool output, they run in milliseconds on months of data.
+
+        - load_site(site_id) -> EntityTable: the site hierarchy as a flat table of rows
+            (dicts with id, name, type, label, parent_id, depth, path)
+            site.find(name), site.get(id), site.of_type(type, under=id), site.children(id, type),
+            site.descendants(id, type), site.parent(id), site.ancestor_of_type(id, type), site.count_by_type(under=id)
+        - load_series(entity_id, property, start_time, end_time) -> Series: times may be 'YYYY-MM-DD HH:MM:SS' strings
+            s.mean() / min() / max() / sum() / count() / std() / median() / quantile(q) / idxmax() / idxmin() / summary()
+            s.resample('1h' | '1d' | '15min', how='mean'|'min'|'max'|'sum'|'count'|'first'|'last') -> Series
+            s.rolling(6 or '1h', how='mean') -> Series, s.diff(), s.between(start, end), s.above(x), s.below(x)
+            s.group_by('hour'|'weekday'|'date'|'month', how='mean') -> dict, s.duration() -> seconds covered
+            s.to_records() / s.head(n) -> [{'time': 'YYYY-MM-DD HH:MM:SS', 'value': float}]
+        - load_frame(entities, property, start_time, end_time) -> Frame: several entities (ids or site rows) fetched in parallel
+            frame['Zone name'] -> Series, frame.agg('max') -> {name: value}, frame.rank('mean')[:3],
+            frame.resample('1d'), frame.combine('mean') -> Series across entities
 
     Example:
         >>> result = execute_code('print("Hello World")')
         >>> print(result)
         {'stdout': 'Hello World\n', 'stderr': ''}
 
+        >>> site = load_site('s123')
+        >>> floor = site.find('First Floor')
+        >>> frame = load_frame(site.of_type('TemperatureSensor', under=floor['id']), 'temperature', '2024-01-01 00:00:00', '2024-03-31 23:59:59')
+        >>> print(frame.rank('max')[:3])
+
     Note:
         - The code is executed in a restricted environment with only specific functions available
         - All stdout is captured and returned rather than being printed directly
+        - If the code raises an exception, its traceback is returned in 'stderr'
     """
     
     stdout_buffer = StringIO()
@@ -113,15 +138,26 @@ def execute_code(code: str) -> Dict[str, str]:
     available_functions = {
         'get_site_info': get_site_info,
         'get_timeseries_data': get_timeseries_data,
-        'get_current_time': get_current_time
+        'get_current_time': get_current_time,
+        #analytics helpers
+        'load_site': load_site,
+        'load_series': load_series,
+        'load_frame': load_frame,
+        'Series': Series,
+        'Frame': Frame,
+        'EntityTable': EntityTable
     }
 
-    #execute the code snippet
-    exec(code, available_functions)
-
-    # Restore the original stdout
-    sys.stdout = original_stdout
-    sys.stderr = original_stderr
+    try:
+        #execute the code snippet
+        exec(code, available_functions)
+    except Exception:
+        #return the error so the model can fix the code
+        traceback.print_exc()
+    finally:
+        # Restore the original stdout
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
 
     # Get the captured output
     output = stdout_buffer.getvalue()
@@ -0,0 +1,557 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+
+#Analytics helpers preloaded into the execute_code namespace.
+#Timeseries are held as two typed columns (times and values) and site info as a
+#flat entity table with id, type and parent indexes, so the generated code can
+#aggregate months of 10 minute data and navigate the hierarchy in a few calls
+#instead of looping over list-of-dicts output and walking nested JSON.
+
+import json
+import math
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from tools.site_info import get_site_info, get_timeseries_data
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+#seconds per interval unit, eg: '10min', '1h', '1d'
+INTERVAL_UNITS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400, "w": 604800, "week": 604800}
+#parsed site info is reused by later tool calls in the same warm Lambda
+SITE_CACHE_SECONDS = 300
+#concurrent get_timeseries_data calls made by load_frame
+MAX_PARALLEL_REQUESTS = 8
+
+_site_cache: Dict[Tuple[str, str], Tuple[float, "EntityTable"]] = {}
+
+
+def parse_time(value: Union[int, float, str, datetime]) -> int:
+    """Unix timestamp from a timestamp, datetime or 'YYYY-MM-DD[ HH:MM[:SS]]' string"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(datetime.strptime(value, fmt).timestamp())
+        except ValueError:
+            pass
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def format_time(timestamp: int) -> str:
+    """'YYYY-MM-DD HH:MM:SS' string of a unix timestamp, as get_timeseries_data expects"""
+    return time.strftime(TIME_FORMAT, time.localtime(timestamp))
+
+
+def parse_interval(interval: Union[int, float, str]) -> int:
+    """Seconds in an interval given as seconds or as a string like '10min', '1h', '1d'"""
+    if isinstance(interval, (int, float)):
+        return int(interval)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)?\s*([a-zA-Z]+)\s*", interval)
+    unit = match.group(2).lower() if match else ""
+    #plurals, eg: '2hours', '15mins'
+    unit = unit if unit in INTERVAL_UNITS else unit[:-1] if unit.endswith("s") else unit
+    if unit not in INTERVAL_UNITS:
+        raise ValueError(f"Unknown interval '{interval}', use eg: '10min', '1h', '1d' or seconds")
+    return int(float(match.group(1) or 1) * INTERVAL_UNITS[unit])
+
+
+def _mean(values) -> float:
+    return math.fsum(values) / len(values) if len(values) else math.nan
+
+
+def _std(values) -> float:
+    #sample standard deviation, like pandas
+    if len(values) < 2:
+        return math.nan
+    mean = _mean(values)
+    return math.sqrt(math.fsum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+
+def _quantile(values, q: float) -> float:
+    #linear interpolation between the closest ranks, like pandas
+    if not len(values):
+        return math.nan
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+AGGREGATES: Dict[str, Callable[[Any], float]] = {
+    "mean": _mean,
+    "min": lambda v: min(v) if len(v) else math.nan,
+    "max": lambda v: max(v) if len(v) else math.nan,
+    "sum": math.fsum,
+    "count": len,
+    "std": _std,
+    "median": lambda v: _quantile(v, 0.5),
+    "first": lambda v: v[0] if len(v) else math.nan,
+    "last": lambda v: v[-1] if len(v) else math.nan,
+}
+
+
+def _aggregate(how: Union[str, Callable]) -> Callable:
+    if callable(how):
+        return how
+    if how not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{how}', use one of {', '.join(AGGREGATES)} or a function")
+    return AGGREGATES[how]
+
+
+class Series:
+    """
+    A timeseries as two columns sorted by time: times (unix seconds) and values (floats).
+
+    Example:
+        >>> s = load_series(sensor_id, "temperature", "2024-01-01 00:00:00", "2024-03-31 23:59:59")
+        >>> s.mean(), s.max(), s.idxmax()
+        >>> s.resample("1d", "max").to_records()
+        >>> s.between("2024-02-01", "2024-02-08").above(24).duration()
+    """
+
+    def __init__(self, times: Iterable[int] = (), values: Iterable[float] = (), name: str = ""):
+        self.times = array("q", times)
+        self.values = array("d", values)
+        self.name = name
+
+    @classmethod
+    def from_records(cls, data: Any, name: str = "") -> "Series":
+        """Build from get_timeseries_data output: {"data": [{"time": .., "value": ..}]}, its list or JSON string"""
+        if isinstance(data, str):
+            data = json.loads(data)
+        if isinstance(data, dict):
+            data = data.get("data", [])
+        records = [r for r in data if r.get("value") is not None]
+        times = array("q", (int(r["time"]) for r in records))
+        if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+            records.sort(key=lambda r: r["time"])
+            times = array("q", (int(r["time"]) for r in records))
+        series = cls(name=name)
+        series.times = times
+        series.values = array("d", (float(r["value"]) for r in records))
+        return series
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return zip(self.times, self.values)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return f"Series({self.name!r}, empty)"
+        return (f"Series({self.name!r}, {len(self)} points, {format_time(self.times[0])} to "
+                f"{format_time(self.times[-1])}, mean={self.mean():.3f})")
+
+    def _new(self, times, values, name: Optional[str] = None) -> "Series":
+        series = Series(name=self.name if name is None else name)
+        series.times = times if isinstance(times, array) else array("q", times)
+        series.values = values if isinstance(values, array) else array("d", values)
+        return series
+
+    # Aggregates
+
+    def mean(self) -> float:
+        return _mean(self.values)
+
+    def min(self) -> float:
+        return AGGREGATES["min"](self.values)
+
+    def max(self) -> float:
+        return AGGREGATES["max"](self.values)
+
+    def sum(self) -> float:
+        return math.fsum(self.values)
+
+    def count(self) -> int:
+        return len(self.values)
+
+    def std(self) -> float:
+        return _std(self.values)
+
+    def median(self) -> float:
+        return _quantile(self.values, 0.5)
+
+    def quantile(self, q: float) -> float:
+        return _quantile(self.values, q)
+
+    def agg(self, how: Union[str, Callable] = "mean") -> float:
+        return _aggregate(how)(self.values)
+
+    def idxmax(self) -> str:
+        """Time of the maximum value"""
+        return format_time(self.times[self.values.index(max(self.values))])
+
+    def idxmin(self) -> str:
+        """Time of the minimum value"""
+        return format_time(self.times[self.values.index(min(self.values))])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "count": len(self),
+            "mean": self.mean(),
+            "min": self.min(),
+            "max": self.max(),
+            "std": self.std(),
+            "start": format_time(self.times[0]) if len(self) else None,
+            "end": format_time(self.times[-1]) if len(self) else None,
+        }
+
+    @property
+    def interval(self) -> int:
+        """Typical seconds between points (median spacing)"""
+        if len(self) < 2:
+            return 0
+        return int(_quantile([b - a for a, b in zip(self.times, self.times[1:])], 0.5))
+
+    # Selection
+
+    def between(self, start, end) -> "Series":
+        """Points with start <= time <= end"""
+        i = bisect_left(self.times, parse_time(start))
+        j = bisect_right(self.times, parse_time(end))
+        return self._new(self.times[i:j], self.values[i:j])
+
+    def where(self, predicate: Callable[[float], bool]) -> "Series":
+        keep = [i for i, v in enumerate(self.values) if predicate(v)]
+        return self._new((self.times[i] for i in keep), (self.values[i] for i in keep))
+
+    def above(self, threshold: float) -> "Series":
+        return self.where(lambda v: v > threshold)
+
+    def below(self, threshold: float) -> "Series":
+        return self.where(lambda v: v < threshold)
+
+    def duration(self, interval: Optional[Union[int, str]] = None) -> int:
+        """Seconds covered by the points, each counting for one sampling interval"""
+        return len(self) * (parse_interval(interval) if interval else self.interval or 0)
+
+    def head(self, n: int = 5) -> List[Dict[str, Any]]:
+        return self._new(self.times[:n], self.values[:n]).to_records()
+
+    def tail(self, n: int = 5) -> List[Dict[str, Any]]:
+        return self._new(self.times[-n:], self.values[-n:]).to_records()
+
+    def to_records(self, iso: bool = True, digits: Optional[int] = 3) -> List[Dict[str, Any]]:
+        return [
+            {"time": format_time(t) if iso else t, "value": round(v, digits) if digits is not None else v}
+            for t, v in zip(self.times, self.values)
+        ]
+
+    # Transformations
+
+    def _buckets(self, step: int):
+        """(bucket start, i, j) for every non-empty bucket of step seconds, values[i:j] in it"""
+        n = len(self.times)
+        i = 0
+        while i < n:
+            start = self.times[i] - self.times[i] % step
+            j = bisect_left(self.times, start + step, i)
+            yield start, i, j
+            i = j
+
+    def resample(self, interval: Union[int, str], how: Union[str, Callable] = "mean") -> "Series":
+        """Aggregate into fixed buckets (eg: '1h', '1d', aligned to the epoch); empty buckets are skipped"""
+        step = parse_interval(interval)
+        aggregate = _aggregate(how)
+        times, values = array("q"), array("d")
+        for start, i, j in self._buckets(step):
+            times.append(start)
+            values.append(aggregate(self.values[i:j]))
+        return self._new(times, values)
+
+    def group_by(self, key: str = "hour", how: Union[str, Callable] = "mean") -> Dict[Any, float]:
+        """Aggregate by 'hour' (0-23), 'weekday' (0=Monday), 'date' or 'month' of the local time, eg: daily profiles"""
+        key_of = {
+            "hour": lambda t: t.tm_hour,
+            "weekday": lambda t: t.tm_wday,
+            "date": lambda t: time.strftime("%Y-%m-%d", t),
+            "month": lambda t: time.strftime("%Y-%m", t),
+        }[key]
+        groups: Dict[Any, array] = {}
+        #points within the same hour share a key, so resolve keys per hour, not per point
+        for start, i, j in self._buckets(3600):
+            groups.setdefault(key_of(time.localtime(start)), array("d")).extend(self.values[i:j])
+        aggregate = _aggregate(how)
+        return {k: aggregate(v) for k, v in sorted(groups.items())}
+
+    def rolling(self, window: Union[int, str], how: Union[str, Callable] = "mean") -> "Series":
+        """Trailing window aggregate at every point; window is a number of points or a duration like '1h'"""
+        n = len(self.values)
+        if isinstance(window, int):
+            starts = [max(0, i - window + 1) for i in range(n)]
+        else:
+            span = parse_interval(window)
+            starts = [bisect_right(self.times, t - span) for t in self.times]
+
+        if how in ("mean", "sum", "count"):
+            #prefix sums make every window O(1)
+            prefix = list(accumulate(self.values, initial=0.0))
+            if how == "sum":
+                values = (prefix[i + 1] - prefix[s] for i, s in enumerate(starts))
+            elif how == "count":
+                values = (i + 1 - s for i, s in enumerate(starts))
+            else:
+                values = ((prefix[i + 1] - prefix[s]) / (i + 1 - s) for i, s in enumerate(starts))
+        else:
+            aggregate = _aggregate(how)
+            values = (aggregate(self.values[s:i + 1]) for i, s in enumerate(starts))
+        return self._new(array("q", self.times), values)
+
+    def diff(self) -> "Series":
+        """Change from the previous point"""
+        return self._new(self.times[1:], (b - a for a, b in zip(self.values, self.values[1:])))
+
+    def apply(self, function: Callable[[float], float]) -> "Series":
+        return self._new(array("q", self.times), (function(v) for v in self.values))
+
+
+class Frame:
+    """
+    Series of several entities for the same property, eg: the temperature of every zone on a floor.
+
+    Example:
+        >>> frame = load_frame(site.of_type("TemperatureSensor", under=floor["id"]), "temperature", start, end)
+        >>> frame.rank("max")[:3]
+        >>> frame.resample("1d", "mean").combine("mean").to_records()
+    """
+
+    def __init__(self, series: Union[Dict[str, Series], Iterable[Series]]):
+        items = series.values() if isinstance(series, dict) else series
+        self.columns: Dict[str, Series] = {}
+        for s in items:
+            #keep every series, numbering repeated names: 'a', 'a (2)', ...
+            name, n = s.name, 1
+            while name in self.columns:
+                n += 1
+                name = f"{s.name} ({n})"
+            self.columns[name] = s if name == s.name else s._new(s.times, s.values, name)
+
+    def __getitem__(self, name: str) -> Series:
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns.values())
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __repr__(self) -> str:
+        return f"Frame({len(self)} series: {', '.join(list(self.columns)[:5])}{', ...' if len(self) > 5 else ''})"
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def agg(self, how: Union[str, Callable] = "mean") -> Dict[str, float]:
+        """One aggregate per series"""
+        aggregate = _aggregate(how)
+        return {name: aggregate(s.values) for name, s in self.columns.items()}
+
+    def rank(self, how: Union[str, Callable] = "mean", descending: bool = True) -> List[Tuple[str, float]]:
+        """(name, aggregate) pairs sorted by the aggregate"""
+        return sorted(self.agg(how).items(), key=lambda item: item[1], reverse=descending)
+
+    def resample(self, interval: Union[int, str], how: Union[str, Callable] = "mean") -> "Frame":
+        return Frame(s.resample(interval, how) for s in self)
+
+    def between(self, start, end) -> "Frame":
+        return Frame(s.between(start, end) for s in self)
+
+    def combine(self, how: Union[str, Callable] = "mean", name: str = "combined") -> Series:
+        """Aggregate across the series at every timestamp they share, eg: the floor average over time"""
+        if not self.columns:
+            return Series(name=name)
+        common = set(next(iter(self)).times)
+        for s in self:
+            common.intersection_update(s.times)
+        times = sorted(common)
+        lookups = [dict(zip(s.times, s.values)) for s in self]
+        aggregate = _aggregate(how)
+        return Series(times, (aggregate([lookup[t] for lookup in lookups]) for t in times), name)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [s.summary() for s in self]
+
+
+class EntityTable:
+    """
+    The site hierarchy from get_site_info as a flat table of entities, indexed by id, type and parent.
+
+    Each row is a dict with id, name, type, label, entity_type, parent_id, depth and
+    path (names from the root, joined with '/'). Type names are matched case-insensitively.
+
+    Example:
+        >>> site = load_site("s123")
+        >>> floor = site.find("First Floor")
+        >>> len(site.of_type("Zone", under=floor["id"]))
+        >>> site.ancestor_of_type(sensor_id, "Floor")["name"]
+        >>> site.count_by_type()
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        #rows are in depth-first order, so an entity's descendants follow it up to
+        #the first row at the same or a lower depth
+        self.rows = rows
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_type: Dict[str, List[Dict[str, Any]]] = {}
+        self.children_by_id: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._position: Dict[str, int] = {}
+        self._end: Dict[str, int] = {}
+        open_rows: List[Tuple[int, str]] = []
+        for position, row in enumerate(rows):
+            self.by_id[row["id"]] = row
+            self._position[row["id"]] = position
+            self.by_type.setdefault(row["type"].lower(), []).append(row)
+            self.children_by_id.setdefault(row["parent_id"], []).append(row)
+            while open_rows and open_rows[-1][0] >= row["depth"]:
+                self._end[open_rows.pop()[1]] = position
+            open_rows.append((row["depth"], row["id"]))
+        for _, entity_id in open_rows:
+            self._end[entity_id] = len(rows)
+
+    @classmethod
+    def from_site_info(cls, site_info: Union[str, Dict[str, Any]]) -> "EntityTable":
+        """Flatten get_site_info output (its JSON string or the parsed dict)"""
+        root = json.loads(site_info) if isinstance(site_info, str) else site_info
+        rows = []
+        if not root:
+            return cls(rows)
+        stack = [(root, None, 0, "")]
+        while stack:
+            node, parent_id, depth, parent_path = stack.pop()
+            entity = node.get("entity", node)
+            node_id = entity.get("id", {})
+            row = {
+                "id": node_id.get("id") if isinstance(node_id, dict) else node_id,
+                "name": entity.get("name", ""),
+                "type": entity.get("type", ""),
+                "label": entity.get("label", ""),
+                "entity_type": node_id.get("entityType") if isinstance(node_id, dict) else None,
+                "parent_id": parent_id,
+                "depth": depth,
+                "path": f"{parent_path}/{entity.get('name', '')}" if parent_path else entity.get("name", ""),
+            }
+            rows.append(row)
+            children = entity.get("children", []) or []
+            for child in reversed(children):
+                stack.append((child, row["id"], depth + 1, row["path"]))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self) -> str:
+        return f"EntityTable({len(self)} entities: {dict(self.count_by_type())})"
+
+    @property
+    def types(self) -> List[str]:
+        return sorted({row["type"] for row in self.rows})
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(entity_id)
+
+    def find(self, name: str, entity_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Entity by name or label: an exact (case-insensitive) match first, then a partial one"""
+        candidates = self.of_type(entity_type) if entity_type else self.rows
+        needle = name.lower()
+        for row in candidates:
+            if needle in (row["name"].lower(), str(row["label"]).lower()):
+                return row
+        return next((row for row in candidates if needle in row["name"].lower()), None)
+
+    def of_type(self, entity_type: str, under: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entities of a type, optionally only those below the entity with id `under`"""
+        if under is not None:
+            return self.descendants(under, entity_type)
+        return list(self.by_type.get(entity_type.lower(), []))
+
+    def children(self, entity_id: str, entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self.children_by_id.get(entity_id, [])
+        return [row for row in rows if entity_type is None or row["type"].lower() == entity_type.lower()]
+
+    def descendants(self, entity_id: str, entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        position = self._position[entity_id]
+        rows = self.rows[position + 1:self._end[entity_id]]
+        return [row for row in rows if entity_type is None or row["type"].lower() == entity_type.lower()]
+
+    def parent(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(self.by_id[entity_id]["parent_id"])
+
+    def ancestors(self, entity_id: str) -> List[Dict[str, Any]]:
+        """Parent first, root last"""
+        result = []
+        row = self.parent(entity_id)
+        while row is not None:
+            result.append(row)
+            row = self.parent(row["id"])
+        return result
+
+    def ancestor_of_type(self, entity_id: str, entity_type: str) -> Optional[Dict[str, Any]]:
+        """eg: the Floor of a TemperatureSensor"""
+        return next((row for row in self.ancestors(entity_id) if row["type"].lower() == entity_type.lower()), None)
+
+    def count_by_type(self, under: Optional[str] = None) -> Counter:
+        rows = self.descendants(under) if under is not None else self.rows
+        return Counter(row["type"] for row in rows)
+
+
+def load_site(site_id: str) -> EntityTable:
+    """get_site_info(site_id) as an EntityTable, reused for a few minutes by later calls"""
+    key = (site_id, os.environ.get('ID_TOKEN', ''))
+    cached = _site_cache.get(key)
+    if cached is not None and time.time() - cached[0] < SITE_CACHE_SECONDS:
+        return cached[1]
+    table = EntityTable.from_site_info(get_site_info(site_id))
+    _site_cache[key] = (time.time(), table)
+    return table
+
+
+def load_series(entity_id: str, property: str, start_time, end_time, name: Optional[str] = None) -> Series:
+    """get_timeseries_data(...) as a Series; times may be strings, datetimes or unix timestamps"""
+    response = get_timeseries_data(entity_id, property, format_time(parse_time(start_time)), format_time(parse_time(end_time)))
+    return Series.from_records(response, name=name or entity_id)
+
+
+def load_frame(entities: Iterable[Union[str, Dict[str, Any]]], property: str, start_time, end_time) -> Frame:
+    """
+    Series of several entities fetched in parallel. entities are ids or EntityTable rows;
+    series of rows are named after the entity, 'name (id)' when several share a name,
+    series of ids after the id.
+    """
+    targets = [(e["id"], e["name"]) if isinstance(e, dict) else (e, e) for e in entities]
+    repeated = {name for name, count in Counter(name for _, name in targets).items() if count > 1}
+    targets = [(entity_id, f"{name} ({entity_id})" if name in repeated and name != entity_id else name)
+               for entity_id, name in targets]
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as pool:
+        series = list(pool.map(lambda target: load_series(target[0], property, start_time, end_time, target[1]), targets))
+    return Frame(series)
@@ -0,0 +1,93 @@
+"""
+Ring-Buffer Log Store for the Triage Backend
+Per-server bounded logs with sequence ids for cursor-based tailing
+"""
+
+import os
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+DEFAULT_LOG_CAPACITY = int(os.environ.get("TRIAGE_LOG_CAPACITY", "50"))  # entries kept per server
+
+
+class LogStore:
+    """Fixed-size per-server log buffers with monotonically increasing sequence ids.
+
+    Every appended entry gets a ``seq`` one higher than the last, across all
+    servers, so clients can ask for everything after the last id they saw
+    instead of re-downloading every buffer. Old entries fall off each
+    server's deque once ``capacity`` is reached. Async waiters are woken
+    when new entries arrive, which backs the long-poll and SSE endpoints.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LOG_CAPACITY):
+        self.capacity = capacity
+        self.last_seq = 0
+        self._buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def append(self, server_name: str, entry: Dict[str, Any], allow_duplicate: bool = False) -> Optional[int]:
+        """Add an entry, returning its sequence id or None if it repeated the previous message"""
+        with self._lock:
+            buffer = self._buffers.get(server_name)
+            if buffer is None:
+                buffer = self._buffers[server_name] = deque(maxlen=self.capacity)
+            elif buffer and not allow_duplicate and buffer[-1].get("message") == entry.get("message"):
+                return None
+            self.last_seq += 1
+            entry["seq"] = self.last_seq
+            buffer.append(entry)
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+        return entry["seq"]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Every buffered entry grouped by server"""
+        with self._lock:
+            return {server: list(buffer) for server, buffer in self._buffers.items()}
+
+    def since(self, seq: int = 0, server_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entries newer than seq, oldest first"""
+        with self._lock:
+            if server_name is not None:
+                buffers = [self._buffers.get(server_name, ())]
+            else:
+                buffers = list(self._buffers.values())
+            entries = []
+            for buffer in buffers:
+                # Buffers are in seq order, so walk back from the newest entry
+                for index in range(len(buffer) - 1, -1, -1):
+                    if buffer[index]["seq"] <= seq:
+                        break
+                    entries.append(buffer[index])
+        entries.sort(key=lambda entry: entry["seq"])
+        return entries
+
+    def clear(self):
+        """Drop every entry, sequence ids keep increasing so cursors stay valid"""
+        with self._lock:
+            self._buffers.clear()
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until an entry newer than seq exists, returning False on timeout"""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self.last_seq > seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
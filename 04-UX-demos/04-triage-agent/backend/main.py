@@ -27,10 +27,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from dataclasses import dataclass, asdict, field
-import re
 
 # Strands imports
 from strands import Agent
@@ -38,13 +37,20 @@ from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
 from mcp import StdioServerParameters, stdio_client
 from mcpmanager import mcp_manager
+from session_store import SessionStore, SpillStore, DEFAULT_SPILL_PATH, estimate_json_size
+from stream_parser import DecisionTreeTagScanner
+from tree_index import DecisionTreeIndex
+from log_store import LogStore
+from usage_metrics import UsageMetrics, usage_from_strands
+from sse import DONE, coalesced_sse, encode_event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Store server logs
-server_logs: Dict[str, List[str]] = {}
+server_logs = LogStore()
+LOG_STREAM_KEEPALIVE = 15  # seconds between SSE keep-alive comments
 mcp_servers = {}  # Initialize early to avoid loading issues
 mcp_clients = {}  # Store MCP client instances
 
@@ -61,30 +67,53 @@ def add_server_log(server_name: str, message: str, level: str = "info", details:
         "details": details or {}
     }
     
-    if server_name not in server_logs:
-        server_logs[server_name] = []
-    
     # Prevent duplicate consecutive messages (but allow tool executions)
-    if server_logs[server_name] and not message.startswith("Executing "):
-        last_log = server_logs[server_name][-1]
-        if isinstance(last_log, dict) and last_log.get("message") == message:
-            return  # Skip duplicate message
-    
-    server_logs[server_name].append(log_entry)
-    
-    # Keep only last 50 logs per server
-    if len(server_logs[server_name]) > 50:
-        server_logs[server_name] = server_logs[server_name][-50:]
-
-# Global agent cache - session-based
-session_agents = {}
+    server_logs.append(server_name, log_entry, allow_duplicate=message.startswith("Executing "))
+
+# Remove <decision_tree_status> tags from streamed content instead of leaving it to the frontend
+STRIP_CONTROL_TAGS = os.environ.get("TRIAGE_STRIP_CONTROL_TAGS", "false").lower() == "true"
+
+# Answer verbatim quick-response clicks from the tree without calling the model
+FAST_PATH_ENABLED = os.environ.get("TRIAGE_FAST_PATH", "true").lower() == "true"
+
+# Quick-response options containing these words are flagged as high urgency
+URGENT_OPTION_KEYWORDS = ("emergency", "severe", "urgent", "call 911", "immediate")
+
+# Sessions evicted from memory are spilled here and rehydrated on return
+SESSION_SWEEP_INTERVAL = 60  # seconds between idle-session sweeps
+try:
+    session_spill = SpillStore(DEFAULT_SPILL_PATH)
+except Exception as e:
+    logger.error(f"Session spill store unavailable, evicted sessions will be dropped: {e}")
+    session_spill = None
+
+def _agent_messages_size(agent) -> int:
+    return estimate_json_size(getattr(agent, 'messages', []))
+
+def _serialize_agent(agent) -> Dict[str, Any]:
+    return {"messages": getattr(agent, 'messages', [])}
+
+def _restore_agent(agent_key: str, payload: Dict[str, Any]):
+    _, model_id = agent_key.split(":", 1)
+    agent = create_session_agent(model_id)
+    agent.messages = payload.get("messages", [])
+    return agent
+
+# Global agent cache - session-based, bounded by count, idle time and memory
+session_agents = SessionStore(
+    "agents",
+    size_of=_agent_messages_size,
+    spill=session_spill,
+    serializer=_serialize_agent,
+    loader=_restore_agent
+)
 
 # Global tools cache
 cached_tools = []
 tools_last_updated = None
 
-# Session token tracking
-session_token_usage = {}  # session_id -> {"total_input": int, "total_output": int}
+# Token usage, latency and cost as reported by the model
+usage_metrics = UsageMetrics()
 
 # Global decision tree instance
 decision_tree = None
@@ -129,12 +158,31 @@ class ConversationState:
     last_updated: datetime = field(default_factory=datetime.now)
     last_user_input: str = ""
 
+def _serialize_conversation(state: ConversationState) -> Dict[str, Any]:
+    data = asdict(state)
+    data["created_at"] = state.created_at.isoformat()
+    data["last_updated"] = state.last_updated.isoformat()
+    return data
+
+def _restore_conversation(session_id: str, payload: Dict[str, Any]) -> ConversationState:
+    payload = dict(payload)
+    payload["created_at"] = datetime.fromisoformat(payload["created_at"])
+    payload["last_updated"] = datetime.fromisoformat(payload["last_updated"])
+    return ConversationState(**payload)
+
 class DecisionTree:
     """Manages the decision tree logic and conversation states, self-contained within main.py."""
     
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, spill: Optional[SpillStore] = None):
         self.nodes: Dict[str, DecisionNode] = {}
-        self.conversations: Dict[str, ConversationState] = {}
+        self.index: Optional[DecisionTreeIndex] = None
+        self.conversations = SessionStore(
+            "conversations",
+            size_of=lambda state: estimate_json_size(_serialize_conversation(state)),
+            spill=spill,
+            serializer=_serialize_conversation,
+            loader=_restore_conversation
+        )
         self.data_file = data_file
         self.load_data()
     
@@ -146,6 +194,7 @@ class DecisionTree:
             
             for node_id, node_data in data['nodes'].items():
                 self.nodes[node_id] = DecisionNode(**node_data)
+            self.index = DecisionTreeIndex(self.nodes)
             
             logger.info(f"Loaded {len(self.nodes)} decision tree nodes")
         except Exception as e:
@@ -217,16 +266,13 @@ add_server_log("system", f"MCP Manager initialized with clients: {mcp_manager.ge
 # Pre-load tools cache
 refresh_tools_cache()
 
-def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
-    """Get or create a cached agent for the given session and model"""
-    agent_key = f"{session_id}:{model_id}"
+def create_session_agent(model_id: str) -> Agent:
+    """Build a fresh agent for the given model with the cached tools"""
+    model = BedrockModel(model_id=model_id, temperature=0.7)
+    tools = get_cached_tools()
     
-    if agent_key not in session_agents:
-        model = BedrockModel(model_id=model_id, temperature=0.7)
-        tools = get_cached_tools()
-        
-        # General purpose prompt. Specific instructions will be provided in each call.
-        system_prompt = """You are a helpful and empathetic AI Triage Assistant.
+    # General purpose prompt. Specific instructions will be provided in each call.
+    system_prompt = """You are a helpful and empathetic AI Triage Assistant.
 Your goal is to guide users through a structured assessment.
 You must follow the specific instructions given in each prompt precisely.
 Always provide your response in a clear, conversational, and professional manner.
@@ -238,22 +284,42 @@ FORMATTING GUIDELINES:
 - Highlight urgent situations with appropriate emphasis
 - Make important medical advice stand out visually
 """
-        
-        agent = Agent(model=model, system_prompt=system_prompt, tools=tools)
+    
+    return Agent(model=model, system_prompt=system_prompt, tools=tools)
+
+def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
+    """Get or create a cached agent for the given session and model"""
+    agent_key = f"{session_id}:{model_id}"
+    
+    agent = session_agents.get(agent_key)
+    if agent is None:
+        agent = create_session_agent(model_id)
         session_agents[agent_key] = agent
         add_server_log("system", f"Session agent cached for {session_id}:{model_id}")
     
-    return session_agents[agent_key]
+    return agent
+
+async def sweep_sessions_periodically():
+    """Evict idle sessions even when no request touches the stores"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        try:
+            evicted = session_agents.sweep()
+            if decision_tree:
+                evicted += decision_tree.conversations.sweep()
+            if evicted:
+                add_server_log("system", f"Evicted {evicted} idle sessions", level="info", details={"evicted": evicted})
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
 
 def get_session_messages_for_ui(session_id: str, model_id: str) -> List[Dict]:
     """Get session messages formatted for UI from the actual agent"""
     agent_key = f"{session_id}:{model_id}"
     
-    if agent_key not in session_agents:
+    agent = session_agents.get(agent_key)
+    if agent is None:
         return []
     
-    agent = session_agents[agent_key]
-    
     # Get messages from agent.messages
     if not hasattr(agent, 'messages') or not agent.messages:
         return []
@@ -375,13 +441,6 @@ def save_mcp_config(servers_config):
         logger.error(f"Error saving MCP config: {e}")
         add_server_log("system", f"Error saving config: {e}")
 
-def estimate_tokens(text: str) -> int:
-    """Estimate token count (rough approximation: ~4 chars per token)"""
-    if not text:
-        return 0
-    # Simple and conservative estimation: 4 characters per token
-    return max(1, len(text) // 4)
-
 def setup_mcp_servers():
     """Setup MCP servers using stdio transport"""
     global mcp_clients
@@ -622,8 +681,7 @@ async def stream_plain_text_response_generator(text: str, model_id: str, tokens:
             "type": "textDelta",
             "text": f" {word}" if i > 0 else word,
         }
-        yield f"data: {json.dumps(chunk_data)}\n\n"
-        await asyncio.sleep(0.02)
+        yield encode_event(chunk_data)
 
     # Send final message with token usage
     final_chunk = {
@@ -631,16 +689,70 @@ async def stream_plain_text_response_generator(text: str, model_id: str, tokens:
         "delta": {"role": "assistant"},
         "usage": {"output_tokens": tokens.get("output", 0)}
     }
-    yield f"data: {json.dumps(final_chunk)}\n\n"
+    yield encode_event(final_chunk)
 
     # Send message stop
     stop_chunk = {
         "type": "messageStop",
     }
-    yield f"data: {json.dumps(stop_chunk)}\n\n"
+    yield encode_event(stop_chunk)
+
+def build_option_tags(options: List[str]) -> List[str]:
+    """<option> tags for a node's quick responses, urgent ones flagged, always ending with "Other"."""
+    if not options:
+        return [
+            '<option urgency="normal">Continue with assessment</option>',
+            '<option urgency="normal">Go back to previous step</option>',
+            '<option urgency="normal">Other</option>',
+        ]
+    tags = []
+    for option in options:
+        urgency = "high" if any(keyword in option.lower() for keyword in URGENT_OPTION_KEYWORDS) else "normal"
+        tags.append(f'<option urgency="{urgency}">{option}</option>')
+    # Always add "Other" option for free-form chat
+    tags.append('<option urgency="normal">Other</option>')
+    return tags
+
+def stream_fast_path_response(session_id: str, model_id: str, message: str, current_node: DecisionNode, next_node_id: str):
+    """Advance the session along an unambiguous edge and yield the next node's events"""
+    next_node = decision_tree.nodes[next_node_id]
+    
+    # Pin the session so it cannot be evicted while the turn is applied
+    with session_agents.in_use(f"{session_id}:{model_id}"), \
+            decision_tree.conversations.in_use(session_id):
+        state = decision_tree.conversations[session_id]
+        state.user_responses[current_node.id] = message
+        state.last_user_input = message
+        
+        decision_tree.set_current_node(session_id, next_node_id)
+        yield {'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True}
+        
+        status_tag = f'<decision_tree_status next_node="{next_node_id}" action="Moving to next assessment step" />'
+        options = "\n".join(build_option_tags(next_node.response_options))
+        options_xml = f"\n<available_options>\n{options}\n</available_options>"
+        question = next_node.ui_display or next_node.question
+        response_text = f"{question}\n\n{status_tag}{options_xml}"
+        yield {'type': 'content', 'content': f"{question}\n{options_xml}" if STRIP_CONTROL_TAGS else response_text}
+        
+        # Keep the agent's history in step so later model turns see this exchange
+        agent = get_or_create_session_agent(session_id, model_id)
+        agent.messages.append({"role": "user", "content": [{"text": message}]})
+        agent.messages.append({"role": "assistant", "content": [{"text": response_text}]})
+    
+    add_server_log("triage", f"FAST PATH: {session_id} - {current_node.id} -> {next_node_id}", level="info", details={
+        "session_id": session_id,
+        "old_node": current_node.id,
+        "new_node": next_node_id,
+        "option": message
+    })
+    usage_metrics.record_fast_path()
+    yield DONE
 
 async def stream_ai_response_with_images(message: str, model_id: str, session_id: str = "default", images: List[ImageData] = None, history: List[Dict[str, Any]] = None):
-    """Complete streaming with decision tree, XML processing, and node updates"""
+    """Complete streaming with decision tree, XML processing, and node updates.
+    
+    Yields event dicts (and DONE); coalesced_sse turns them into SSE frames.
+    """
     global decision_tree
     
     try:
@@ -655,7 +767,7 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
                 "timestamp": datetime.now().isoformat()
             })
             # Send initial UI reload signal for left sidebar
-            yield f"data: {json.dumps({'type': 'session_started', 'session_id': session_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
+            yield {'type': 'session_started', 'session_id': session_id, 'reload_left_ui': True, 'call_status_api': True}
         
         # Get current node info from decision tree
         state = decision_tree.conversations[session_id]
@@ -670,12 +782,24 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
             "should_reason": current_node.should_reason
         })
         
+        # Button answers that map onto a single child skip the model entirely,
+        # unless the node asks for reasoning about the answer
+        if FAST_PATH_ENABLED and not images and not current_node.should_reason:
+            fast_path_node_id = decision_tree.index.unambiguous_route(current_node.id, message)
+            if fast_path_node_id:
+                for chunk in stream_fast_path_response(session_id, model_id, message, current_node, fast_path_node_id):
+                    yield chunk
+                return
+        
         add_server_log("triage", f"GETTING MCP CONTEXT: {session_id}", level="info", details={
             "session_id": session_id,
             "active_clients": mcp_manager.get_active_clients() if hasattr(mcp_manager, 'get_active_clients') else []
         })
         
-        with mcp_manager.get_active_context():
+        # Pin the session so it cannot be evicted while the turn is streaming
+        with mcp_manager.get_active_context(), \
+                session_agents.in_use(f"{session_id}:{model_id}"), \
+                decision_tree.conversations.in_use(session_id):
             add_server_log("triage", f"MCP CONTEXT ACQUIRED: {session_id}", level="info")
             
             agent = get_or_create_session_agent(session_id, model_id)
@@ -687,44 +811,8 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
                 "tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0
             })
             
-            # Dynamic next node selection based on decision tree structure
-            def get_next_node_options(current_node, user_message):
-                """Determine possible next nodes based on current node structure and user input"""
-                
-                # If it's a terminal node, stay at current node
-                if current_node.is_terminal:
-                    return current_node.id
-                
-                # If current node has specific routing logic based on response options
-                if current_node.response_options and current_node.children:
-                    # Create mapping between response options and children
-                    if len(current_node.children) == 1:
-                        # Single child - go to that child
-                        return current_node.children[0]
-                    elif len(current_node.children) == len(current_node.response_options):
-                        # Each response option maps to a child
-                        for i, option in enumerate(current_node.response_options):
-                            if any(keyword.lower() in user_message.lower() for keyword in option.lower().split()):
-                                return current_node.children[i]
-                        # Default to first child if no match
-                        return current_node.children[0]
-                    else:
-                        # Complex routing - let AI decide based on reasoning
-                        children_info = []
-                        for child_id in current_node.children:
-                            child_node = decision_tree.nodes.get(child_id)
-                            if child_node:
-                                children_info.append(f"{child_id}: {child_node.topic}")
-                        return children_info  # Return list for AI to choose from
-                
-                # If no children, stay at current node
-                if not current_node.children:
-                    return current_node.id
-                
-                # Default to first child
-                return current_node.children[0]
-            
-            next_node_candidate = get_next_node_options(current_node, message)
+            # Dynamic next node selection from the precompiled routing index
+            next_node_candidate = decision_tree.index.route(current_node.id, message)
             
             # Build comprehensive prompt based on decision tree context
             decision_context = f"""
@@ -775,15 +863,7 @@ Replace CHOSEN_NODE_ID with the most appropriate node from the available options
                 # Always generate available_options XML - either from next node or fallback options
                 available_options_xml = ""
                 if next_node_options:
-                    options_list = []
-                    for option in next_node_options:
-                        # Determine urgency based on keywords
-                        urgency = "high" if any(keyword in option.lower() for keyword in 
-                                              ["emergency", "severe", "urgent", "call 911", "immediate"]) else "normal"
-                        options_list.append(f'<option urgency="{urgency}">{option}</option>')
-                    
-                    # Always add "Other" option for free-form chat
-                    options_list.append('<option urgency="normal">Other</option>')
+                    options_list = build_option_tags(next_node_options)
                     
                     available_options_xml = f"""
 
@@ -818,8 +898,6 @@ IMPORTANT FORMATTING RULES:
 Respond with guidance followed by EXACTLY this XML format:
 <decision_tree_status next_node="{next_node_candidate}" action="Moving to next assessment step" />{available_options_xml}"""
             
-            accumulated_response = ""
-            
             add_server_log("triage", f"STARTING LLM STREAM: {session_id}", level="info", details={
                 "session_id": session_id,
                 "prompt_length": len(unified_prompt),
@@ -829,49 +907,65 @@ Respond with guidance followed by EXACTLY this XML format:
             
             # Simplified Strands streaming - process events as they come
             xml_processed = False
-            xml_buffer = ""  # Buffer to handle XML tags split across chunks
+            tag_scanner = DecisionTreeTagScanner(strip_tags=STRIP_CONTROL_TAGS)
+            stream_started = time.perf_counter()
+            first_token_seen = False
             try:
                 async for event in agent.stream_async(unified_prompt):
                     if "data" in event:
                         text_data = event["data"]
-                        accumulated_response += text_data
-
-                        # Add to XML buffer for processing
-                        xml_buffer += text_data
+                        if not first_token_seen:
+                            first_token_seen = True
+                            usage_metrics.record_ttft(model_id, time.perf_counter() - stream_started)
 
-                        # Check for XML in accumulated response for node transitions
-                        if not xml_processed:
-                            decision_tree_match = re.search(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>', accumulated_response)
-                            if decision_tree_match:
-                                xml_processed = True
-                                next_node_id = decision_tree_match.group(1)
+                        # Scan only the new chunk (plus any unfinished tag) for node transitions
+                        content, tags = tag_scanner.feed(text_data)
+                        for tag in tags:
+                            next_node_id = tag.get("next_node")
+                            if xml_processed or not next_node_id:
+                                continue
+                            xml_processed = True
 
-                                add_server_log("triage", f"XML DETECTED: {session_id} -> {next_node_id}", level="info")
+                            add_server_log("triage", f"XML DETECTED: {session_id} -> {next_node_id}", level="info")
 
-                                if next_node_id in decision_tree.nodes:
-                                    decision_tree.set_current_node(session_id, next_node_id)
-                                    yield f"data: {json.dumps({'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
+                            if next_node_id in decision_tree.nodes:
+                                decision_tree.set_current_node(session_id, next_node_id)
+                                yield {'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True}
 
                         # Send all text - let frontend handle filtering
-                        if text_data.strip():
-                            yield f"data: {json.dumps({'type': 'content', 'content': text_data})}\n\n"
+                        if content:
+                            yield {'type': 'content', 'content': content}
 
                     elif "current_tool_use" in event and event["current_tool_use"].get("name"):
                         tool_name = event["current_tool_use"]["name"]
-                        yield f"data: {json.dumps({'type': 'tool_use', 'tool_name': tool_name})}\n\n"
+                        yield {'type': 'tool_use', 'tool_name': tool_name}
+
+                    elif "metadata" in event.get("event", {}):
+                        # One metadata event closes each model call with its actual usage
+                        metadata = event["event"]["metadata"]
+                        usage_metrics.record_call(
+                            session_id,
+                            model_id,
+                            usage_from_strands(metadata.get("usage", {})),
+                            metadata.get("metrics", {}).get("latencyMs")
+                        )
+
+                remaining = tag_scanner.flush()
+                if remaining.strip():
+                    yield {'type': 'content', 'content': remaining}
 
                 add_server_log("triage", f"STREAM COMPLETE: {session_id}", level="info")
 
             except Exception as llm_error:
                 add_server_log("triage", f"LLM STREAM ERROR: {session_id} - {str(llm_error)}", level="error")
-                yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(llm_error)}'})}\n\n"
+                yield {'type': 'content', 'content': f'Error: {str(llm_error)}'}
 
-        yield "data: [DONE]\n\n"
+        yield DONE
 
     except Exception as e:
         logger.error(f"Error in chat stream: {e}")
-        yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(e)}'})}\n\n"
-        yield "data: [DONE]\n\n"
+        yield {'type': 'content', 'content': f'Error: {str(e)}'}
+        yield DONE
 
 async def stream_plain_response(message: str, model_id: str):
     """A very simple streaming response for basic checks"""
@@ -884,8 +978,8 @@ async def stream_plain_response(message: str, model_id: str):
             temperature=0.7
         )
         
-        # Get tools from MCP manager
-        tools = mcp_manager.get_all_tools(active_only=True)
+        # Tools from the shared cache are bound to the pooled MCP sessions
+        tools = get_cached_tools()
         
         agent = Agent(
             model=model,
@@ -897,13 +991,15 @@ async def stream_plain_response(message: str, model_id: str):
             # Execute agent and get response
             response = agent(message)
             response_text = str(response)
+            usage_metrics.record_call(
+                "plain",
+                model_id,
+                usage_from_strands(response.metrics.accumulated_usage),
+                response.metrics.accumulated_metrics.get("latencyMs")
+            )
             
-            # Stream response in chunks
-            chunk_size = 40
-            for i in range(0, len(response_text), chunk_size):
-                chunk = response_text[i:i+chunk_size]
-                yield chunk
-                await asyncio.sleep(0.08)  # Small delay for streaming effect
+            # The answer is already complete, send it in one write
+            yield response_text
                 
     except Exception as e:
         error_msg = f"Error: {str(e)}"
@@ -961,12 +1057,45 @@ async def toggle_mcp_server(server_name: str, request: ToggleRequest):
     return {"success": True, "server": server_name, "enabled": enabled}
 
 @app.get("/mcp/logs")
-async def get_mcp_logs():
-    return server_logs
+async def get_mcp_logs(since: Optional[int] = None, server: Optional[str] = None, wait: float = 0):
+    """Get buffered logs, or only entries after the `since` cursor (optionally long-polling up to `wait` seconds)"""
+    if since is None:
+        return server_logs.snapshot()
+    
+    if wait > 0 and server_logs.last_seq <= since:
+        await server_logs.wait(since, min(wait, 60))
+    return {"entries": server_logs.since(since, server), "last_seq": server_logs.last_seq}
+
+@app.get("/mcp/logs/stream")
+async def stream_mcp_logs(request: Request, since: Optional[int] = None):
+    """Tail logs over SSE, resuming from `since` or the Last-Event-ID header"""
+    cursor = since
+    if cursor is None:
+        last_event_id = request.headers.get("last-event-id", "")
+        cursor = int(last_event_id) if last_event_id.isdigit() else 0
+    
+    async def log_event_generator(cursor: int):
+        while not await request.is_disconnected():
+            entries = server_logs.since(cursor)
+            for entry in entries:
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry)}\n\n"
+            if entries:
+                cursor = entries[-1]["seq"]
+            elif not await server_logs.wait(cursor, LOG_STREAM_KEEPALIVE):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        log_event_generator(cursor),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
 
 @app.delete("/mcp/logs")
 async def clear_mcp_logs():
-    global server_logs
     server_logs.clear()
     add_server_log("system", "Logs cleared")
     return {"message": "Logs cleared"}
@@ -1007,6 +1136,32 @@ async def get_mcp_tools_endpoint():
     except Exception as e:
         return {"error": str(e), "tools": [], "count": 0}
 
+@app.get("/mcp/pool")
+async def get_mcp_pool_status():
+    """Get the state of the pooled MCP sessions"""
+    return {
+        "active_clients": mcp_manager.get_active_clients(),
+        "sessions": mcp_manager.get_pool_status()
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Model usage metrics in Prometheus text format"""
+    return Response(content=usage_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/timeseries")
+async def get_metrics_timeseries(model_id: str):
+    """Per-minute calls and tokens for a model over the last hour"""
+    return {"model_id": model_id, "buckets": usage_metrics.timeseries(model_id)}
+
+@app.get("/api/metrics/sessions/{session_id}")
+async def get_session_metrics(session_id: str):
+    """Token usage and cost recorded for a session"""
+    usage = usage_metrics.session_usage(session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No usage recorded for session")
+    return usage
+
 @app.get("/agents/status")
 async def get_agents_status():
     """Get cached session agents status"""
@@ -1022,7 +1177,8 @@ async def get_agents_status():
     
     return {
         "session_agents": agents_info,
-        "count": len(session_agents)
+        "count": len(session_agents),
+        "store": session_agents.stats()
     }
 
 @app.post("/agents/refresh")
@@ -1036,14 +1192,16 @@ async def clear_session(session_id: str):
     """Clear a specific session's agent and triage session"""
     global session_agents, decision_tree
     
-    # Remove all agents for this session
-    keys_to_remove = [key for key in session_agents.keys() if key.startswith(f"{session_id}:")]
+    # Remove all agents for this session, in memory and spilled
+    keys_to_remove = {key for key in session_agents.keys() if key.startswith(f"{session_id}:")}
+    keys_to_remove.update(f"{session_id}:{model['id']}" for model in AVAILABLE_MODELS)
     for key in keys_to_remove:
-        del session_agents[key]
+        session_agents.discard(key)
+    
+    usage_metrics.forget_session(session_id)
     
     # Remove triage session if exists
-    if decision_tree and session_id in decision_tree.conversations:
-        del decision_tree.conversations[session_id]
+    if decision_tree and decision_tree.conversations.discard(session_id):
         add_server_log("triage", f"Cleared triage session: {session_id}")
     
     add_server_log("system", f"Cleared session: {session_id}")
@@ -1101,13 +1259,13 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
         if "text/event-stream" in accept_header:
             # Return SSE streaming response
             return StreamingResponse(
-                stream_ai_response_with_images(
+                coalesced_sse(stream_ai_response_with_images(
                     chat_message.message, 
                     chat_message.model_id, 
                     chat_message.session_id,
                     chat_message.images,
                     chat_message.history
-                ),
+                ), request),
                 media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
@@ -1125,13 +1283,13 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
         else:
             # Default SSE streaming
             return StreamingResponse(
-                stream_ai_response_with_images(
+                coalesced_sse(stream_ai_response_with_images(
                     chat_message.message, 
                     chat_message.model_id, 
                     chat_message.session_id,
                     chat_message.images,
                     chat_message.history
-                ),
+                ), request),
                 media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
@@ -1147,32 +1305,21 @@ async def chat_endpoint(chat_message: ChatMessage, request: Request):
 
 # Decision Tree Graph and Triage APIs
 @app.get("/api/decision-tree")
-async def get_decision_tree():
+async def get_decision_tree(request: Request):
     """Get the decision tree structure for visualization"""
     try:
-        tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
-        decision_tree = DecisionTree(tree_file)
+        if not decision_tree or not decision_tree.index:
+            raise HTTPException(status_code=503, detail="Decision tree not initialized")
         
-        # Convert decision tree to JSON-serializable format
-        tree_data = {}
-        for node_id, node in decision_tree.nodes.items():
-            tree_data[node_id] = {
-                "id": node.id,
-                "topic": node.topic,
-                "question": node.question,
-                "ui_display": node.ui_display,
-                "response_options": node.response_options,
-                "children": node.children,
-                "is_terminal": node.is_terminal,
-                "outcome": node.outcome
-            }
-        
-        return {
-            "nodes": tree_data,
-            "total_nodes": len(tree_data),
-            "entry_point": "start"
-        }
+        # Serve the pre-serialized tree, letting clients revalidate with the ETag
+        index = decision_tree.index
+        headers = {"ETag": index.etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == index.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=index.visualization_json, media_type="application/json", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         add_server_log("triage", f"Error getting decision tree: {str(e)}", level="error")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1256,24 +1403,12 @@ async def get_triage_system_status():
                 "tree": None
             }
         
-        # Convert decision tree to JSON-serializable format for visualization
-        tree_data = {}
-        for node_id, node in decision_tree.nodes.items():
-            tree_data[node_id] = {
-                "id": node.id,
-                "topic": node.topic,
-                "question": node.question,
-                "children": node.children,
-                "is_terminal": node.is_terminal,
-                "outcome": node.outcome
-            }
-        
         add_server_log("triage", f"Status returned: {len(decision_tree.nodes)} nodes loaded", level="info")
         
         return {
             "status": "online",
             "nodes_loaded": len(decision_tree.nodes) if decision_tree.nodes else 0,
-            "tree": {"nodes": tree_data},
+            "tree": decision_tree.index.status_tree,
             "message": "AI Triage Agent system ready"
         }
         
@@ -1300,17 +1435,21 @@ async def startup_event():
     # Initialize decision tree
     try:
         tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
-        decision_tree = DecisionTree(tree_file)
+        decision_tree = DecisionTree(tree_file, spill=session_spill)
         add_server_log("system", f"Decision Tree initialized: {len(decision_tree.nodes)} nodes loaded", level="info")
     except Exception as e:
         add_server_log("system", f"Decision Tree initialization failed: {str(e)}", level="error")
         decision_tree = None
+    
+    asyncio.create_task(sweep_sessions_periodically())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup MCP servers on shutdown"""
     add_server_log("system", "Shutting down MCP servers...")
-    # Clean shutdown for stdio-based servers happens automatically
+    mcp_manager.shutdown()
+    if session_spill:
+        session_spill.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -5,18 +5,160 @@ Based on Strands official documentation examples
 
 import os
 import json
+import time
+import asyncio
 import logging
-from contextlib import contextmanager, ExitStack
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Any
 from mcp import stdio_client, StdioServerParameters
 from strands.tools.mcp import MCPClient
 
 logger = logging.getLogger(__name__)
 
+# Pool defaults, overridable per server in mcp.json
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_IDLE_TIMEOUT = 600  # seconds without calls before a session is stopped
+HEALTH_CHECK_INTERVAL = 30  # seconds between reaper / health-check passes
+
+
+class PooledMCPClient(MCPClient):
+    """MCPClient that keeps its stdio session alive between requests.
+
+    The session is started lazily on first use and then shared by every
+    agent and tool call. Tool calls are capped at ``max_concurrency`` in
+    flight, the session is stopped after ``idle_timeout`` seconds without
+    calls and restarted in place if the server process dies, so tools that
+    were listed from this client stay valid across restarts.
+    """
+
+    def __init__(self, name: str, transport_callable, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        super().__init__(transport_callable)
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.idle_timeout = idle_timeout
+        self.restarts = 0
+        self.last_used = time.monotonic()
+        self._running = False
+        self._in_flight = 0
+        self._state_lock = threading.RLock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def is_alive(self) -> bool:
+        """Whether the background session thread is up"""
+        thread = getattr(self, "_background_thread", None)
+        return self._running and thread is not None and thread.is_alive()
+
+    def ensure_started(self):
+        """Start the session, restarting it if the server process has died"""
+        with self._state_lock:
+            if self._running and not self.is_alive():
+                logger.warning(f"MCP session {self.name} is down, restarting")
+                self._stop_session()
+                self.restarts += 1
+            if not self._running:
+                started = time.monotonic()
+                self.start()
+                self._running = True
+                logger.info(f"Started MCP session {self.name} in {time.monotonic() - started:.2f}s")
+            self.last_used = time.monotonic()
+
+    def close(self):
+        """Stop the session if it is running"""
+        with self._state_lock:
+            self._stop_session()
+
+    def reap_if_idle(self, now: Optional[float] = None) -> bool:
+        """Stop the session if no call is in flight and it has been idle too long"""
+        now = now if now is not None else time.monotonic()
+        with self._state_lock:
+            if self._running and self._in_flight == 0 and now - self.last_used > self.idle_timeout:
+                logger.info(f"Reaping idle MCP session {self.name}")
+                self._stop_session()
+                return True
+        return False
+
+    def health_check(self) -> bool:
+        """Probe a running session and restart it if it no longer responds"""
+        with self._state_lock:
+            if not self._running:
+                return True
+            if self._in_flight:
+                return self.is_alive()
+        try:
+            if not self.is_alive():
+                raise RuntimeError("session thread exited")
+            super().list_tools_sync()
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed for MCP session {self.name}: {e}")
+            with self._state_lock:
+                self._stop_session()
+                self.restarts += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the session state for status endpoints"""
+        return {
+            "running": self.is_alive(),
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "restarts": self.restarts,
+        }
+
+    def list_tools_sync(self, *args, **kwargs):
+        with self._checkout():
+            return super().list_tools_sync(*args, **kwargs)
+
+    def call_tool_sync(self, *args, **kwargs):
+        self._slots.acquire()
+        try:
+            with self._checkout():
+                return super().call_tool_sync(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+    async def call_tool_async(self, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            await asyncio.to_thread(self._slots.acquire)
+        try:
+            with self._checkout():
+                return await super().call_tool_async(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def _checkout(self):
+        # Starting and counting under one lock keeps the reaper from stopping
+        # the session between the liveness check and the call.
+        with self._state_lock:
+            self.ensure_started()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._in_flight -= 1
+                self.last_used = time.monotonic()
+
+    def _stop_session(self):
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self.stop(None, None, None)
+        except Exception as e:
+            logger.error(f"Error stopping MCP session {self.name}: {e}")
+
+
 class MCPClientManager:
     def __init__(self):
-        self.clients: Dict[str, MCPClient] = {}
+        self.clients: Dict[str, PooledMCPClient] = {}
         self.active_clients: List[str] = []
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
         
     def add_client(self, name: str, client: MCPClient):
         """Add an MCP client"""
@@ -28,7 +170,7 @@ class MCPClientManager:
     def remove_client(self, name: str):
         """Remove an MCP client"""
         if name in self.clients:
-            del self.clients[name]
+            self.clients.pop(name).close()
         if name in self.active_clients:
             self.active_clients.remove(name)
         logger.info(f"Removed MCP client: {name}")
@@ -49,6 +191,7 @@ class MCPClientManager:
                 logger.info(f"Activated MCP client: {name}")
             elif not active and name in self.active_clients:
                 self.active_clients.remove(name)
+                self.clients[name].close()
                 logger.info(f"Deactivated MCP client: {name}")
         else:
             logger.warning(f"Client {name} not found")
@@ -60,7 +203,9 @@ class MCPClientManager:
             with open(config_path, 'r') as f:
                 config = json.load(f)
             
-            # Clear existing clients
+            # Stop and clear existing clients
+            for client in self.clients.values():
+                client.close()
             self.clients.clear()
             self.active_clients.clear()
             
@@ -73,8 +218,9 @@ class MCPClientManager:
                     command = server_config.get('command', 'python3')
                     args = server_config.get('args', [])
                     
-                    # Create MCPClient with lambda function as per Strands docs
-                    mcp_client = MCPClient(
+                    # Create pooled MCPClient with lambda function as per Strands docs
+                    mcp_client = PooledMCPClient(
+                        server_name,
                         lambda cmd=command, arguments=args: stdio_client(
                             StdioServerParameters(
                                 command=cmd,
@@ -82,7 +228,9 @@ class MCPClientManager:
                                 cwd=os.path.dirname(__file__),
                                 env=os.environ
                             )
-                        )
+                        ),
+                        max_concurrency=server_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                        idle_timeout=server_config.get('idle_timeout', DEFAULT_IDLE_TIMEOUT)
                     )
                     
                     self.add_client(server_name, mcp_client)
@@ -98,6 +246,7 @@ class MCPClientManager:
                     logger.error(f"Failed to initialize MCP client {server_name}: {e}")
             
             logger.info(f"Active MCP clients: {self.active_clients}")
+            self._start_reaper()
             
         except Exception as e:
             logger.error(f"Failed to initialize MCP clients: {e}")
@@ -115,12 +264,11 @@ class MCPClientManager:
             client = self.clients[client_name]
             
             try:
-                # Use client in context to get tools (Strands way)
-                with client:
-                    tools = client.list_tools_sync()
-                    if tools:
-                        all_tools.extend(tools)
-                        logger.info(f"Loaded {len(tools)} tools from {client_name}")
+                # The pooled session stays up, so the returned tools remain callable
+                tools = client.list_tools_sync()
+                if tools:
+                    all_tools.extend(tools)
+                    logger.info(f"Loaded {len(tools)} tools from {client_name}")
             except Exception as e:
                 logger.error(f"Error loading tools from {client_name}: {e}")
         
@@ -128,22 +276,54 @@ class MCPClientManager:
     
     @contextmanager
     def get_active_context(self):
-        """Get context manager for all active MCP clients"""
-        # Use ExitStack to manage multiple context managers
-        with ExitStack() as stack:
-            contexts = []
-            
-            for client_name in self.active_clients:
-                if client_name in self.clients:
-                    try:
-                        # Enter context for each client
-                        stack.enter_context(self.clients[client_name])
-                        contexts.append(client_name)
-                    except Exception as e:
-                        logger.error(f"Failed to enter context for {client_name}: {e}")
-            
-            logger.info(f"Entering context with active clients: {contexts}")
-            yield contexts
+        """Get context for all active MCP clients
+
+        Sessions are long-lived, so this only makes sure every active session
+        is running; nothing is torn down when the context exits.
+        """
+        contexts = []
+        
+        for client_name in self.active_clients:
+            if client_name in self.clients:
+                try:
+                    self.clients[client_name].ensure_started()
+                    contexts.append(client_name)
+                except Exception as e:
+                    logger.error(f"Failed to start session for {client_name}: {e}")
+        
+        logger.info(f"Entering context with active clients: {contexts}")
+        yield contexts
+    
+    def get_pool_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get session pool state for each configured client"""
+        return {name: client.stats() for name, client in self.clients.items()}
+    
+    def shutdown(self):
+        """Stop the reaper and every pooled session"""
+        self._reaper_stop.set()
+        if self._reaper and self._reaper.is_alive():
+            self._reaper.join(timeout=5)
+        self._reaper = None
+        for client in self.clients.values():
+            client.close()
+        logger.info("MCP session pool shut down")
+    
+    def _start_reaper(self):
+        """Start the background idle-reaping and health-check thread once"""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._reaper_stop.clear()
+        self._reaper = threading.Thread(target=self._reap_loop, name="mcp-pool-reaper", daemon=True)
+        self._reaper.start()
+    
+    def _reap_loop(self):
+        while not self._reaper_stop.wait(HEALTH_CHECK_INTERVAL):
+            for client in list(self.clients.values()):
+                try:
+                    if not client.reap_if_idle():
+                        client.health_check()
+                except Exception as e:
+                    logger.error(f"MCP pool maintenance failed for {client.name}: {e}")
 
 # Global instance
 mcp_manager = MCPClientManager() 
\ No newline at end of file
@@ -0,0 +1,339 @@
+"""
+Bounded Session Store for the Triage Backend
+LRU + idle-TTL eviction with a memory budget and optional SQLite spill
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through environment variables
+DEFAULT_MAX_SESSIONS = int(os.environ.get("TRIAGE_SESSION_MAX", "500"))
+DEFAULT_IDLE_TTL = float(os.environ.get("TRIAGE_SESSION_TTL", "1800"))  # seconds
+DEFAULT_MEMORY_BUDGET = int(float(os.environ.get("TRIAGE_SESSION_MEMORY_MB", "256")) * 1024 * 1024)
+DEFAULT_SPILL_PATH = os.environ.get(
+    "TRIAGE_SESSION_SPILL_PATH",
+    os.path.join(os.path.dirname(__file__), "runtime", "sessions.sqlite3")
+)
+
+
+class SpillStore:
+    """SQLite-backed store for sessions evicted from memory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spilled_sessions ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " spilled_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+    def save(self, namespace: str, key: str, payload: Any):
+        data = json.dumps(payload, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spilled_sessions (namespace, key, payload, spilled_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, data, time.time())
+            )
+            self._conn.commit()
+
+    def load(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM spilled_sessions WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def contains(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM spilled_sessions WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        return row is not None
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM spilled_sessions WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            )
+            self._conn.commit()
+
+    def clear(self, namespace: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM spilled_sessions WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM spilled_sessions WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SessionStore:
+    """Dict-like session cache with LRU, idle-TTL and memory-budget eviction.
+
+    Entries are kept in least-recently-used order. Whenever the store is
+    touched, entries idle for longer than ``idle_ttl`` are evicted first, then
+    the least recently used ones until both ``max_entries`` and
+    ``memory_budget`` are respected. With a ``spill`` store configured, an
+    evicted value is written to disk through ``serializer`` and rebuilt with
+    ``loader`` the next time its key is requested.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = DEFAULT_MAX_SESSIONS,
+                 idle_ttl: float = DEFAULT_IDLE_TTL, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 size_of: Optional[Callable[[Any], int]] = None,
+                 spill: Optional[SpillStore] = None,
+                 serializer: Optional[Callable[[Any], Any]] = None,
+                 loader: Optional[Callable[[str, Any], Any]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.memory_budget = memory_budget
+        self.size_of = size_of or (lambda value: 0)
+        self.spill = spill if serializer and loader else None
+        self.serializer = serializer
+        self.loader = loader
+        self.clock = clock
+        self.evictions = 0
+        self.rehydrations = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._pinned: Dict[str, int] = {}
+        self._total_size = 0
+        self._lock = threading.RLock()
+
+    # --- dict interface ---
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._evict()
+            if key in self._entries:
+                return True
+        return self.spill is not None and self.spill.contains(self.namespace, key)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._store(key, value)
+            self._evict()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            found = self._drop(key)
+        if self.spill is not None and self.spill.contains(self.namespace, key):
+            self.spill.delete(self.namespace, key)
+            found = True
+        if not found:
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value for key, rehydrating it from the spill store if needed"""
+        with self._lock:
+            if key in self._entries:
+                value = self._entries[key][0]
+                self._store(key, value, resize=False)
+                self._evict()
+                return value
+        value = self._rehydrate(key)
+        return default if value is None else value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Remove key and return its value, rehydrating it first if spilled"""
+        value = self.get(key)
+        if value is None:
+            return default
+        del self[key]
+        return value
+
+    def discard(self, key: str) -> bool:
+        """Remove key from memory and disk without rehydrating it"""
+        try:
+            del self[key]
+            return True
+        except KeyError:
+            return False
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            self._evict()
+            return list(self._entries.keys())
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            self._evict()
+            return [entry[0] for entry in self._entries.values()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            self._evict()
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def clear(self):
+        """Drop every entry, in memory and spilled"""
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+        if self.spill is not None:
+            self.spill.clear(self.namespace)
+
+    # --- eviction control ---
+
+    def touch(self, key: str):
+        """Mark key as used and re-measure its size after it has grown"""
+        with self._lock:
+            if key in self._entries:
+                self._store(key, self._entries[key][0])
+                self._evict()
+
+    @contextmanager
+    def in_use(self, key: str):
+        """Keep key from being evicted while a request is working on it"""
+        with self._lock:
+            self._pinned[key] = self._pinned.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pinned[key] -= 1
+                if not self._pinned[key]:
+                    del self._pinned[key]
+            self.touch(key)
+
+    def sweep(self) -> int:
+        """Evict expired and over-budget entries, returning how many were removed"""
+        with self._lock:
+            before = self.evictions
+            self._evict()
+            return self.evictions - before
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_bytes": self._total_size,
+                "memory_budget": self.memory_budget,
+                "idle_ttl": self.idle_ttl,
+                "evictions": self.evictions,
+                "rehydrations": self.rehydrations,
+            }
+        if self.spill is not None:
+            stats["spilled"] = self.spill.count(self.namespace)
+        return stats
+
+    # --- internals ---
+
+    def _store(self, key: str, value: Any, resize: bool = True):
+        if key in self._entries:
+            _, _, old_size = self._entries.pop(key)
+            self._total_size -= old_size
+        else:
+            old_size = 0
+        size = self._measure(value) if resize else old_size
+        self._entries[key] = (value, self.clock(), size)
+        self._total_size += size
+
+    def _drop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._total_size -= entry[2]
+        return True
+
+    def _measure(self, value: Any) -> int:
+        try:
+            return int(self.size_of(value))
+        except Exception as e:
+            logger.warning(f"Could not size {self.namespace} entry: {e}")
+            return 0
+
+    def _evict(self):
+        now = self.clock()
+        # Entries are in LRU order, so expired ones are at the front
+        for key, (_, last_access, _) in list(self._entries.items()):
+            if now - last_access <= self.idle_ttl:
+                break
+            if key not in self._pinned:
+                self._evict_key(key, "idle")
+        for key in list(self._entries.keys()):
+            if len(self._entries) <= self.max_entries and self._total_size <= self.memory_budget:
+                break
+            if key not in self._pinned:
+                self._evict_key(key, "capacity")
+
+    def _evict_key(self, key: str, reason: str):
+        value = self._entries[key][0]
+        self._drop(key)
+        self.evictions += 1
+        if self.spill is not None:
+            try:
+                self.spill.save(self.namespace, key, self.serializer(value))
+            except Exception as e:
+                logger.error(f"Failed to spill {self.namespace} session {key}: {e}")
+        logger.info(f"Evicted {self.namespace} session {key} ({reason})")
+
+    def _rehydrate(self, key: str) -> Any:
+        if self.spill is None:
+            return None
+        payload = self.spill.load(self.namespace, key)
+        if payload is None:
+            return None
+        try:
+            value = self.loader(key, payload)
+        except Exception as e:
+            logger.error(f"Failed to rehydrate {self.namespace} session {key}: {e}")
+            return None
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key][0]
+            self._store(key, value)
+            self.rehydrations += 1
+            self._evict()
+        self.spill.delete(self.namespace, key)
+        logger.info(f"Rehydrated {self.namespace} session {key}")
+        return value
+
+
+def estimate_json_size(value: Any) -> int:
+    """Approximate in-memory footprint as the size of its JSON encoding"""
+    return len(json.dumps(value, default=str))
@@ -0,0 +1,154 @@
+"""
+Coalescing SSE Writer for the Triage Chat Stream
+Batches streamed content into time/size-bounded frames and stops on disconnect
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DONE = "[DONE]"
+FLUSH_INTERVAL = float(os.environ.get("TRIAGE_SSE_FLUSH_MS", "30")) / 1000
+MAX_FRAME_BYTES = int(os.environ.get("TRIAGE_SSE_MAX_FRAME_BYTES", "2048"))
+# How often a writer waiting for events checks whether the client is still there
+DISCONNECT_POLL_INTERVAL = float(os.environ.get("TRIAGE_SSE_DISCONNECT_POLL_MS", "1000")) / 1000
+# Events the pump may read ahead of the writer
+QUEUE_SIZE = 64
+
+# Put on the queue by the pump when the source stream is exhausted
+_END = object()
+
+Event = Union[Dict[str, Any], str]
+
+
+def dumps(payload: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload)
+
+
+def encode_event(event: Event) -> str:
+    """Format one event as an SSE data frame, strings are sent verbatim"""
+    data = event if isinstance(event, str) else dumps(event)
+    return f"data: {data}\n\n"
+
+
+def _is_content(event: Event) -> bool:
+    return isinstance(event, dict) and event.get("type") == "content" and len(event) == 2
+
+
+async def coalesced_sse(events: AsyncIterator[Event], request: Optional[Any] = None,
+                        flush_interval: float = FLUSH_INTERVAL,
+                        max_frame_bytes: int = MAX_FRAME_BYTES,
+                        disconnect_poll_interval: float = DISCONNECT_POLL_INTERVAL) -> AsyncIterator[str]:
+    """Turn an event stream into SSE frames, merging consecutive content events.
+
+    Content text is buffered until ``flush_interval`` has passed since the
+    first buffered token or ``max_frame_bytes`` is reached; any other event
+    flushes the buffer and is sent right after it, so ordering is kept.
+
+    The source stream is driven by a single pump task feeding a queue, so it
+    runs in one task and one context from start to end (context variables
+    it sets, such as the tracing span, survive across its yields). When
+    ``request`` reports the client gone, checked after each frame and
+    whenever the writer is waiting for events, the pump is cancelled, which
+    closes the source stream and cancels the agent call feeding it.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    buffer: List[str] = []
+    buffered_bytes = 0
+    window_start: Optional[float] = None
+
+    async def pump():
+        try:
+            async for event in iterator:
+                await queue.put(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+            return
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await queue.put(_END)
+
+    def flush() -> str:
+        nonlocal buffered_bytes, window_start
+        if not buffer:
+            return ""
+        frame = encode_event({"type": "content", "content": "".join(buffer)})
+        buffer.clear()
+        buffered_bytes = 0
+        window_start = None
+        return frame
+
+    async def disconnected() -> bool:
+        if request is not None and await request.is_disconnected():
+            logger.info("SSE client disconnected, cancelling stream")
+            return True
+        return False
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            if queue.empty():
+                if await disconnected():
+                    break
+                if window_start is None:
+                    timeout = disconnect_poll_interval
+                else:
+                    timeout = max(0.0, window_start + flush_interval - loop.time())
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if window_start is not None and loop.time() >= window_start + flush_interval:
+                        # Window elapsed with no new event, send what we have
+                        yield flush()
+                    continue
+            else:
+                item = queue.get_nowait()
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            if _is_content(item):
+                text = item["content"]
+                buffer.append(text)
+                buffered_bytes += len(text)
+                if window_start is None:
+                    window_start = loop.time()
+                if buffered_bytes >= max_frame_bytes:
+                    yield flush()
+                    if await disconnected():
+                        break
+                continue
+
+            yield flush() + encode_event(item)
+            if await disconnected():
+                break
+
+        tail = flush()
+        if tail:
+            yield tail
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+        try:
+            await pump_task
+        except (asyncio.CancelledError, Exception):
+            pass
@@ -0,0 +1,113 @@
+"""
+Incremental Decision Tree Tag Scanner
+Detects <decision_tree_status ... /> control tags in streamed model output
+"""
+
+import re
+import time
+from typing import Dict, List, Tuple
+
+STATUS_TAG = "<decision_tree_status"
+MAX_TAG_LENGTH = 1024  # longer "tags" are treated as plain text
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+
+
+class DecisionTreeTagScanner:
+    """State machine over streamed chunks that finds decision_tree_status tags.
+
+    Each chunk is scanned once. Only an unfinished tail that could still
+    become a tag (at most ``MAX_TAG_LENGTH`` characters) is carried over to
+    the next chunk, so the cost per chunk does not grow with the length of
+    the response. With ``strip_tags`` the tags are removed from the returned
+    text and text that may start a tag is held back until it is resolved.
+    """
+
+    def __init__(self, strip_tags: bool = False):
+        self.strip_tags = strip_tags
+        self.tags: List[Dict[str, str]] = []
+        self._pending = ""
+
+    def feed(self, chunk: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Scan a chunk, returning the text to forward and the tags completed in it"""
+        buffer = self._pending + chunk
+        text_parts: List[str] = []
+        found: List[Dict[str, str]] = []
+        position = 0
+
+        while True:
+            start = buffer.find("<", position)
+            if start == -1:
+                text_parts.append(buffer[position:])
+                self._pending = ""
+                break
+
+            candidate = buffer[start:start + len(STATUS_TAG)]
+            if len(candidate) < len(STATUS_TAG) and STATUS_TAG.startswith(candidate):
+                # Could still become a tag once the next chunk arrives
+                text_parts.append(buffer[position:start])
+                self._pending = buffer[start:]
+                break
+            if candidate != STATUS_TAG:
+                text_parts.append(buffer[position:start + 1])
+                position = start + 1
+                continue
+
+            end = buffer.find(">", start)
+            if end == -1:
+                if len(buffer) - start > MAX_TAG_LENGTH:
+                    text_parts.append(buffer[position:start + 1])
+                    position = start + 1
+                    continue
+                text_parts.append(buffer[position:start])
+                self._pending = buffer[start:]
+                break
+
+            tag_text = buffer[start:end + 1]
+            found.append(dict(ATTRIBUTE_PATTERN.findall(tag_text)))
+            text_parts.append(buffer[position:start])
+            if not self.strip_tags:
+                text_parts.append(tag_text)
+            position = end + 1
+
+        self.tags.extend(found)
+        if not self.strip_tags:
+            # Nothing is held back, forward the chunk exactly as received
+            return chunk, found
+        return "".join(text_parts), found
+
+    def flush(self) -> str:
+        """Return text held back at the end of the stream"""
+        pending, self._pending = self._pending, ""
+        return pending if self.strip_tags else ""
+
+
+def _benchmark(tokens: int = 4000, token: str = "lorem ipsum ", runs: int = 3):
+    """Compare per-token cost of regex-over-accumulated text with the scanner"""
+    pattern = re.compile(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>')
+    chunks = [token] * tokens + ['<decision_tree_status next_node="age_collection" action="next" />']
+
+    def regex_pass():
+        accumulated = ""
+        for chunk in chunks:
+            accumulated += chunk
+            pattern.search(accumulated)
+
+    def scanner_pass():
+        scanner = DecisionTreeTagScanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+
+    for name, run in (("regex on accumulated", regex_pass), ("incremental scanner", scanner_pass)):
+        best = min(_timed(run) for _ in range(runs))
+        print(f"{name:>22}: {best * 1e6 / len(chunks):8.2f} us/token over {len(chunks)} tokens")
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    for size in (500, 2000, 8000):
+        _benchmark(tokens=size)
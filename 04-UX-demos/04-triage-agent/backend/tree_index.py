@@ -0,0 +1,174 @@
+"""
+Compiled Decision Tree Index
+Immutable routing tables and cached visualization payloads built once per tree
+"""
+
+import re
+import json
+import hashlib
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Connective words shared by many options, they carry no routing signal
+STOP_WORDS = frozenset({"a", "an", "and", "or", "the", "of", "to", "in", "for", "with", "my", "i", "is", "it", "not"})
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+class DecisionTreeIndex:
+    """Read-only index over the decision tree nodes.
+
+    Built once when the tree is loaded. For every node it keeps an inverted
+    index from response-option keyword to option positions, so routing a
+    user message costs one lookup per message token. It also holds
+    parent/depth tables and the visualization JSON pre-serialized with an
+    ETag, so tree endpoints can answer without touching the nodes again.
+    """
+
+    def __init__(self, nodes: Mapping[str, Any], entry_point: str = "start"):
+        self.nodes = MappingProxyType(dict(nodes))
+        self.entry_point = entry_point
+
+        keyword_index: Dict[str, Mapping[str, Tuple[int, ...]]] = {}
+        exact_index: Dict[str, Mapping[str, int]] = {}
+        parents: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        for node_id, node in nodes.items():
+            keywords: Dict[str, List[int]] = {}
+            exact: Dict[str, int] = {}
+            for position, option in enumerate(node.response_options):
+                exact.setdefault(normalize(option), position)
+                for keyword in set(tokenize(option)) - STOP_WORDS:
+                    keywords.setdefault(keyword, []).append(position)
+            keyword_index[node_id] = MappingProxyType({k: tuple(v) for k, v in keywords.items()})
+            exact_index[node_id] = MappingProxyType(exact)
+            for child_id in node.children:
+                if child_id in parents and node_id not in parents[child_id]:
+                    parents[child_id].append(node_id)
+
+        self.keyword_index = MappingProxyType(keyword_index)
+        self.exact_index = MappingProxyType(exact_index)
+        self.parents = MappingProxyType({node_id: tuple(ids) for node_id, ids in parents.items()})
+        self.depth = MappingProxyType(self._compute_depth(nodes, entry_point))
+        self.children_info = MappingProxyType({
+            node_id: tuple(f"{child_id}: {nodes[child_id].topic}" for child_id in node.children if child_id in nodes)
+            for node_id, node in nodes.items()
+        })
+
+        visualization = {
+            "nodes": {
+                node_id: {
+                    "id": node.id,
+                    "topic": node.topic,
+                    "question": node.question,
+                    "ui_display": node.ui_display,
+                    "response_options": node.response_options,
+                    "children": node.children,
+                    "is_terminal": node.is_terminal,
+                    "outcome": node.outcome
+                }
+                for node_id, node in nodes.items()
+            },
+            "total_nodes": len(nodes),
+            "entry_point": entry_point
+        }
+        self.visualization_json = json.dumps(visualization).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.visualization_json).hexdigest()[:32] + '"'
+        self.status_tree = {
+            "nodes": {
+                node_id: {
+                    "id": node.id,
+                    "topic": node.topic,
+                    "question": node.question,
+                    "children": node.children,
+                    "is_terminal": node.is_terminal,
+                    "outcome": node.outcome
+                }
+                for node_id, node in nodes.items()
+            }
+        }
+
+    @staticmethod
+    def _compute_depth(nodes: Mapping[str, Any], entry_point: str) -> Dict[str, int]:
+        depth: Dict[str, int] = {}
+        if entry_point not in nodes:
+            return depth
+        depth[entry_point] = 0
+        queue = deque([entry_point])
+        while queue:
+            node_id = queue.popleft()
+            for child_id in nodes[node_id].children:
+                if child_id in nodes and child_id not in depth:
+                    depth[child_id] = depth[node_id] + 1
+                    queue.append(child_id)
+        return depth
+
+    def exact_option(self, node_id: str, message: str) -> Optional[int]:
+        """Position of the response option the message repeats verbatim, if any"""
+        exact = self.exact_index.get(node_id)
+        if not exact:
+            return None
+        return exact.get(normalize(message))
+
+    def match_option(self, node_id: str, message: str) -> Optional[int]:
+        """Position of the response option that best matches the message.
+
+        A verbatim option wins outright. Otherwise the option sharing the
+        most keywords with the message is chosen, ties going to the option
+        listed first.
+        """
+        exact = self.exact_option(node_id, message)
+        if exact is not None:
+            return exact
+        keywords = self.keyword_index.get(node_id)
+        if not keywords:
+            return None
+        scores: Dict[int, int] = {}
+        for token in set(tokenize(message)):
+            for position in keywords.get(token, ()):
+                scores[position] = scores.get(position, 0) + 1
+        if not scores:
+            return None
+        return min(scores, key=lambda position: (-scores[position], position))
+
+    def route(self, node_id: str, message: str) -> Union[str, List[str]]:
+        """Next node for a message, or the candidate children when the model has to choose"""
+        node = self.nodes[node_id]
+
+        # If it's a terminal node, stay at current node
+        if node.is_terminal:
+            return node.id
+
+        if node.response_options and node.children:
+            if len(node.children) == 1:
+                return node.children[0]
+            if len(node.children) == len(node.response_options):
+                # Each response option maps to a child, default to the first one
+                position = self.match_option(node_id, message)
+                return node.children[position if position is not None else 0]
+            # Complex routing - let AI decide based on reasoning
+            return list(self.children_info[node_id])
+
+        if not node.children:
+            return node.id
+        return node.children[0]
+
+    def unambiguous_route(self, node_id: str, message: str) -> Optional[str]:
+        """Child node a verbatim quick-response answer leads to, if routing needs no model"""
+        node = self.nodes.get(node_id)
+        if node is None or node.is_terminal or not node.children or getattr(node, "should_reason", False):
+            return None
+        if self.exact_option(node_id, message) is None:
+            return None
+        next_node_id = self.route(node_id, message)
+        if isinstance(next_node_id, list) or next_node_id == node_id or next_node_id not in self.nodes:
+            return None
+        return next_node_id
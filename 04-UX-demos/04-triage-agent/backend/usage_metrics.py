@@ -0,0 +1,210 @@
+"""
+Model Usage Metrics for the Triage Backend
+Per-call token, latency and cost accounting with Prometheus text export
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIMESERIES_BUCKET_SECONDS = 60
+TIMESERIES_BUCKETS = 60  # one hour of per-minute buckets per model
+MAX_TRACKED_SESSIONS = int(os.environ.get("TRIAGE_METRICS_MAX_SESSIONS", "1000"))
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)  # seconds
+
+# Optional USD prices per 1K tokens, e.g. {"model-id": {"input": 0.003, "output": 0.015}}
+try:
+    MODEL_PRICING: Dict[str, Dict[str, float]] = json.loads(os.environ.get("TRIAGE_MODEL_PRICING", "{}"))
+except json.JSONDecodeError as e:
+    logger.error(f"Ignoring invalid TRIAGE_MODEL_PRICING: {e}")
+    MODEL_PRICING = {}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+
+def _empty_usage() -> Dict[str, float]:
+    usage = {name: 0 for name in USAGE_FIELDS}
+    usage.update({"calls": 0, "cost_usd": 0.0})
+    return usage
+
+
+def usage_from_strands(usage: Dict[str, Any]) -> Dict[str, int]:
+    """Map a Strands/Bedrock usage dict onto our field names"""
+    return {
+        "input_tokens": int(usage.get("inputTokens", 0) or 0),
+        "output_tokens": int(usage.get("outputTokens", 0) or 0),
+        "cache_read_tokens": int(usage.get("cacheReadInputTokens", 0) or 0),
+        "cache_write_tokens": int(usage.get("cacheWriteInputTokens", 0) or 0),
+    }
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with fixed buckets"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class UsageMetrics:
+    """Aggregates model usage per session and per model.
+
+    Each model call is recorded once with the usage Strands reports for it.
+    Per-model totals, latency / time-to-first-token histograms and a
+    per-minute time series are kept for the lifetime of the process; per
+    session totals are kept for the ``max_sessions`` most recently active
+    sessions.
+    """
+
+    def __init__(self, max_sessions: int = MAX_TRACKED_SESSIONS, pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        self.max_sessions = max_sessions
+        self.pricing = pricing if pricing is not None else MODEL_PRICING
+        self.fast_path_turns = 0
+        self._models: Dict[str, Dict[str, float]] = {}
+        self._sessions: "OrderedDict[str, Dict[str, Dict[str, float]]]" = OrderedDict()
+        self._latency: Dict[str, Histogram] = {}
+        self._ttft: Dict[str, Histogram] = {}
+        self._timeseries: Dict[str, Deque[List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, session_id: str, model_id: str, usage: Dict[str, int], latency_ms: Optional[float] = None):
+        """Record the usage of one model call"""
+        cost = self._cost(model_id, usage)
+        with self._lock:
+            for totals in (self._model_totals(model_id), self._session_totals(session_id, model_id)):
+                for name in USAGE_FIELDS:
+                    totals[name] += usage.get(name, 0)
+                totals["calls"] += 1
+                totals["cost_usd"] += cost
+            if latency_ms is not None:
+                self._latency.setdefault(model_id, Histogram()).observe(latency_ms / 1000)
+            bucket = self._current_bucket(model_id)
+            bucket[1] += 1
+            bucket[2] += usage.get("input_tokens", 0)
+            bucket[3] += usage.get("output_tokens", 0)
+
+    def record_ttft(self, model_id: str, seconds: float):
+        """Record the time from sending a turn to its first streamed token"""
+        with self._lock:
+            self._ttft.setdefault(model_id, Histogram()).observe(seconds)
+
+    def record_fast_path(self):
+        """Count a turn that was answered without calling the model"""
+        with self._lock:
+            self.fast_path_turns += 1
+
+    def forget_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def session_usage(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Totals for a session, split by model"""
+        with self._lock:
+            models = self._sessions.get(session_id)
+            if models is None:
+                return None
+            total = _empty_usage()
+            for usage in models.values():
+                for name, value in usage.items():
+                    total[name] += value
+            return {"session_id": session_id, "total": total, "models": {k: dict(v) for k, v in models.items()}}
+
+    def timeseries(self, model_id: str) -> List[Dict[str, float]]:
+        """Per-minute calls and tokens for a model, oldest first"""
+        with self._lock:
+            buckets = list(self._timeseries.get(model_id, ()))
+        return [
+            {"start": start, "calls": calls, "input_tokens": input_tokens, "output_tokens": output_tokens}
+            for start, calls, input_tokens, output_tokens in buckets
+        ]
+
+    def render_prometheus(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            counters = (
+                ("triage_model_calls_total", "Model calls", "calls"),
+                ("triage_model_input_tokens_total", "Input tokens reported by the model", "input_tokens"),
+                ("triage_model_output_tokens_total", "Output tokens reported by the model", "output_tokens"),
+                ("triage_model_cache_read_tokens_total", "Prompt cache read tokens", "cache_read_tokens"),
+                ("triage_model_cache_write_tokens_total", "Prompt cache write tokens", "cache_write_tokens"),
+                ("triage_model_cost_usd_total", "Estimated cost from TRIAGE_MODEL_PRICING", "cost_usd"),
+            )
+            for metric, help_text, field in counters:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for model_id, totals in self._models.items():
+                    lines.append(f'{metric}{{model="{model_id}"}} {totals[field]:g}')
+
+            lines.append("# HELP triage_model_tokens_per_minute Input plus output tokens in the current minute")
+            lines.append("# TYPE triage_model_tokens_per_minute gauge")
+            for model_id in self._timeseries:
+                bucket = self._current_bucket(model_id)
+                lines.append(f'triage_model_tokens_per_minute{{model="{model_id}"}} {bucket[2] + bucket[3]:g}')
+
+            for metric, help_text, histograms in (
+                ("triage_model_latency_seconds", "Model call latency reported by Bedrock", self._latency),
+                ("triage_model_time_to_first_token_seconds", "Time from request to first streamed token", self._ttft),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for model_id, histogram in histograms.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{model="{model_id}",le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{model="{model_id}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{model="{model_id}"}} {histogram.total:g}')
+                    lines.append(f'{metric}_count{{model="{model_id}"}} {histogram.count}')
+
+            lines.append("# HELP triage_fast_path_turns_total Turns answered from the decision tree without a model call")
+            lines.append("# TYPE triage_fast_path_turns_total counter")
+            lines.append(f"triage_fast_path_turns_total {self.fast_path_turns}")
+            lines.append("# HELP triage_tracked_sessions Sessions with usage currently tracked")
+            lines.append("# TYPE triage_tracked_sessions gauge")
+            lines.append(f"triage_tracked_sessions {len(self._sessions)}")
+        return "\n".join(lines) + "\n"
+
+    # --- internals ---
+
+    def _cost(self, model_id: str, usage: Dict[str, int]) -> float:
+        prices = self.pricing.get(model_id)
+        if not prices:
+            return 0.0
+        return (usage.get("input_tokens", 0) * prices.get("input", 0)
+                + usage.get("output_tokens", 0) * prices.get("output", 0)) / 1000
+
+    def _model_totals(self, model_id: str) -> Dict[str, float]:
+        if model_id not in self._models:
+            self._models[model_id] = _empty_usage()
+        return self._models[model_id]
+
+    def _session_totals(self, session_id: str, model_id: str) -> Dict[str, float]:
+        models = self._sessions.pop(session_id, None) or {}
+        self._sessions[session_id] = models
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        if model_id not in models:
+            models[model_id] = _empty_usage()
+        return models[model_id]
+
+    def _current_bucket(self, model_id: str) -> List[float]:
+        start = int(time.time() // TIMESERIES_BUCKET_SECONDS * TIMESERIES_BUCKET_SECONDS)
+        series = self._timeseries.setdefault(model_id, deque(maxlen=TIMESERIES_BUCKETS))
+        if not series or series[-1][0] != start:
+            series.append([start, 0, 0, 0])
+        return series[-1]
@@ -1,6 +1,8 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './RightSidebar.css';
 
+const LOG_CAPACITY = 50; // Matches the backend's per-server ring buffer
+
 const RightSidebar = ({ onClose }) => {
   const [logs, setLogs] = useState({});
   const [selectedServer, setSelectedServer] = useState('All Servers');
@@ -12,10 +14,22 @@ const RightSidebar = ({ onClose }) => {
   const scrollTimeoutRef = useRef(null);
 
   useEffect(() => {
-    fetchLogs();
-    const interval = setInterval(fetchLogs, 3000); // Increased to 3 seconds
-    return () => clearInterval(interval);
-  }, []); // eslint-disable-line react-hooks/exhaustive-deps
+    // Tail new entries over SSE; EventSource resumes from Last-Event-ID on reconnect
+    const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
+    const source = new EventSource(`${apiBase}/mcp/logs/stream`);
+    source.onmessage = (event) => {
+      try {
+        const entry = JSON.parse(event.data);
+        setLogs(prevLogs => ({
+          ...prevLogs,
+          [entry.server]: [...(prevLogs[entry.server] || []), entry].slice(-LOG_CAPACITY)
+        }));
+      } catch (error) {
+        console.error('Error parsing log entry:', error);
+      }
+    };
+    return () => source.close();
+  }, []);
 
     // CloudWatch-style tail to bottom
   const tailToBottom = () => {
@@ -74,26 +88,6 @@ const RightSidebar = ({ onClose }) => {
     }
   };
 
-  const fetchLogs = async () => {
-    try {
-      const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
-      const response = await fetch(`${apiBase}/mcp/logs`);
-      if (response.ok) {
-        const data = await response.json();
-        
-        // Only update if logs have actually changed
-        const currentLogsString = JSON.stringify(logs);
-        const newLogsString = JSON.stringify(data);
-        
-        if (currentLogsString !== newLogsString) {
-          setLogs(data);
-        }
-      }
-    } catch (error) {
-      console.error('Error fetching logs:', error);
-    }
-  };
-
   const clearLogs = async () => {
     try {
           const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
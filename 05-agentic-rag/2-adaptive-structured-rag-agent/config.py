@@ -36,6 +36,12 @@ def get_config() -> Dict[str, Any]:
         
         # Knowledge Base Configuration
         "knowledge_base_id": os.environ.get("KNOWLEDGE_BASE_ID", ""),
+        
+        # SQLite Configuration, the bundled database next to this file by default
+        "sqlite_database_path": os.environ.get(
+            "SQLITE_DATABASE_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "wealthmanagement.db")
+        ),
 
     }
     
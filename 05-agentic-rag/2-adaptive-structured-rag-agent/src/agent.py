@@ -5,8 +5,8 @@ import os
 import logging
 from strands import Agent
 
-from src.tools.knowledge_base_tool import get_schema
-from src.tools.athena_tool import run_athena_query
+from src.tools.knowledge_base_tool import get_schema, configure_schema_source
+from src.tools.athena_tool import run_athena_query, run_athena_queries
 from src.tools.sqllite_tool import run_sqlite_query
 
 logger = logging.getLogger(__name__)
@@ -43,8 +43,11 @@ def create_nl2sql_agent(environment: str = "local") -> Agent:
     If you receive an error, carefully analyze it and fix your query.
     """
     
+    # Athena schema comes from the Knowledge Base, local schema from the SQLite catalog
+    configure_schema_source(environment)
+    
     # Create the agent with tools and system prompt
-    tools = [get_schema, run_athena_query] if environment == "athena" else [get_schema, run_sqlite_query]
+    tools = [get_schema, run_athena_query, run_athena_queries] if environment == "athena" else [get_schema, run_sqlite_query]
 
     agent = Agent(
         tools=tools,
@@ -0,0 +1,239 @@
+"""
+Athena query executor with adaptive polling, pagination and result reuse.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_TIMEOUT = float(os.environ.get("ATHENA_QUERY_TIMEOUT", "300"))
+DEFAULT_RESULT_REUSE_MINUTES = int(os.environ.get("ATHENA_RESULT_REUSE_MINUTES", "60"))
+DEFAULT_CACHE_TTL = float(os.environ.get("ATHENA_RESULT_CACHE_TTL", "300"))
+DEFAULT_CACHE_SIZE = int(os.environ.get("ATHENA_RESULT_CACHE_SIZE", "128"))
+DEFAULT_MAX_ROWS = int(os.environ.get("ATHENA_MAX_ROWS", "1000"))
+DEFAULT_MAX_CONCURRENCY = 4
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+
+class AthenaQueryError(Exception):
+    """Raised when an Athena query fails, is cancelled or times out."""
+
+    def __init__(self, message: str, status: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status = status or {}
+
+
+class AthenaExecutor:
+    """
+    Runs SQL on Athena with a shared client.
+
+    Query state is polled with exponential backoff (``initial_delay`` growing
+    by ``backoff`` up to ``max_delay``) until ``timeout`` elapses. Results
+    are read across every ``get_query_results`` page via ``NextToken``.
+    Identical SQL is answered from a local LRU cache of up to ``cache_size``
+    results for ``cache_ttl`` seconds and, when enabled, Athena's own result
+    reuse. The client, sleep and
+    clock are injectable so the executor can run against a stub.
+    """
+
+    def __init__(self, client, database: str, output_location: str,
+                 timeout: float = DEFAULT_QUERY_TIMEOUT,
+                 initial_delay: float = 0.25, max_delay: float = 5.0, backoff: float = 1.5,
+                 result_reuse_minutes: int = DEFAULT_RESULT_REUSE_MINUTES,
+                 cache_ttl: float = DEFAULT_CACHE_TTL,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.database = database
+        self.output_location = output_location
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.result_reuse_minutes = result_reuse_minutes
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_concurrency = max_concurrency
+        self.sleep = sleep
+        self.clock = clock
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def start(self, query: str) -> str:
+        """Submit a query and return its execution id."""
+        request = {
+            "QueryString": query,
+            "QueryExecutionContext": {"Database": self.database},
+            "ResultConfiguration": {"OutputLocation": self.output_location},
+        }
+        if self.result_reuse_minutes > 0:
+            request["ResultReuseConfiguration"] = {
+                "ResultReuseByAgeConfiguration": {"Enabled": True, "MaxAgeInMinutes": self.result_reuse_minutes}
+            }
+        try:
+            response = self.client.start_query_execution(**request)
+        except ClientError as e:
+            if "ResultReuseConfiguration" not in request or not _is_result_reuse_unsupported(e):
+                raise
+            # Workgroups on engine v2 reject result reuse, retry without it
+            logger.warning(f"Athena result reuse unavailable, disabling it: {e}")
+            self.result_reuse_minutes = 0
+            del request["ResultReuseConfiguration"]
+            response = self.client.start_query_execution(**request)
+        return response["QueryExecutionId"]
+
+    def wait(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Poll until the query reaches a terminal state.
+
+        Returns:
+            Dict: The QueryExecution description of a succeeded query
+
+        Raises:
+            AthenaQueryError: If the query failed, was cancelled or timed out
+        """
+        deadline = self.clock() + self.timeout
+        delay = self.initial_delay
+        while True:
+            execution = self.client.get_query_execution(QueryExecutionId=execution_id)["QueryExecution"]
+            status = execution["Status"]
+            state = status["State"]
+            if state == "SUCCEEDED":
+                return execution
+            if state in TERMINAL_STATES:
+                raise AthenaQueryError(status.get("StateChangeReason", f"Query {state.lower()}"), status)
+
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                self.client.stop_query_execution(QueryExecutionId=execution_id)
+                raise AthenaQueryError(f"Query timed out after {self.timeout:.0f} seconds", status)
+            logger.debug(f"Query {execution_id} state: {state}, polling again in {delay:.2f}s")
+            self.sleep(min(delay, remaining))
+            delay = min(delay * self.backoff, self.max_delay)
+
+    def iter_rows(self, execution_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield every result row as a dict, following NextToken across pages."""
+        paginator = self.client.get_paginator("get_query_results")
+        columns: Optional[List[str]] = None
+        for page in paginator.paginate(QueryExecutionId=execution_id):
+            result_set = page["ResultSet"]
+            rows = result_set["Rows"]
+            if columns is None:
+                columns = [col["Label"] for col in result_set["ResultSetMetadata"]["ColumnInfo"]]
+                rows = rows[1:]  # Only the first page starts with the header row
+            for row in rows:
+                yield {
+                    columns[i]: value.get("VarCharValue")
+                    for i, value in enumerate(row["Data"])
+                }
+
+    def execute(self, query: str, max_rows: int = DEFAULT_MAX_ROWS) -> Dict[str, Any]:
+        """
+        Run a query and collect up to max_rows rows.
+
+        Returns:
+            Dict with data, row_count, truncated, execution id and whether the
+            result came from the local cache or Athena's result reuse
+        """
+        key = self._cache_key(query, max_rows)
+        cached = self._cache_get(key)
+        if cached is not None:
+            logger.info("Athena result served from local cache")
+            return dict(cached, cached=True)
+
+        logger.info(f"Executing Athena query: {query}")
+        execution_id = self.start(query)
+        logger.info(f"Query execution ID: {execution_id}")
+        execution = self.wait(execution_id)
+
+        data = []
+        truncated = False
+        for row in self.iter_rows(execution_id):
+            if len(data) >= max_rows:
+                truncated = True
+                break
+            data.append(row)
+
+        result = {
+            "data": data,
+            "row_count": len(data),
+            "truncated": truncated,
+            "query_execution_id": execution_id,
+            "reused_previous_result": execution.get("Statistics", {})
+                                               .get("ResultReuseInformation", {})
+                                               .get("ReusedPreviousResult", False),
+        }
+        self._cache_set(key, result)
+        return dict(result, cached=False)
+
+    def execute_many(self, queries: List[str], max_rows: int = DEFAULT_MAX_ROWS) -> List[Dict[str, Any]]:
+        """
+        Run independent queries concurrently.
+
+        Returns:
+            List with one result per query, in input order. A failed query
+            yields a dict with ``error`` instead of raising.
+        """
+        def run(query: str) -> Dict[str, Any]:
+            try:
+                return self.execute(query, max_rows)
+            except Exception as e:
+                return {"error": str(e), "status": getattr(e, "status", {})}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(queries)))) as pool:
+            return list(pool.map(run, queries))
+
+    def invalidate_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    # --- internals ---
+
+    @staticmethod
+    def _cache_key(query: str, max_rows: int) -> str:
+        normalized = " ".join(query.split()).rstrip(";")
+        return hashlib.sha256(f"{max_rows}:{normalized}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_ttl <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if self.clock() >= entry[0]:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _cache_set(self, key: str, result: Dict[str, Any]):
+        if self.cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            now = self.clock()
+            self._cache[key] = (now + self.cache_ttl, result)
+            self._cache.move_to_end(key)
+            # Drop expired entries first, then the least recently used ones
+            for stale in [k for k, (expires_at, _) in self._cache.items() if expires_at <= now]:
+                del self._cache[stale]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def _is_result_reuse_unsupported(error: ClientError) -> bool:
+    """Whether Athena rejected the request because the workgroup cannot reuse results."""
+    details = error.response.get("Error", {})
+    return (details.get("Code") == "InvalidRequestException"
+            and "reuse" in details.get("Message", "").lower())
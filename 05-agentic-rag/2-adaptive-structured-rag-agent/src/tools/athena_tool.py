@@ -3,107 +3,87 @@ Athena Query Tool for executing SQL queries.
 """
 from strands import tool
 import boto3
-import time
 import logging
-import os
-import json
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Tuple
+
+from config import get_config
+from src.tools.athena_executor import AthenaExecutor, AthenaQueryError
 
 logger = logging.getLogger(__name__)
 
+_executors: Dict[Tuple[str, str, str], AthenaExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_athena_executor() -> AthenaExecutor:
+    """
+    Get the shared Athena executor for the current configuration.
+
+    The boto3 client and the local result cache are created once per
+    region, database and output location and reused across tool calls.
+
+    Returns:
+        AthenaExecutor: Executor bound to a cached Athena client
+    """
+    config = get_config()
+    key = (config['aws_region'], config['athena_database'], config['athena_output_location'])
+
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            # AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, and AWS_SESSION_TOKEN
+            # are automatically used by boto3
+            client = boto3.client('athena', region_name=config['aws_region'])
+            executor = _executors[key] = AthenaExecutor(client, config['athena_database'], config['athena_output_location'])
+        return executor
+
+
+def _format_result(query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    response = {
+        "success": True,
+        "data": result["data"],
+        "row_count": result["row_count"],
+        "query": query
+    }
+    if result["truncated"]:
+        response["truncated"] = True
+        response["message"] = f"Result truncated to the first {result['row_count']} rows; add filters or aggregation to narrow it."
+    return response
+
+
+def _format_error(query: str, error: AthenaQueryError) -> Dict[str, Any]:
+    logger.error(f"Query failed response: {error.status}")
+    return {
+        "success": False,
+        "error": str(error) or 'Query failed with an Unknown error',
+        "athena_error_details": error.status.get('AthenaError', "Query failed with an Unknown Athena error"),
+        "query": query
+    }
+
+
 @tool
 def run_athena_query(query: str) -> Dict[str, Any]:
     """
     Execute a SQL query on Amazon Athena.
-    
-    Uses boto3 to execute the query on Athena and returns the results.
-    
+
+    Uses a shared Athena client, polls the query with backoff and reads
+    every result page. Identical queries are answered from a short-lived
+    cache.
+
     Args:
         query: SQL query string to execute
-    
+
     Returns:
         Dict containing either query results or error information
     """
-    try:    
-        # Create Athena client using the environment variables
-        # AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, and AWS_SESSION_TOKEN
-        # are automatically used by boto3
-        from config import get_config
-        config = get_config()
-        
-        athena_client = boto3.client('athena', region_name=config['aws_region'])
-        
-        # Start query execution
-        logger.info(f"Executing Athena query: {query}")
-        response = athena_client.start_query_execution(
-            QueryString=query,
-            QueryExecutionContext={
-                'Database': config['athena_database']
-            },
-            ResultConfiguration={
-                'OutputLocation': config['athena_output_location']
-            }
-        )
-        
-        query_execution_id = response['QueryExecutionId']
-        logger.info(f"Query execution ID: {query_execution_id}")
-        
-        # Wait for query to complete
-        max_retries = 20  # Avoid infinite loops
-        retries = 0
-
-        while retries < max_retries:
-            response = athena_client.get_query_execution(QueryExecutionId=query_execution_id)
-            state = response['QueryExecution']['Status']['State']
-            if state == 'SUCCEEDED':
-                print("Query succeeded!")
-                break
-            elif state in ['FAILED', 'CANCELLED']:
-                print(f"Query {state.lower()}.")
-                break
-            else:
-                print(f"Query state: {state}, sleeping for 10 seconds")
-                time.sleep(2)
-                retries += 1
-        
-        # Check final state
-        if state == 'SUCCEEDED':
-            # Get query results
-            results = athena_client.get_query_results(QueryExecutionId=query_execution_id)
-            
-            # Process results
-            columns = [col['Label'] for col in results['ResultSet']['ResultSetMetadata']['ColumnInfo']]
-            rows = results['ResultSet']['Rows'][1:]  # Skip header row
-            
-            data = []
-            for row in rows:
-                item = {}
-                for i, value in enumerate(row['Data']):
-                    # Handle null values
-                    if 'VarCharValue' in value:
-                        item[columns[i]] = value['VarCharValue']
-                    else:
-                        item[columns[i]] = None
-                data.append(item)
-            
-            return {
-                "success": True,
-                "data": data,
-                "query": query
-            }
-        else:
-            # Query failed
-            error_message = response['QueryExecution']['Status'].get('StateChangeReason', 'Query failed with an Unknown error')
-            error_details = response['QueryExecution']['Status'].get('AthenaError', "Query failed with an Unknown Athena error")
-            logger.error(f"Query failed response: {response['QueryExecution']['Status']}")
-            
-            return {
-                "success": False,
-                "error": error_message,
-                "athena_error_details": error_details,
-                "query": query
-            }
-    
+    try:
+        result = get_athena_executor().execute(query)
+        return _format_result(query, result)
+
+    except AthenaQueryError as e:
+        return _format_error(query, e)
+
     except Exception as e:
         logger.exception("Error executing Athena query")
         return {
@@ -111,3 +91,32 @@ def run_athena_query(query: str) -> Dict[str, Any]:
             "error": str(e),
             "query": query
         }
+
+
+@tool
+def run_athena_queries(queries: List[str]) -> List[Dict[str, Any]]:
+    """
+    Execute several independent SQL queries on Amazon Athena concurrently.
+
+    Use this instead of repeated run_athena_query calls when the queries do
+    not depend on each other's results.
+
+    Args:
+        queries: SQL query strings to execute
+
+    Returns:
+        List with the result or error information of each query, in order
+    """
+    try:
+        executor = get_athena_executor()
+    except Exception as e:
+        logger.exception("Error creating Athena executor")
+        return [{"success": False, "error": str(e), "query": query} for query in queries]
+
+    responses = []
+    for query, result in zip(queries, executor.execute_many(queries)):
+        if "error" in result:
+            responses.append(_format_error(query, AthenaQueryError(result["error"], result["status"])))
+        else:
+            responses.append(_format_result(query, result))
+    return responses
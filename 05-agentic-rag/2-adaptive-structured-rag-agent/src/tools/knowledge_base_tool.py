@@ -6,10 +6,21 @@ import boto3
 import logging
 import os
 import json
+import threading
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
 
+from src.tools.schema_index import SchemaCache, LocalSchemaIndex
+
 logger = logging.getLogger(__name__)
 
+# Knowledge Base answers, keyed by table name ("*" for all tables)
+_schema_cache = SchemaCache()
+_schema_index: Optional[LocalSchemaIndex] = None
+_schema_index_lock = threading.Lock()
+# Query engine the agent runs against, set by configure_schema_source
+_query_engine = "sqlite"
+
 # Store the schema information for fallback
 WEALTH_MANAGEMENT_SCHEMA = [
     {
@@ -173,6 +184,21 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
             logger.info("get_schema called with flag=True")
             return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
         
+        # In local mode, answer from the SQLite catalog index when it knows the table.
+        # Athena tables live in Glue, so their schema comes from the Knowledge Base.
+        if _query_engine != "athena":
+            index = _get_schema_index()
+            if table_name is None and len(index):
+                return _format_schema_from_data(index.as_list())
+            if table_name and table_name in index:
+                return _format_table_schema(index.get(table_name))
+        
+        cache_key = table_name.lower() if table_name else "*"
+        cached = _schema_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Schema cache hit for {cache_key}")
+            return cached
+        
         # Get knowledge base ID from environment
         from config import get_config
         config = get_config()
@@ -182,9 +208,9 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
             logger.warning("No knowledge base ID provided, using mock schema data")
             return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
         
-        # Create Bedrock client
+        # Reuse the Bedrock client across calls
         logger.debug(f"Connecting to knowledge base: {knowledge_base_id}")
-        bedrock_client = boto3.client('bedrock-agent-runtime', region_name=config['aws_region'])
+        bedrock_client = _get_bedrock_client(config['aws_region'])
         
         # Prepare the query
         query = f"Describe the schema for {table_name} table" if table_name else "Describe all tables and their schemas"
@@ -214,6 +240,7 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
             return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
         
         logger.info("Successfully retrieved schema from knowledge base")
+        _schema_cache.set(cache_key, schema_info)
         return schema_info
         
     except Exception as e:
@@ -222,6 +249,58 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
         return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
 
 
+def configure_schema_source(query_engine: str) -> None:
+    """
+    Select where get_schema looks for schema information.
+    
+    Args:
+        query_engine: "athena" to use the Knowledge Base describing the Glue
+                     tables, anything else to use the local SQLite catalog first.
+    """
+    global _query_engine
+    # The CLI spells the local engine "sqllite"
+    _query_engine = "sqlite" if query_engine == "sqllite" else query_engine
+
+
+def invalidate_schema_cache(table_name: str = None) -> None:
+    """
+    Drop cached schema information so the next get_schema call reloads it.
+    
+    Args:
+        table_name: Optional table to invalidate. If None, the whole cache is
+                   cleared and the local schema index is rebuilt.
+    """
+    global _schema_index
+    
+    if table_name:
+        _schema_cache.invalidate(table_name.lower())
+        _schema_cache.invalidate("*")
+        return
+    
+    _schema_cache.invalidate()
+    with _schema_index_lock:
+        _schema_index = None
+
+
+@lru_cache(maxsize=None)
+def _get_bedrock_client(region_name: str):
+    """Create the bedrock-agent-runtime client once per region."""
+    return boto3.client('bedrock-agent-runtime', region_name=region_name)
+
+
+def _get_schema_index() -> LocalSchemaIndex:
+    """Build the local schema index on first use."""
+    global _schema_index
+    
+    with _schema_index_lock:
+        if _schema_index is None:
+            from config import get_config
+            config = get_config()
+            database_path = config['sqlite_database_path']
+            _schema_index = LocalSchemaIndex.build(database_path, WEALTH_MANAGEMENT_SCHEMA)
+        return _schema_index
+
+
 def _format_schema_from_data(schema_data: List[Dict[str, Any]], table_name: str = None) -> str:
     """
     Format schema information from the provided data.
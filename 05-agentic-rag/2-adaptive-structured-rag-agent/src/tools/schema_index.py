@@ -0,0 +1,158 @@
+"""
+Schema cache and local schema index for the get_schema tool.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEMA_CACHE_TTL = float(os.environ.get("SCHEMA_CACHE_TTL", "3600"))
+
+
+class SchemaCache:
+    """
+    Thread-safe TTL cache for formatted schema strings.
+
+    Entries expire ``ttl`` seconds after they are stored and can be dropped
+    early with ``invalidate``.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SCHEMA_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class LocalSchemaIndex:
+    """
+    Per-table schema index built from the local catalog.
+
+    Only tables that exist in the SQLite database are indexed: their column
+    names, types, primary and foreign keys come from the SQLite catalog
+    (``sqlite_master`` and ``PRAGMA table_info``/``foreign_key_list``).
+    The static catalog metadata only fills in descriptions and column
+    comments. Tables are stored in the same shape as the static schema and
+    keyed by lower-cased name.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Any]]):
+        self.tables = tables
+
+    def __contains__(self, table_name: str) -> bool:
+        return table_name.lower() in self.tables
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def get(self, table_name: str) -> Optional[Dict[str, Any]]:
+        return self.tables.get(table_name.lower())
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        return list(self.tables.values())
+
+    @classmethod
+    def build(cls, database_path: Optional[str], catalog: List[Dict[str, Any]]) -> "LocalSchemaIndex":
+        """
+        Build the index from a SQLite database and static catalog metadata.
+
+        Args:
+            database_path: Path to the SQLite database, the index is empty if missing
+            catalog: Static table definitions used for descriptions and comments
+
+        Returns:
+            LocalSchemaIndex: The populated index
+        """
+        metadata = {table["table_name"].lower(): table for table in catalog}
+        tables = {}
+
+        if database_path and Path(database_path).exists():
+            try:
+                with sqlite3.connect(f"file:{database_path}?mode=ro", uri=True) as conn:
+                    for table_name, table_info in _read_sqlite_catalog(conn).items():
+                        tables[table_name.lower()] = _merge_table(table_info, metadata.get(table_name.lower()))
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read SQLite catalog from {database_path}: {e}")
+        else:
+            logger.warning(f"SQLite database not found at {database_path}, local schema index is empty")
+
+        logger.info(f"Built local schema index with {len(tables)} tables")
+        return cls(tables)
+
+
+def _read_sqlite_catalog(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+    """Read table definitions from the SQLite catalog."""
+    tables = {}
+    names = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+
+    for (table_name,) in names:
+        quoted = '"' + table_name.replace('"', '""') + '"'
+        columns = conn.execute(f"PRAGMA table_info({quoted})").fetchall()
+        foreign_keys = conn.execute(f"PRAGMA foreign_key_list({quoted})").fetchall()
+
+        # table_info rows: (cid, name, type, notnull, default, pk)
+        primary_key = sorted((column for column in columns if column[5]), key=lambda column: column[5])
+        tables[table_name] = {
+            "table_name": table_name,
+            "columns": [{"Name": column[1], "Type": (column[2] or "").lower()} for column in columns],
+            "relationships": {
+                "primary_key": [
+                    {"column_name": column[1], "constraint": "not null" if column[3] else "nullable"}
+                    for column in primary_key
+                ],
+                # foreign_key_list rows: (id, seq, table, from, to, ...)
+                "foreign_keys": [
+                    {"join_on_column": fk[3], "table_name": fk[2]}
+                    for fk in foreign_keys
+                ]
+            }
+        }
+    return tables
+
+
+def _merge_table(table_info: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fill descriptions and column comments from catalog metadata."""
+    metadata = metadata or {}
+    comments = {column["Name"].lower(): column.get("Comment", "") for column in metadata.get("columns", [])}
+
+    merged = dict(table_info)
+    merged["database_name"] = metadata.get("database_name", "")
+    merged["table_description"] = metadata.get("table_description", "")
+    merged["columns"] = [
+        dict(column, Comment=comments.get(column["Name"].lower(), ""))
+        for column in table_info["columns"]
+    ]
+    if not merged["relationships"]["foreign_keys"]:
+        merged["relationships"] = dict(merged["relationships"])
+        del merged["relationships"]["foreign_keys"]
+    return merged
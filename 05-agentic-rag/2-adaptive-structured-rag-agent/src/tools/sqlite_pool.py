@@ -0,0 +1,143 @@
+"""
+Read-only SQLite connection pool for the SQLite query tool.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+DEFAULT_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "4"))
+DEFAULT_STATEMENT_CACHE = 128  # prepared statements kept per connection
+
+
+class SQLiteConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections.
+
+    Connections are opened with the ``mode=ro`` URI flag and
+    ``PRAGMA query_only`` so the agent can never modify the database, and
+    keep up to ``statement_cache`` prepared statements each, so repeated
+    queries skip re-parsing.
+    """
+
+    def __init__(self, database_path: str, size: int = DEFAULT_POOL_SIZE,
+                 statement_cache: int = DEFAULT_STATEMENT_CACHE):
+        self.database_path = database_path
+        self.size = size
+        self.statement_cache = statement_cache
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.database_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.statement_cache
+        )
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, opening a new one while the pool is below size."""
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+def paginate_query(query: str, page_size: int, offset: int) -> Tuple[str, Tuple[int, int]]:
+    """
+    Wrap a SELECT so SQLite only produces one page of rows.
+
+    One extra row is requested so the caller can tell whether another page
+    exists. The original query is kept as a subquery, so its own ORDER BY and
+    LIMIT still apply; it sits on its own lines so a trailing ``--`` comment
+    cannot swallow the closing parenthesis.
+
+    SQLite still evaluates the query and steps over ``offset`` rows for each
+    page, so later pages cost more; use ``iter_pages`` to read every page.
+    """
+    statement = query.strip()
+    while statement.endswith(";"):
+        statement = statement[:-1].rstrip()
+    return f"SELECT * FROM (\n{statement}\n) LIMIT ? OFFSET ?", (page_size + 1, offset)
+
+
+def fetch_page(pool: SQLiteConnectionPool, query: str, page_size: int, offset: int = 0) -> Dict[str, Any]:
+    """
+    Run a query and return one page of rows in column-oriented form.
+
+    Returns:
+        Dict with ``columns``, ``rows`` (list of value lists), ``row_count``
+        and ``has_more``
+    """
+    paged_query, params = paginate_query(query, page_size, offset)
+    with pool.connection() as conn:
+        cursor = conn.execute(paged_query, params)
+        try:
+            columns = [description[0] for description in cursor.description] if cursor.description else []
+            rows = cursor.fetchmany(page_size + 1)
+        finally:
+            cursor.close()
+
+    has_more = len(rows) > page_size
+    rows = [list(row) for row in rows[:page_size]]
+    return {"columns": columns, "rows": rows, "row_count": len(rows), "has_more": has_more}
+
+
+def iter_pages(pool: SQLiteConnectionPool, query: str, page_size: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yield successive pages of a query until the result set is exhausted.
+
+    The query runs once and pages are read from the same cursor, which keeps
+    its pooled connection until the iteration ends or is closed.
+    """
+    with pool.connection() as conn:
+        cursor = conn.execute(query)
+        try:
+            columns = [description[0] for description in cursor.description] if cursor.description else []
+            rows = cursor.fetchmany(page_size)
+            while True:
+                following = cursor.fetchmany(page_size)
+                page_rows = [list(row) for row in rows]
+                yield {"columns": columns, "rows": page_rows, "row_count": len(page_rows), "has_more": bool(following)}
+                if not following:
+                    break
+                rows = following
+        finally:
+            cursor.close()
@@ -5,30 +5,62 @@ from strands import tool
 import sqlite3
 import logging
 import os
+import threading
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from config import get_config
+from src.tools.sqlite_pool import SQLiteConnectionPool, fetch_page
+
 logger = logging.getLogger(__name__)
 
+# Rows returned per call, keeps large tables out of the model's context
+DEFAULT_PAGE_SIZE = int(os.environ.get("SQLITE_MAX_ROWS", "100"))
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sqlite_pool(database_path: str) -> SQLiteConnectionPool:
+    """
+    Get the shared read-only connection pool for a database file.
+    
+    Args:
+        database_path: Path to the SQLite database
+    
+    Returns:
+        SQLiteConnectionPool: Pool reused across tool calls
+    """
+    with _pools_lock:
+        pool = _pools.get(database_path)
+        if pool is None:
+            pool = _pools[database_path] = SQLiteConnectionPool(database_path)
+        return pool
+
+
 @tool
-def run_sqlite_query(query: str) -> Dict[str, Any]:
+def run_sqlite_query(query: str, page: int = 0, page_size: Optional[int] = None) -> Dict[str, Any]:
     """
-    Execute a SQL query on SQLite database.
+    Execute a read-only SQL query on SQLite database.
     
-    Uses sqlite3 to execute the query on local SQLite database and returns the results.
+    Uses a pooled read-only connection and returns one page of results in
+    column-oriented form. When more rows are available the response contains
+    next_page; call again with the same query and that page to fetch them.
+    Each page re-runs the query, so add an ORDER BY to keep pages stable.
     
     Args:
-        query: SQL query string to execute
+        query: SELECT (or WITH) SQL query string to execute
+        page: Zero-based page of results to return
+        page_size: Rows per page, defaults to SQLITE_MAX_ROWS (100)
     
     Returns:
-        Dict containing either query results or error information
+        Dict containing either query results (columns, rows) or error information
     """
     try:
         # Get database path from config
-        from config import get_config
         config = get_config()
         
-        database_path = config.get('sqlite_database_path', './data/wealthmanagement.db')
+        database_path = config['sqlite_database_path']
         
         # Validate database exists
         db_path = Path(database_path)
@@ -40,57 +72,36 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
                 "query": query
             }
         
+        # Only read queries are allowed, the connection is opened read-only
+        query_upper = query.strip().upper()
+        if not query_upper.startswith(('SELECT', 'WITH')):
+            return {
+                "success": False,
+                "error": "Only SELECT queries are supported: the database is opened read-only",
+                "query": query
+            }
+        
+        page_size = max(1, min(page_size or DEFAULT_PAGE_SIZE, DEFAULT_PAGE_SIZE))
+        page = max(0, page)
+        
         # Execute query
-        logger.info(f"Executing SQLite query: {query}")
+        logger.info(f"Executing SQLite query (page {page}): {query}")
+        result = fetch_page(get_sqlite_pool(database_path), query, page_size, page * page_size)
+        
+        logger.info(f"Query succeeded! Returned {result['row_count']} rows")
         
-        with sqlite3.connect(database_path) as conn:
-            # Enable row factory for dictionary-like access
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Execute the query
-            cursor.execute(query)
-            
-            # Handle different query types
-            query_upper = query.strip().upper()
-            if query_upper.startswith(('SELECT', 'WITH')):
-                # For SELECT queries, fetch results
-                rows = cursor.fetchall()
-                
-                # Get column names
-                columns = [description[0] for description in cursor.description] if cursor.description else []
-                
-                # Convert rows to list of dictionaries
-                data = []
-                for row in rows:
-                    item = {}
-                    for column in columns:
-                        value = row[column]
-                        # Handle None values consistently with Athena tool
-                        item[column] = value if value is not None else None
-                    data.append(item)
-                
-                logger.info(f"Query succeeded! Returned {len(data)} rows")
-                
-                return {
-                    "success": True,
-                    "data": data,
-                    "query": query
-                }
-            else:
-                # For INSERT, UPDATE, DELETE queries
-                affected_rows = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Query succeeded! {affected_rows} rows affected")
-                
-                return {
-                    "success": True,
-                    "data": [],
-                    "affected_rows": affected_rows,
-                    "message": f"Query executed successfully. {affected_rows} rows affected.",
-                    "query": query
-                }
+        response = {
+            "success": True,
+            "columns": result["columns"],
+            "rows": result["rows"],
+            "row_count": result["row_count"],
+            "page": page,
+            "query": query
+        }
+        if result["has_more"]:
+            response["next_page"] = page + 1
+            response["message"] = f"Showing {page_size} rows; more rows are available with page={page + 1}."
+        return response
     
     except sqlite3.Error as e:
         # Handle SQLite-specific errors
@@ -138,6 +149,8 @@ def _format_sqlite_error(error_message: str) -> str:
         return f"Foreign key constraint violation: {error_message}"
     elif 'unique constraint failed' in error_lower:
         return f"Unique constraint violation: {error_message}"
+    elif 'readonly' in error_lower or 'read-only' in error_lower:
+        return f"Database is read-only: {error_message}"
     elif 'not null constraint failed' in error_lower:
         return f"NOT NULL constraint violation: {error_message}"
     else: